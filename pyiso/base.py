@@ -1,21 +1,32 @@
+from calendar import monthrange
 from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
 from dateutil.parser import parse as dateutil_parse
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from bisect import bisect_right
+from functools import partial, lru_cache
+from os import environ
+import asyncio
+import copy
+import re
+import threading
+import numpy as np
 import pytz
 import requests
 import pandas as pd
 import zipfile
 from io import StringIO, BytesIO
-from time import sleep
+from time import monotonic, sleep
 from pyiso import LOGGER
+from pyiso.cache import ResponseCache
+from pyiso.records import record_class
 from pytz import AmbiguousTimeError
-import ssl
 
 
 try:
-    from urllib2 import urlopen
+    from urlparse import urlparse
 except ImportError:
-    from urllib.request import urlopen  # Changed from urllib2 for python3.x
+    from urllib.parse import urlparse
 
 # named tuple for time period interval labels
 IntervalChoices = namedtuple('IntervalChoices', ['hourly', 'fivemin', 'tenmin', 'fifteenmin', 'na', 'dam'])
@@ -26,6 +37,178 @@ FUEL_CHOICES = ['biogas', 'biomass', 'coal', 'geo', 'hydro',
                 'refuse', 'renewable', 'smhydro', 'solar', 'solarpv',
                 'solarth', 'thermal', 'wind', 'fossil', 'dual']
 
+# one bounded semaphore per host, shared by every client in the process
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+# token bucket state per rate-limited host, {host: (time the bucket is next full, time a pause ends)},
+# shared by every client in the process
+_host_request_slots = {}
+_host_request_slots_lock = threading.Lock()
+
+# in-flight coalesced calls, {key: future}, shared by every client in the process
+_coalesced_calls = {}
+_coalesced_calls_lock = threading.Lock()
+
+
+class TimestampParser(object):
+    """
+    Parses timestamp strings, trying fast fixed-format parsers before dateutil.
+
+    The format that parsed the previous string is tried first,
+    so a run of timestamps in one format costs a single parse call each.
+    Strings that match none of FORMATS are parsed with dateutil.parser.parse.
+    """
+    # tried in order with datetime.strptime; all agree with dateutil on the strings they accept
+    FORMATS = [
+        '%Y-%m-%dT%H:%M:%S%z',  # like 2014-05-08T07:00:00-00:00 (CAISO OASIS)
+        '%Y-%m-%d %H:%M',  # like 2016-04-25 12:00 (MISO)
+        '%Y-%m-%dT%H:%M:%S',
+        '%Y-%m-%d %H:%M:%S',
+        '%Y%m%dT%H%z',  # like 20160425T04Z (EIA)
+        '%m/%d/%Y %H:%M:%S',
+        '%m/%d/%Y %H:%M',
+        '%m.%d.%Y %H:%M',  # like 12.11.2015 17:15 (PJM)
+        '%b %d, %Y %H:%M:%S',  # like Apr 14, 2016 12:45:14 (ERCOT)
+    ]
+
+    # colon in a trailing utc offset like -00:00, which %z only accepts from Python 3.7
+    offset_colon_re = re.compile(r'(?<=[+-]\d\d):(?=\d\d$)')
+
+    def __init__(self):
+        self.last_format = None
+
+    def parse(self, ts_str):
+        """
+        Parse a timestamp string to a datetime.
+
+        :param string ts_str: The string to parse.
+        :return: The parsed datetime, aware if the string includes an offset.
+        :rtype: datetime
+        """
+        # try the last successful format first
+        last_format = self.last_format
+        if last_format is not None:
+            try:
+                return self._parse_format(ts_str, last_format)
+            except ValueError:
+                pass
+
+        # try the other known formats
+        for fmt in self.FORMATS:
+            if fmt == last_format:
+                continue
+            try:
+                ts = self._parse_format(ts_str, fmt)
+            except ValueError:
+                continue
+            self.last_format = fmt
+            return ts
+
+        # fall back to dateutil
+        return dateutil_parse(ts_str)
+
+    def _parse_format(self, ts_str, fmt):
+        if fmt.endswith('%z'):
+            # offsets as %z accepts them on every Python 3 version: Z as +0000, and no colon
+            if ts_str.endswith('Z'):
+                ts_str = ts_str[:-1] + '+0000'
+            else:
+                ts_str = self.offset_colon_re.sub('', ts_str)
+        return datetime.strptime(ts_str, fmt)
+
+
+@lru_cache(maxsize=None)
+def get_timezone(tz_name):
+    """
+    Returns the pytz timezone for tz_name, resolved once per name.
+    """
+    return pytz.timezone(tz_name)
+
+
+@lru_cache(maxsize=None)
+def get_dst_table(tz_name):
+    """
+    Returns the DSTTable for tz_name, built once per name.
+    """
+    return DSTTable(get_timezone(tz_name))
+
+
+class DSTTable(object):
+    """
+    Precomputed UTC offsets of a pytz timezone, keyed by naive local wall time.
+
+    Looking up the offset of a naive local datetime gives the same result as
+    tz.localize(local_ts) with pytz's default is_dst=False:
+    ambiguous times are standard time, and nonexistent times get the offset in effect before the transition.
+    Offset changes are bucketed by year, so each lookup scans a list of about three entries.
+    """
+    def __init__(self, tz):
+        self.tz = tz
+
+        # parallel sorted lists of local wall times and the offset in effect from then on
+        starts = [datetime.min]
+        if not isinstance(tz, pytz.tzinfo.DstTzInfo):
+            # fixed offset
+            offsets = [tz.localize(datetime(2000, 1, 1)).utcoffset()]
+        else:
+            offsets = [tz._transition_info[0][0]]
+            for i in range(1, len(tz._utc_transition_times)):
+                utc_ts = tz._utc_transition_times[i]
+                prev_offset = tz._transition_info[i-1][0]
+                new_offset = tz._transition_info[i][0]
+
+                # local times in [gap_start, gap_end) are ambiguous or nonexistent,
+                # let pytz decide which offset they get
+                gap_start = utc_ts + min(prev_offset, new_offset)
+                gap_end = utc_ts + max(prev_offset, new_offset)
+                if gap_start < gap_end:
+                    starts.append(gap_start)
+                    offsets.append(tz.localize(gap_start, is_dst=False).utcoffset())
+                starts.append(gap_end)
+                offsets.append(new_offset)
+
+        self.starts = starts
+        self.offsets = offsets
+
+        # year -> list of (local wall time, offset) that apply during that year
+        self._years = {}
+
+    def utcoffset(self, local_ts):
+        """
+        Returns the UTC offset of a naive local datetime.
+
+        :param datetime local_ts: Naive datetime in local wall time.
+        :rtype: timedelta
+        """
+        try:
+            entries = self._years[local_ts.year]
+        except KeyError:
+            entries = self._build_year(local_ts.year)
+
+        # the first entry starts on or before Jan 1
+        for start, offset in reversed(entries[1:]):
+            if local_ts >= start:
+                return offset
+        return entries[0][1]
+
+    def to_utc(self, local_ts):
+        """
+        Converts a naive local datetime to an aware UTC datetime.
+
+        :param datetime local_ts: Naive datetime in local wall time.
+        :rtype: datetime
+        """
+        return (local_ts - self.utcoffset(local_ts)).replace(tzinfo=pytz.utc)
+
+    def _build_year(self, year):
+        year_start = datetime(year, 1, 1)
+        first = bisect_right(self.starts, year_start) - 1
+        last = bisect_right(self.starts, datetime(year, 12, 31, 23, 59, 59, 999999))
+        entries = list(zip(self.starts[first:last], self.offsets[first:last]))
+        self._years[year] = entries
+        return entries
+
 
 class BaseClient(object):
     """
@@ -43,13 +226,66 @@ class BaseClient(object):
 
     TIMEOUT_SECONDS = 20
 
-    def __init__(self, timeout_seconds=20):
+    # maximum number of simultaneous connections to any one host
+    MAX_CONNECTIONS_PER_HOST = 4
+
+    # minimum seconds between the starts of two requests to a host, for sources with a published rate limit
+    MIN_REQUEST_INTERVALS = {}
+
+    # number of requests to a host in MIN_REQUEST_INTERVALS that may start at once
+    # before the rest are spaced out (the token bucket size); 1 if not listed
+    REQUEST_BURSTS = {}
+
+    # maximum number of worker threads for concurrent requests
+    MAX_WORKERS = 8
+
+    # seconds to cache responses whose url matches no rule in CACHE_RULES
+    CACHE_TTL_SECONDS = 60
+
+    # list of (regex, ttl) pairs, checked in order against the full request url.
+    # ttl is in seconds, or None to cache forever.
+    # If the regex has a group named date (YYYYMMDD), month (YYYYMM) or year (YYYY),
+    # a ttl of None only applies once that period ended more than CACHE_FINAL_AFTER_DAYS ago,
+    # since files for recent periods may still be revised.
+    CACHE_RULES = []
+    CACHE_FINAL_AFTER_DAYS = 2
+
+    # choices for the return_type option of get_* methods:
+    # a list of dicts, a DataFrame with a UTC DatetimeIndex named timestamp, a pyarrow Table,
+    # or a list of compact pyiso.records.DataPoint records
+    RETURN_TYPES = ['list', 'frame', 'arrow', 'records']
+
+    # length of the chunks yielded by iter_* methods, in local time: 'day', 'month' or 'year'.
+    # Clients whose source files each cover a month or a year should yield one chunk per file.
+    ITER_PERIOD = 'day'
+
+    # string columns stored as categoricals in frame and arrow results
+    CATEGORICAL_COLUMNS = ['ba_name', 'market', 'freq', 'fuel_name', 'node_id',
+                           'source_ba_name', 'dest_ba_name']
+
+    def __init__(self, timeout_seconds=20, executor=None, cache=None):
         # will hold query options
         self.options = {}
 
         # connection timeout
         self.timeout_seconds = timeout_seconds
 
+        # executor for concurrent fetches, created on first use if not provided
+        self.executor = executor
+
+        # response cache: a ResponseCache, a directory path, or None to use $PYISO_CACHE_DIR if set
+        if cache is None:
+            cache = environ.get('PYISO_CACHE_DIR', None)
+        if cache and not isinstance(cache, ResponseCache):
+            cache = ResponseCache(cache)
+        self.cache = cache or None
+
+        # guards lazy creation of the session and executor
+        self._setup_lock = threading.Lock()
+
+        # remembers the last timestamp format seen by utcify
+        self.timestamp_parser = TimestampParser()
+
     def get_generation(self, latest=False, yesterday=False, start_at=False, end_at=False, **kwargs):
         """
         Scrape and parse generation fuel mix data.
@@ -64,9 +300,12 @@ class BaseClient(object):
         :param datetime end_at: If the datetime is naive, it is assummed to be in the timezone of the Balancing Authority. The timestamp of all returned data points will be less than or equal to this value.
            If using, must provide both ``start_at`` and ``end_at`` parameters.
            Not available for all regions.
+        :param str return_type: ``'list'`` (default) for a list of dicts, ``'frame'`` for a DataFrame,
+           ``'arrow'`` for a pyarrow Table, or ``'records'`` for a list of compact dict-like records.
+           See ``BaseClient.RETURN_TYPES``.
         :return: List of dicts, each with keys ``[ba_name, timestamp, freq, market, fuel_name, gen_MW]``.
            Timestamps are in UTC.
-        :rtype: list
+        :rtype: list, DataFrame or pyarrow.Table
 
         """
         raise NotImplementedError('Derived classes must implement the get_generation method.')
@@ -85,9 +324,12 @@ class BaseClient(object):
         :param datetime end_at: If the datetime is naive, it is assummed to be in the timezone of the Balancing Authority. The timestamp of all returned data points will be less than or equal to this value.
            If using, must provide both ``start_at`` and ``end_at`` parameters.
            Not available for all regions.
+        :param str return_type: ``'list'`` (default) for a list of dicts, ``'frame'`` for a DataFrame,
+           ``'arrow'`` for a pyarrow Table, or ``'records'`` for a list of compact dict-like records.
+           See ``BaseClient.RETURN_TYPES``.
         :return: List of dicts, each with keys ``[ba_name, timestamp, freq, market, load_MW]``.
            Timestamps are in UTC.
-        :rtype: list
+        :rtype: list, DataFrame or pyarrow.Table
 
         """
         raise NotImplementedError('Derived classes must implement the get_load method.')
@@ -107,9 +349,12 @@ class BaseClient(object):
         :param datetime end_at: If the datetime is naive, it is assummed to be in the timezone of the Balancing Authority. The timestamp of all returned data points will be less than or equal to this value.
            If using, must provide both ``start_at`` and ``end_at`` parameters.
            Not available for all regions.
+        :param str return_type: ``'list'`` (default) for a list of dicts, ``'frame'`` for a DataFrame,
+           ``'arrow'`` for a pyarrow Table, or ``'records'`` for a list of compact dict-like records.
+           See ``BaseClient.RETURN_TYPES``.
         :return: List of dicts, each with keys ``[ba_name, timestamp, freq, market, net_exp_MW]``.
            Timestamps are in UTC.
-        :rtype: list
+        :rtype: list, DataFrame or pyarrow.Table
 
         """
         raise NotImplementedError('Derived classes must implement the get_trade method.')
@@ -129,9 +374,12 @@ class BaseClient(object):
         :param datetime end_at: If the datetime is naive, it is assummed to be in the timezone of the Balancing Authority. The timestamp of all returned data points will be less than or equal to this value.
            If using, must provide both ``start_at`` and ``end_at`` parameters.
            Not available for all regions.
+        :param str return_type: ``'list'`` (default) for a list of dicts, ``'frame'`` for a DataFrame,
+           ``'arrow'`` for a pyarrow Table, or ``'records'`` for a list of compact dict-like records.
+           See ``BaseClient.RETURN_TYPES``.
         :return: List of dicts, each with keys ``[ba_name, timestamp, freq, market, lmp, lmp_type]``.
            Timestamps are in UTC.
-        :rtype: list
+        :rtype: list, DataFrame or pyarrow.Table
 
         """
         raise NotImplementedError('Derived classes must implement the get_lmp method.')
@@ -142,6 +390,11 @@ class BaseClient(object):
         """
         self.options = kwargs
 
+        # check return type
+        self.options.setdefault('return_type', 'list')
+        if self.options['return_type'] not in self.RETURN_TYPES:
+            raise ValueError('return_type must be one of %s, not %s' % (self.RETURN_TYPES, self.options['return_type']))
+
         # check start_at and end_at args
         if self.options.get('start_at', None) and self.options.get('end_at', None):
             assert self.options['start_at'] < self.options['end_at']
@@ -158,7 +411,7 @@ class BaseClient(object):
 
         # set start_at and end_at for yesterday in local time
         elif self.options.get('yesterday', None):
-            local_now = pytz.utc.localize(datetime.utcnow()).astimezone(pytz.timezone(self.TZ_NAME))
+            local_now = pytz.utc.localize(datetime.utcnow()).astimezone(self.tz)
             self.options['end_at'] = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
             self.options['start_at'] = self.options['end_at'] - timedelta(days=1)
             self.options['sliceable'] = True
@@ -167,7 +420,7 @@ class BaseClient(object):
 
         # set start_at and end_at for today+tomorrow in local time
         elif self.options.get('forecast', None):
-            local_now = pytz.utc.localize(datetime.utcnow()).astimezone(pytz.timezone(self.TZ_NAME))
+            local_now = pytz.utc.localize(datetime.utcnow()).astimezone(self.tz)
             self.options['start_at'] = local_now.replace(microsecond=0)
             self.options['end_at'] = self.options['start_at'] + timedelta(days=2)
             self.options['sliceable'] = True
@@ -182,7 +435,8 @@ class BaseClient(object):
         """
         Convert a datetime or datetime string to UTC.
 
-        Uses the default behavior of dateutil.parser.parse to convert the string to a datetime object.
+        Strings are parsed with a TimestampParser, which falls back to
+        the default behavior of dateutil.parser.parse for unfamiliar formats.
 
         :param string local_ts: The local datetime to be converted.
         :param string tz_name: If local_ts is naive, it is assumed to be in timezone tz. If tz is not provided, the client's default timezone is used.
@@ -192,22 +446,21 @@ class BaseClient(object):
         """
         # set up tz
         if tz_name is None:
-            tz = pytz.timezone(self.TZ_NAME)
-        else:
-            tz = pytz.timezone(tz_name)
+            tz_name = self.TZ_NAME
 
         # parse
-        try:
-            local_ts = dateutil_parse(local_ts_str)
-        except AttributeError:  # already parsed
+        if isinstance(local_ts_str, datetime):  # already parsed
             local_ts = local_ts_str
+        else:
+            local_ts = self.timestamp_parser.parse(local_ts_str)
 
         # localize
         if local_ts.tzinfo is None:  # unaware
             if is_dst is None:
-                aware_local_ts = tz.localize(local_ts)
+                # same as pytz localize with is_dst=False
+                return get_dst_table(tz_name).to_utc(local_ts)
             else:
-                aware_local_ts = tz.localize(local_ts, is_dst=is_dst)
+                aware_local_ts = get_timezone(tz_name).localize(local_ts, is_dst=is_dst)
         else:  # already aware
             aware_local_ts = local_ts
 
@@ -230,10 +483,11 @@ class BaseClient(object):
         return cleaned_vals
 
     def fetch_xls(self, url):
-        # follow http://stackoverflow.com/questions/27835619/ssl-certificate-verify-failed-error
-        context = ssl._create_unverified_context()
-        socket = urlopen(url, context=context)
-        xd = pd.ExcelFile(socket)
+        # use self.request so that the file can be cached
+        response = self.request(url)
+        if not response:
+            raise ValueError('%s: could not fetch excel file %s' % (self.NAME, url))
+        xd = pd.ExcelFile(BytesIO(response.content))
         return xd
 
     def request(self, url, mode='get', retry_sec=5, retries_remaining=5, **kwargs):
@@ -247,18 +501,26 @@ class BaseClient(object):
         if mode not in allowed_modes:
             raise ValueError('Invalid request mode %s' % mode)
 
+        # serve from cache if possible
+        cache_key = None
+        if self.cache is not None:
+            cache_key, full_url = self.cache.make_key(mode, url, params=kwargs.get('params'),
+                                                      data=kwargs.get('data'), json=kwargs.get('json'))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                LOGGER.debug('%s: request success for %s, %s with cache hit True' % (self.NAME, url, kwargs))
+                return cached
+
         # check for session
-        try:
-            session = getattr(self, 'session')
-        except AttributeError:
-            self.session = requests.Session()
-            session = self.session
+        session = self.get_session()
 
-        # carry out request
+        # carry out request, holding one of the connection slots for this host
         try:
-            response = getattr(session, mode)(url, verify=False,
-                                              timeout=self.timeout_seconds,
-                                              **kwargs)
+            with self.host_semaphore(url):
+                self.wait_for_host(url)
+                response = getattr(session, mode)(url, verify=False,
+                                                  timeout=self.timeout_seconds,
+                                                  **kwargs)
         # except requests.exceptions.ChunkedEncodingError as e:
         #     # JSON incomplete or not found
         #     msg = '%s: chunked encoding error for %s, %s:\n%s' % (self.NAME, url, kwargs, e)
@@ -278,6 +540,12 @@ class BaseClient(object):
             # success
             LOGGER.debug('%s: request success for %s, %s with cache hit %s' % (self.NAME, url, kwargs, getattr(response, 'from_cache', None)))
 
+            # store in cache
+            if cache_key is not None and self.is_cacheable(response):
+                ttl = self.cache_ttl(full_url)
+                if ttl != 0:
+                    self.cache.set(cache_key, response, ttl)
+
         elif response.status_code == 429:
             if retries_remaining > 0:
                 # retry on throttle
@@ -298,6 +566,293 @@ class BaseClient(object):
 
         return response
 
+    def is_cacheable(self, response):
+        """
+        Returns False if a successful response must not be stored in the cache,
+        eg because it is an error report served with status 200.
+        """
+        return True
+
+    def cache_ttl(self, url):
+        """
+        Returns the number of seconds the response for url may be cached,
+        None to cache it forever, or 0 to not cache it.
+
+        :param string url: The full request url, including the query string.
+        """
+        for pattern, ttl in self.CACHE_RULES:
+            match = re.search(pattern, url)
+            if match:
+                if ttl is None and not self._period_is_final(match):
+                    return self.CACHE_TTL_SECONDS
+                return ttl
+
+        return self.CACHE_TTL_SECONDS
+
+    def _period_is_final(self, match):
+        # find the last day of the period named in the url, if any
+        groups = match.groupdict()
+        if groups.get('date'):
+            period_end = datetime.strptime(groups['date'], '%Y%m%d').date()
+        elif groups.get('month'):
+            month_start = datetime.strptime(groups['month'], '%Y%m').date()
+            period_end = month_start.replace(day=monthrange(month_start.year, month_start.month)[1])
+        elif groups.get('year'):
+            period_end = date(int(groups['year']), 12, 31)
+        else:
+            return True
+
+        return self.date_is_final(period_end)
+
+    def date_is_final(self, this_date):
+        """
+        Returns True if data for this_date (a datetime.date) will no longer be revised,
+        i.e. the day ended more than CACHE_FINAL_AFTER_DAYS ago.
+        """
+        return this_date < datetime.utcnow().date() - timedelta(days=self.CACHE_FINAL_AFTER_DAYS)
+
+    def get_session(self):
+        """
+        Returns the client's requests.Session, creating it if needed.
+        Connections are pooled per host, and at most MAX_CONNECTIONS_PER_HOST are kept open to any host.
+        """
+        with self._setup_lock:
+            if getattr(self, 'session', None) is None:
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.MAX_CONNECTIONS_PER_HOST,
+                                                        pool_block=True)
+                self.session = requests.Session()
+                self.session.mount('http://', adapter)
+                self.session.mount('https://', adapter)
+        return self.session
+
+    def host_semaphore(self, url):
+        """
+        Returns the semaphore that limits concurrent requests to the host of url.
+        The semaphore is shared by all clients, so parallel clients for the same ISO
+        cannot open more than MAX_CONNECTIONS_PER_HOST connections between them.
+        """
+        host = urlparse(url).netloc
+        with _host_semaphores_lock:
+            if host not in _host_semaphores:
+                _host_semaphores[host] = threading.BoundedSemaphore(self.MAX_CONNECTIONS_PER_HOST)
+            return _host_semaphores[host]
+
+    def wait_for_host(self, url):
+        """
+        Sleep until the rate limit for the host of url allows another request.
+        Each host in MIN_REQUEST_INTERVALS has a token bucket holding REQUEST_BURSTS tokens,
+        refilled at one token per interval. Each caller reserves the next free token,
+        so concurrent requests queue in order instead of being sent at once.
+        Callers also wait out any pause set with pause_host, even one set while they were queued.
+        """
+        host = urlparse(url).netloc
+        interval = self.MIN_REQUEST_INTERVALS.get(host, 0)
+        burst = self.REQUEST_BURSTS.get(host, 1)
+
+        while True:
+            with _host_request_slots_lock:
+                if not interval and host not in _host_request_slots:
+                    return
+                now = monotonic()
+                full_at, paused_until = _host_request_slots.get(host, (now, now))
+                slot = max(now, paused_until, full_at - (burst - 1) * interval)
+                _host_request_slots[host] = (max(full_at, slot) + interval, paused_until)
+            if slot > now:
+                sleep(slot - now)
+
+            # done unless the host was paused while waiting
+            with _host_request_slots_lock:
+                if _host_request_slots[host][1] <= monotonic():
+                    return
+
+    def pause_host(self, url, seconds):
+        """
+        Hold back every request to the host of url that has not been sent yet
+        for at least seconds from now, eg after the host reported it was throttling requests.
+        """
+        host = urlparse(url).netloc
+        with _host_request_slots_lock:
+            now = monotonic()
+            full_at, paused_until = _host_request_slots.get(host, (now, now))
+            _host_request_slots[host] = (full_at, max(paused_until, now + seconds))
+
+    def coalesce(self, key, func, *args, **kwargs):
+        """
+        Call func(*args, **kwargs), sharing the call with every caller that uses the same key.
+        The first caller runs func; callers that arrive while it is running
+        get the same result (or exception) without calling func.
+        Nothing is kept once the call has finished, so later callers run func again.
+
+        Results are shared between threads and clients, so callers must not modify them.
+        """
+        with _coalesced_calls_lock:
+            future = _coalesced_calls.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                _coalesced_calls[key] = future
+
+        if is_owner:
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with _coalesced_calls_lock:
+                    del _coalesced_calls[key]
+
+        return future.result()
+
+    def coalesced_request(self, url, **kwargs):
+        """
+        Same as request, but shares the response with concurrent callers
+        requesting the same url with the same kwargs (see coalesce).
+        """
+        key = ('request', url, repr(sorted(kwargs.items())))
+        return self.coalesce(key, self.request, url, **kwargs)
+
+    def get_executor(self):
+        """
+        Returns the executor used for concurrent fetches.
+        Any concurrent.futures.Executor can be passed to the constructor as ``executor``;
+        by default a thread pool with MAX_WORKERS threads is created on first use.
+        """
+        with self._setup_lock:
+            if getattr(self, 'executor', None) is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS)
+        return self.executor
+
+    def map_concurrent(self, func, items):
+        """
+        Call func on each of items concurrently on the client's executor.
+        Returns a list of results in the same order as items, so output is deterministic.
+        Exceptions raised by func are re-raised here.
+
+        func must not itself call map_concurrent or request_many,
+        or it can deadlock waiting for a worker that is busy waiting for it.
+        Requests made by func are still limited to MAX_CONNECTIONS_PER_HOST per host.
+        """
+        executor = self.get_executor()
+        futures = [executor.submit(func, item) for item in items]
+        return [future.result() for future in futures]
+
+    def request_many(self, urls, mode='get', **kwargs):
+        """
+        Get or post to each URL in urls concurrently with the provided kwargs.
+        Returns a list of responses (or None for failed requests) in the same order as urls.
+        """
+        return self.map_concurrent(partial(self.request, mode=mode, **kwargs), urls)
+
+    async def arequest(self, url, mode='get', **kwargs):
+        """
+        Coroutine version of request.
+        The blocking request runs on the client's thread pool,
+        so many requests can be awaited together, e.g. with asyncio.gather.
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.get_executor(),
+                                          partial(self.request, url, mode=mode, **kwargs))
+
+    async def _arun(self, method_name, *args, **kwargs):
+        # run a get_* method in a worker thread on a copy of the client,
+        # so that concurrent coroutines do not overwrite each other's options
+        clone = copy.copy(self)
+        clone.options = {}
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, partial(getattr(clone, method_name), *args, **kwargs))
+
+    async def aget_generation(self, *args, **kwargs):
+        """Coroutine version of get_generation. Takes the same arguments and returns the same data."""
+        return await self._arun('get_generation', *args, **kwargs)
+
+    async def aget_load(self, *args, **kwargs):
+        """Coroutine version of get_load. Takes the same arguments and returns the same data."""
+        return await self._arun('get_load', *args, **kwargs)
+
+    async def aget_trade(self, *args, **kwargs):
+        """Coroutine version of get_trade. Takes the same arguments and returns the same data."""
+        return await self._arun('get_trade', *args, **kwargs)
+
+    async def aget_lmp(self, *args, **kwargs):
+        """Coroutine version of get_lmp. Takes the same arguments and returns the same data."""
+        return await self._arun('get_lmp', *args, **kwargs)
+
+    def iter_generation(self, **kwargs):
+        """
+        Generator version of get_generation. Takes the same keyword arguments,
+        and yields the get_generation result for each ITER_PERIOD in the requested range, in order.
+        """
+        return self._iter_periods(self.get_generation, **kwargs)
+
+    def iter_load(self, **kwargs):
+        """
+        Generator version of get_load. Takes the same keyword arguments,
+        and yields the get_load result for each ITER_PERIOD in the requested range, in order.
+        """
+        return self._iter_periods(self.get_load, **kwargs)
+
+    def iter_trade(self, **kwargs):
+        """
+        Generator version of get_trade. Takes the same keyword arguments,
+        and yields the get_trade result for each ITER_PERIOD in the requested range, in order.
+        """
+        return self._iter_periods(self.get_trade, **kwargs)
+
+    def iter_lmp(self, **kwargs):
+        """
+        Generator version of get_lmp. Takes the same keyword arguments,
+        and yields the get_lmp result for each ITER_PERIOD in the requested range, in order.
+        """
+        return self._iter_periods(self.get_lmp, **kwargs)
+
+    def _iter_periods(self, getter, **kwargs):
+        """
+        Calls getter once per local ITER_PERIOD between start_at and end_at,
+        and yields each non-empty result as soon as it is parsed.
+        Without a date range (e.g. latest=True), yields the result of a single call.
+        Chunks do not overlap, so together they hold the same data as one call for the whole range.
+        """
+        # resolve the requested range in UTC,
+        # with BaseClient.utcify because clients may override utcify for their own timestamps
+        if kwargs.get('start_at', None) and kwargs.get('end_at', None):
+            chunk_start = BaseClient.utcify(self, kwargs['start_at'])
+            end_at = BaseClient.utcify(self, kwargs['end_at'])
+        elif kwargs.get('yesterday', None) or kwargs.get('forecast', None):
+            BaseClient.handle_options(self, **kwargs)
+            chunk_start = self.options['start_at']
+            end_at = self.options['end_at']
+        else:
+            result = getter(**kwargs)
+            if len(result) > 0:
+                yield result
+            return
+
+        while chunk_start <= end_at:
+            # next period starts at local midnight
+            local_date = chunk_start.astimezone(self.tz).date()
+            if self.ITER_PERIOD == 'year':
+                next_date = date(local_date.year + 1, 1, 1)
+            elif self.ITER_PERIOD == 'month':
+                next_date = (local_date.replace(day=1) + timedelta(days=32)).replace(day=1)
+            else:
+                next_date = local_date + timedelta(days=1)
+            next_start = self.local_to_utc(datetime.combine(next_date, datetime.min.time()))
+
+            # end_at is inclusive, so the last chunk takes it even if it is a period boundary
+            if next_start >= end_at:
+                chunk_end = end_at
+            else:
+                chunk_end = next_start - timedelta(microseconds=1)
+
+            chunk_kwargs = dict(kwargs, start_at=chunk_start, end_at=chunk_end)
+            result = getter(**chunk_kwargs)
+            if len(result) > 0:
+                yield result
+
+            if chunk_end == end_at:
+                return
+            chunk_start = next_start
+
     def unzip(self, content):
         """
         Unzip encoded data.
@@ -325,6 +880,30 @@ class BaseClient(object):
         # return
         return unzipped
 
+    def iter_unzip(self, content):
+        """
+        Yields a file-like object for each file in zipped content.
+        Files are decompressed as they are read, so no file's content is held in memory in full,
+        and each one is closed when the next is requested.
+        Yields nothing if content is not a zip file.
+        """
+        # wrap content without copying it
+        try:
+            filecontent = BytesIO(content)
+        except TypeError:
+            filecontent = StringIO(content)
+
+        try:
+            z = zipfile.ZipFile(filecontent)
+        except zipfile.BadZipfile:
+            LOGGER.error('%s: unzip failure for content:\n%s' % (self.NAME, content))
+            return
+
+        with z:
+            for thisfile in z.namelist():
+                with z.open(thisfile) as member:
+                    yield member
+
     def parse_to_df(self, filelike, mode='csv', header_names=None, sheet_names=None, **kwargs):
         """
         Parse a delimited or excel file from the provided content and return a DataFrame.
@@ -394,6 +973,8 @@ class BaseClient(object):
         :param DateTimeIndex local_index: The local DateTimeIndex to be converted.
         :param string tz_name: If local_ts is naive, it is assumed to be in timezone tz.
             If tz is not provided, the client's default timezone is used.
+        :param tz_col: Optional sequence of timezone names, one per row of local_index.
+            Rows with an unknown timezone name are assumed to be in timezone tz_name.
         :return: DatetimeIndex in UTC.
         :rtype: DatetimeIndex
         """
@@ -403,21 +984,33 @@ class BaseClient(object):
 
         # use tz col if given
         if tz_col is not None:
-            # it seems like we shouldn't have to iterate, but all the smart ways aren't working
-            aware_utc_list = []
-            for i in range(len(local_index)):
+            # localize all rows with the same tz label at once
+            labels = pd.Series(np.asarray(tz_col), dtype=object).fillna(tz_name)
+            local_index = pd.DatetimeIndex(local_index)
+            positions = []
+            pieces = []
+            for label, label_positions in labels.groupby(labels.values).indices.items():
                 try:
-                    aware_local_ts = pytz.timezone(tz_col[i]).localize(local_index[i])
+                    tz = get_timezone(label)
                 except pytz.UnknownTimeZoneError:
                     # fall back to local ts
-                    aware_local_ts = pytz.timezone(tz_name).localize(local_index[i])
+                    tz = get_timezone(tz_name)
 
-                # utcify
-                aware_utc_ts = self.utcify(aware_local_ts)
-                aware_utc_list.append(aware_utc_ts)
+                # same as pytz localize with is_dst=False:
+                # ambiguous times are standard time, nonexistent times get the standard offset
+                aware_local_piece = local_index[label_positions].tz_localize(
+                    tz, ambiguous=np.zeros(len(label_positions), dtype=bool),
+                    nonexistent=timedelta(hours=1))
 
-            # indexify
-            aware_utc_index = pd.DatetimeIndex(aware_utc_list)
+                positions.append(label_positions)
+                pieces.append(aware_local_piece.tz_convert('UTC'))
+
+            # reassemble in original row order
+            if pieces:
+                order = np.argsort(np.concatenate(positions), kind='mergesort')
+                aware_utc_index = pieces[0].append(pieces[1:])[order]
+            else:
+                aware_utc_index = pd.DatetimeIndex([], tz='UTC')
 
         else:
             # localize
@@ -466,6 +1059,14 @@ class BaseClient(object):
         return df.stack().reset_index(level=1)
 
     def serialize(self, df, header, extras={}):
+        # other return types: name the index and columns by header instead of building dicts
+        if self.options.get('return_type', 'list') != 'list':
+            df = df.reset_index()
+            df.columns = header[:len(df.columns)]
+            if self.options['return_type'] == 'records':
+                return self.format_records(df, extras)
+            return self.format_frame(df, extras)
+
         data = []
 
         for row in df.itertuples():
@@ -479,13 +1080,108 @@ class BaseClient(object):
         """DF is a DataFrame with DateTimeIndex and columns fuel_type and gen_MW (or load_mW).
         Index and columns are already properly named."""
         df = df.reset_index(drop=drop_index)
+        if self.options.get('return_type', 'list') == 'records':
+            return self.format_records(df, extras)
+        if self.options.get('return_type', 'list') != 'list':
+            return self.format_frame(df, extras)
         for key in extras:
             df[key] = extras[key]
         return df.to_dict(orient='records')
 
+    def serialize_records(self, data):
+        """
+        Returns data, a list of dicts, in the return_type set in the options.
+        Data that is not a list is assumed to be serialized already and is returned as is.
+        """
+        if self.options.get('return_type', 'list') == 'list' or not isinstance(data, list):
+            return data
+        if self.options['return_type'] == 'records':
+            return [record_class(dp.keys())(dp) for dp in data]
+        return self.format_frame(pd.DataFrame.from_records(data))
+
+    def format_records(self, df, extras={}):
+        """
+        Converts a DataFrame with one column per key to a list of pyiso.records.DataPoint records,
+        without building a dict per row.
+
+        :param DataFrame df: Data, one row per data point.
+        :param dict extras: Keys and values to add to every record.
+        :return: List of records of the class that matches the columns, e.g. GenPoint for gen_MW.
+        :rtype: list
+        """
+        columns = [str(col) for col in df.columns]
+        record_cls = record_class(columns + list(extras.keys()))
+
+        keys = columns + list(extras.keys())
+        extra_values = tuple(extras.values())
+
+        data = []
+        for row in df.itertuples(index=False, name=None):
+            dp = record_cls()
+            for key, value in zip(keys, row + extra_values):
+                dp[key] = value
+            data.append(dp)
+        return data
+
+    def format_frame(self, df, extras={}):
+        """
+        Converts a DataFrame with a timestamp column or index to a tidy result
+        in the return_type set in the options, 'frame' or 'arrow'.
+        Constant columns in extras are added as categoricals, without repeating the value per row.
+
+        :param DataFrame df: Data, with a timestamp column or index.
+        :param dict extras: Column names and values to add to every row.
+        :return: DataFrame with a UTC DatetimeIndex named timestamp, or the same data as a pyarrow Table.
+        :rtype: DataFrame or pyarrow.Table
+        """
+        df = df.copy()
+
+        # constant columns
+        for key, value in extras.items():
+            df[key] = pd.Categorical.from_codes(np.zeros(len(df), dtype='int8'), categories=[value])
+
+        # UTC DatetimeIndex
+        if 'timestamp' in df.columns:
+            df = df.set_index('timestamp')
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        df.index = index.tz_convert('UTC').rename('timestamp')
+
+        # categorical strings
+        for col in self.CATEGORICAL_COLUMNS:
+            if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('category')
+
+        if self.options.get('return_type') == 'arrow':
+            try:
+                import pyarrow
+            except ImportError:
+                raise ImportError("return_type='arrow' requires pyarrow")
+            return pyarrow.Table.from_pandas(df)
+        return df
+
+    @property
+    def tz(self):
+        """The pytz timezone for TZ_NAME, resolved once per timezone name."""
+        return get_timezone(self.TZ_NAME)
+
+    def local_to_utc(self, local_ts):
+        """
+        Convert a naive datetime in the client's timezone to UTC.
+
+        Same as utcify for naive datetimes, but skips string parsing.
+        The offset comes from a precomputed DSTTable instead of a pytz localize call.
+
+        :param datetime local_ts: Naive datetime in local time.
+        :return: Datetime in UTC.
+        :rtype: datetime
+        """
+        return get_dst_table(self.TZ_NAME).to_utc(local_ts)
+
     def local_now(self):
         """Returns a tz-aware datetime equal to the current moment, in the local timezone"""
-        return pytz.utc.localize(datetime.utcnow()).astimezone(pytz.timezone(self.TZ_NAME))
+        return pytz.utc.localize(datetime.utcnow()).astimezone(self.tz)
 
     def dates(self):
         """Returns a list of dates in local time"""
@@ -501,8 +1197,8 @@ class BaseClient(object):
 
         # if start and end, use all dates in range
         elif self.options['start_at'] and self.options['end_at']:
-            local_start = self.options['start_at'].astimezone(pytz.timezone(self.TZ_NAME))
-            local_end = self.options['end_at'].astimezone(pytz.timezone(self.TZ_NAME))
+            local_start = self.options['start_at'].astimezone(self.tz)
+            local_end = self.options['end_at'].astimezone(self.tz)
             this_date = local_start.date()
             while this_date <= local_end.date():
                 dates.append(this_date)
@@ -19,6 +19,14 @@ class BPAClient(BaseClient):
 
     TZ_NAME = 'America/Los_Angeles'
 
+    # yearly files are final once the year is over
+    CACHE_RULES = [
+        (r'/WindGenTotalLoadYTD_(?P<year>\d{4})\.xls$', None),
+    ]
+
+    # historical data comes in yearly files, so stream one year at a time
+    ITER_PERIOD = 'year'
+
     def fetch_historical(self):
         """Get BPA generation or load data from the far past"""
         # set up requests
@@ -134,7 +142,7 @@ class BPAClient(BaseClient):
 
         # return empty list if null
         if len(df) == 0:
-            return []
+            return self.serialize_records([])
 
         # parse and clean
         cleaned_df = self.parse_generation(df)
@@ -155,7 +163,7 @@ class BPAClient(BaseClient):
 
         # return empty list if null
         if len(df) == 0:
-            return []
+            return self.serialize_records([])
 
         # parse and clean
         df.index = self.utcify_index(df.index)
@@ -0,0 +1,192 @@
+from hashlib import sha256
+from io import StringIO
+from requests.structures import CaseInsensitiveDict
+from time import time
+import json
+import os
+import pandas as pd
+import sqlite3
+import threading
+import requests
+
+
+class ResponseCache(object):
+    """
+    Persistent, size-bounded cache of HTTP responses.
+
+    Responses are stored in a sqlite database in the directory ``path``,
+    keyed on the request method, url, query parameters and body,
+    with the status, url, reason and encoding in their own columns,
+    the headers as json and the body as a raw blob.
+    Each entry has its own expiry time, or none for responses that never change.
+    When the stored responses exceed ``max_size_mb``,
+    the least recently used entries are evicted.
+
+    Clients can also store parsed data as DataFrames, one json file (in pandas' table schema)
+    per name and version in the ``frames`` subdirectory.
+    Frames are small, never expire and do not count towards ``max_size_mb``.
+    """
+    FILENAME = 'responses.sqlite'
+    FRAMES_DIRNAME = 'frames'
+
+    # version of the frame file format; bump to ignore frames stored in an older format
+    FRAMES_FORMAT_VERSION = 1
+
+    def __init__(self, path, max_size_mb=500):
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.path = path
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+
+        # one connection shared by all threads, guarded by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(path, self.FILENAME),
+                                     timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            # responses stored by earlier versions were pickled, and are never read
+            self._conn.execute('DROP TABLE IF EXISTS responses')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS cached_responses '
+                               '(key TEXT PRIMARY KEY, size INTEGER, expires REAL, last_used REAL, '
+                               'status_code INTEGER, url TEXT, reason TEXT, encoding TEXT, '
+                               'headers TEXT, content BLOB)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS cached_responses_last_used '
+                               'ON cached_responses (last_used)')
+
+    def make_key(self, mode, url, params=None, data=None, json=None):
+        """
+        Returns a (key, full_url) tuple for a request.
+        full_url includes the query string, with params in sorted order.
+        """
+        if isinstance(params, dict):
+            params = sorted(params.items())
+        prepared = requests.Request(mode.upper(), url, params=params, data=data, json=json).prepare()
+
+        body = prepared.body or b''
+        if not isinstance(body, bytes):
+            body = body.encode('utf-8')
+
+        hasher = sha256()
+        hasher.update(prepared.method.encode('utf-8'))
+        hasher.update(b'\n')
+        hasher.update(prepared.url.encode('utf-8'))
+        hasher.update(b'\n')
+        hasher.update(body)
+        return hasher.hexdigest(), prepared.url
+
+    def get(self, key):
+        """Returns the cached requests.Response for key, or None if missing or expired."""
+        now = time()
+        with self._lock, self._conn:
+            row = self._conn.execute('SELECT expires, status_code, url, reason, encoding, headers, content '
+                                     'FROM cached_responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+
+            expires = row[0]
+            if expires is not None and expires < now:
+                self._conn.execute('DELETE FROM cached_responses WHERE key = ?', (key,))
+                return None
+
+            self._conn.execute('UPDATE cached_responses SET last_used = ? WHERE key = ?', (now, key))
+
+        return self._unpack(row[1:])
+
+    def set(self, key, response, ttl):
+        """
+        Store a response under key.
+        ttl is the lifetime in seconds, or None to keep the response until it is evicted.
+        """
+        now = time()
+        expires = None if ttl is None else now + ttl
+        fields = self._pack(response)
+        size = len(response.content) + len(fields[4])
+
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO cached_responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                               (key, size, expires, now) + fields)
+            self._evict()
+
+    def delete(self, key):
+        """Remove the response stored under key, if any."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM cached_responses WHERE key = ?', (key,))
+
+    def get_frame(self, name, version=1):
+        """
+        Returns the DataFrame stored under name and version, or None if there is none.
+        Callers bump version when the columns or index of the frames they store change,
+        so that frames in the old layout are not read back.
+        """
+        try:
+            with open(self._frame_path(name, version)) as f:
+                stored = json.load(f)
+            df = pd.read_json(StringIO(json.dumps(stored['frame'])), orient='table')
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+        # the table schema has no place for the name of the columns
+        df.columns.name = stored['columns_name']
+        return df
+
+    def set_frame(self, name, df, version=1):
+        """Store a DataFrame under name and version, replacing any stored before."""
+        path = self._frame_path(name, version)
+        dirname = os.path.dirname(path)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        # write to a temporary file first, so readers never see a partial file
+        tmp_path = '%s.%d.tmp' % (path, threading.current_thread().ident)
+        stored = {
+            'columns_name': df.columns.name,
+            'frame': json.loads(df.to_json(orient='table', date_unit='ns')),
+        }
+        with open(tmp_path, 'w') as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        """Remove all cached responses and frames."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM cached_responses')
+
+        frames_path = os.path.join(self.path, self.FRAMES_DIRNAME)
+        if os.path.isdir(frames_path):
+            for filename in os.listdir(frames_path):
+                os.remove(os.path.join(frames_path, filename))
+
+    def _frame_path(self, name, version):
+        filename = '%s.v%d.%d.json' % (name, version, self.FRAMES_FORMAT_VERSION)
+        return os.path.join(self.path, self.FRAMES_DIRNAME, filename)
+
+    def _evict(self):
+        # drop expired entries, then least recently used entries until under the size limit
+        self._conn.execute('DELETE FROM cached_responses WHERE expires IS NOT NULL AND expires < ?', (time(),))
+        (total, ) = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM cached_responses').fetchone()
+        if total <= self.max_size_bytes:
+            return
+
+        stale_keys = []
+        for key, size in self._conn.execute('SELECT key, size FROM cached_responses ORDER BY last_used'):
+            if total <= self.max_size_bytes:
+                break
+            stale_keys.append((key,))
+            total -= size
+        self._conn.executemany('DELETE FROM cached_responses WHERE key = ?', stale_keys)
+
+    def _pack(self, response):
+        # (status_code, url, reason, encoding, headers, content) column values
+        return (response.status_code, response.url, response.reason, response.encoding,
+                json.dumps(dict(response.headers)), sqlite3.Binary(response.content))
+
+    def _unpack(self, fields):
+        status_code, url, reason, encoding, headers, content = fields
+        response = requests.Response()
+        response.status_code = status_code
+        response.url = url
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.encoding = encoding
+        response.reason = reason
+        response._content = bytes(content)
+        response.from_cache = True
+        return response
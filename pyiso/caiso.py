@@ -1,14 +1,24 @@
+from collections import namedtuple, OrderedDict
 from datetime import datetime, timedelta, time
+from functools import partial
 from pyiso.base import BaseClient
+from pyiso.nodes import NodeRegistry, cached_registry
 from pyiso import LOGGER
 import copy
 import re
+import zipfile
 from bs4 import BeautifulSoup
-from io import BytesIO, StringIO
+from io import BytesIO
+import numpy as np
 import pandas as pd
 import pytz
 
 
+# one REPORT_DATA element of an OASIS XML report.
+# resource is RESOURCE_NAME, or RENEWABLE_TYPE for renewable forecasts; value is a float or None
+OasisRecord = namedtuple('OasisRecord', ['timestamp', 'data_item', 'resource', 'value'])
+
+
 class CAISOClient(BaseClient):
     """
     Interface to CAISO data sources.
@@ -27,6 +37,55 @@ class CAISOClient(BaseClient):
 
     TZ_NAME = 'America/Los_Angeles'
 
+    # price map node locations change rarely, so keep them for a day
+    NODE_REGISTRY_TTL_SECONDS = 24 * 3600
+
+    # OASIS accepts one request every 5 seconds
+    MIN_REQUEST_INTERVALS = {'oasis.caiso.com': 5}
+
+    # ERR_CODE and ERR_DESC in OASIS XML error reports, with or without a namespace prefix
+    oasis_err_code_re = re.compile(br'<(?:\w+:)?err_code>\s*([^<\s]+)', re.IGNORECASE)
+    oasis_err_desc_re = re.compile(br'<(?:\w+:)?err_desc>([^<]*)', re.IGNORECASE)
+
+    # OASIS error codes for requests refused because others were sent too recently
+    OASIS_THROTTLE_ERROR_CODES = ('1015',)
+
+    # times to retry a throttled OASIS request, and seconds to wait before the first retry (doubled each time)
+    OASIS_RETRIES = 5
+    OASIS_RETRY_SECONDS = 5
+
+    # longest time range OASIS accepts in one query; longer ranges are split into windows of this length
+    OASIS_MAX_WINDOW = timedelta(days=31)
+
+    # most pricing nodes OASIS accepts in one LMP query
+    OASIS_MAX_NODES = 10
+
+    # approximate number of pricing nodes returned by an LMP query for node='ALL'
+    OASIS_ALL_NODES = 4500
+
+    # fixed cost of one OASIS query, in nodes' worth of data (mostly the wait between requests).
+    # Used to choose between node batches and node='ALL'.
+    OASIS_QUERY_COST = 20
+
+    # dtypes for OASIS csv columns; columns missing from a report are ignored
+    OASIS_CSV_DTYPES = {
+        'MW': 'float64', 'PRC': 'float64', 'LMP_PRC': 'float64',
+        'NODE': str, 'MARKET_RUN_ID': str, 'LMP_TYPE': str, 'XML_DATA_ITEM': str,
+        'ANC_TYPE': str, 'ANC_REGION': str, 'TAC_AREA_NAME': str, 'RENEWABLE_TYPE': str,
+    }
+
+    # OASIS csv columns read into OasisRecords
+    OASIS_RECORD_COLUMNS = ['INTERVALSTARTTIME_GMT', 'XML_DATA_ITEM', 'TAC_AREA_NAME', 'RENEWABLE_TYPE', 'MW']
+
+    # OASIS LMP csv columns used by get_lmp
+    OASIS_LMP_COLUMNS = ['INTERVALSTARTTIME_GMT', 'NODE', 'MARKET_RUN_ID', 'LMP_TYPE', 'MW', 'PRC', 'LMP_PRC']
+
+    # past daily renewables reports and OASIS queries that end in the past are final
+    CACHE_RULES = [
+        (r'/(?P<date>\d{8})_DailyRenewablesWatch\.txt$', None),
+        (r'/SingleZip\?.*enddatetime=(?P<date>\d{8})T', None),
+    ]
+
     fuels = {
         'GEOTHERMAL': 'geo',
         'BIOMASS': 'biomass',
@@ -106,8 +165,8 @@ class CAISOClient(BaseClient):
                             start_at=start_at, end_at=end_at, **kwargs)
 
         # construct and execute OASIS request
-        payload = self.construct_oasis_payload('SLD_FCST')
-        oasis_data = self.fetch_oasis(payload=payload)
+        payloads = self.construct_oasis_payloads('SLD_FCST')
+        oasis_data = self.fetch_oasis_records_many(payloads)
 
         # parse data
         parsed_data = self.parse_oasis_demand_forecast(oasis_data)
@@ -124,12 +183,12 @@ class CAISOClient(BaseClient):
 
             # return latest
             if latest_dp:
-                return [latest_dp]
+                return self.serialize_records([latest_dp])
             else:
-                return []
+                return self.serialize_records([])
         else:
             # return all data
-            return parsed_data
+            return self.serialize_records(parsed_data)
 
     def get_trade(self, latest=False,
                   start_at=False, end_at=False, **kwargs):
@@ -138,8 +197,10 @@ class CAISOClient(BaseClient):
                             start_at=start_at, end_at=end_at, **kwargs)
 
         # construct and execute OASIS request
-        payload = self.construct_oasis_payload('ENE_SLRS')
-        oasis_data = self.fetch_oasis(payload=payload)
+        # (same payload as the generation paths, so concurrent calls share one fetch;
+        # parse_oasis_slrs picks out the trade data items)
+        payloads = self.construct_oasis_payloads('ENE_SLRS', schedule='ALL')
+        oasis_data = self.fetch_oasis_records_many(payloads)
 
         # parse data
         parsed_data = self.parse_oasis_slrs(oasis_data)
@@ -156,12 +217,12 @@ class CAISOClient(BaseClient):
 
             # return latest
             if latest_dp:
-                return [latest_dp]
+                return self.serialize_records([latest_dp])
             else:
-                return []
+                return self.serialize_records([])
         else:
             # return all data
-            return parsed_data
+            return self.serialize_records(parsed_data)
 
     def get_lmp_loc(self):
         """
@@ -188,19 +249,40 @@ class CAISOClient(BaseClient):
         This retuned JSON does not contain geographic data for all CAISO
         pricing nodes
         """
+        registry = self.get_node_registry()
+        if registry is None:
+            return []
+        return [dict(node) for node in registry]
+
+    def get_node_registry(self, snapshot=None):
+        """
+        Returns a NodeRegistry of the price map node locations returned by get_lmp_loc,
+        indexed by node_id and by location for nearest-node and bounding-box queries.
+
+        The downloaded registry is shared by all clients for NODE_REGISTRY_TTL_SECONDS.
+        To work offline, save a registry with registry.save(path)
+        and pass the path as snapshot to load it instead of downloading.
+        Returns None if the price map can't be downloaded.
+        """
+        if snapshot is not None:
+            return NodeRegistry.load(snapshot)
+        return cached_registry(('CAISO', self.price_map_url), self._fetch_node_registry,
+                               self.NODE_REGISTRY_TTL_SECONDS)
+
+    def _fetch_node_registry(self):
         # get json from the price map url used in the CAISO interactive price
         # map http://wwwmobile.caiso.com/Web.Service.Chart/pricecontourmap.html
         r = self.request(self.price_map_url)
+        if r is None:
+            return None
         json_obj = r.json()
 
         # parse the json to create the node location dictionary
         node_entries = json_obj['l'][2]['m']
-        return_list = [{'node_id': str(entry['n']),
-                        'latitude': entry['c'][0],
-                        'longitude': entry['c'][1],
-                        'area': str(entry['a'])} for entry in node_entries]
-
-        return return_list
+        return NodeRegistry({'node_id': str(entry['n']),
+                             'latitude': entry['c'][0],
+                             'longitude': entry['c'][1],
+                             'area': str(entry['a'])} for entry in node_entries)
 
     def get_lmp(self, node_id='SLAP_PGP2-APND', **kwargs):
         """
@@ -211,20 +293,10 @@ class CAISOClient(BaseClient):
         if not isinstance(node_id, list):
             node_id = [node_id]
 
-        if len(node_id) > 10:
-            # CAISO will not accept more than 10 node_ids
-            # to do, if less than 10 node_ids, only get requested node ids
-            node_list = node_id
-            node_id = 'ALL'
-
-        df = self.get_lmp_as_dataframe(node_id, **kwargs)
+        df = self.get_lmp_as_dataframe(node_id, columns=self.OASIS_LMP_COLUMNS, **kwargs)
         df = self._standardize_lmp_dataframe(df)
 
-        # drop non-requested nodes
-        if node_id == 'ALL':
-            df = df[df['node_id'].isin(node_list)]
-
-        return df.to_dict(orient='records')
+        return self.serialize_faster(df, drop_index=True)
 
     def _standardize_lmp_dataframe(self, df):
         if df.empty:
@@ -260,13 +332,17 @@ class CAISOClient(BaseClient):
         return df
 
     def get_lmp_as_dataframe(self, node_id, latest=True, start_at=False, end_at=False,
-                             lmp_only=True, **kwargs):
+                             lmp_only=True, columns=None, **kwargs):
         """
         Returns a pandas DataFrame with columns
         INTERVALSTARTTIME_GMT, MW, XML_DATA_ITEM, LMP_TYPE and others.
         Seperate rows for each LMP_TYPE (Congestion, Loss, Energy)
         MW columns holds $/MW float.
         If no data, returns an empty dataframe.
+
+        node_id may be a single node or a list of nodes;
+        lists are queried in concurrent batches (see lmp_node_queries).
+        If columns is a list of csv column names, only those columns are parsed.
         """
         # set args
         self.handle_options(data='lmp', latest=latest,
@@ -278,52 +354,64 @@ class CAISOClient(BaseClient):
         else:
             queryname = self.LMP_MARKETS[self.options['market']]
 
-        payload = self.construct_oasis_payload(queryname,
-                                               resultformat=6,  # csv
-                                               node=node_id)
-
-        # Fetch data
-        data = self.fetch_oasis(payload=payload, return_all_files=not(lmp_only))
-        # data will be a single csv-derived string if lmp_only==True
-        # data will be an array of csv-derived strings if lmp_only==False
-        if lmp_only is True:
-            # Turn into pandas Dataframe
-            if len(data) == 0:
-                return pd.DataFrame()
-
-            try:
-                str_data = BytesIO(data)    # Changed from StringIO for Python 3.4
-            except TypeError:
-                str_data = StringIO(data)
+        if isinstance(node_id, list):
+            node_queries = self.lmp_node_queries(node_id)
+        else:
+            node_queries = [node_id]
+
+        payloads = []
+        for node_query in node_queries:
+            payloads.extend(self.construct_oasis_payloads(queryname,
+                                                          resultformat=6,  # csv
+                                                          node=node_query))
+
+        # Fetch data into pandas Dataframe
+        # if lmp_only==True, the first csv file of each window
+        # if lmp_only==False, all csv files of each window
+        if columns:
+            usecols = lambda col: col in columns
+        else:
+            usecols = None
+        df = self.fetch_oasis_csv_many(payloads, return_all_files=not(lmp_only), usecols=usecols)
+        if df.empty:
+            return pd.DataFrame()
 
-            df = pd.DataFrame.from_csv(str_data, sep=",")
+        # drop non-requested nodes
+        if node_queries == ['ALL'] and isinstance(node_id, list) and 'ALL' not in node_id and 'NODE' in df:
+            df = df[df['NODE'].isin(node_id)]
 
+        if lmp_only is True:
             # strip congestion and loss prices
             try:
-                df = df.ix[df['LMP_TYPE'] == 'LMP']
+                df = df[df['LMP_TYPE'] == 'LMP']
             except KeyError:  # no good data
                 return pd.DataFrame()
         else:
-            # data is an array of csv-derived strings
-            df = pd.DataFrame()
-            for thisFile in data:
-                # Turn into pandas Dataframe
-                try:
-                    str_data = BytesIO(thisFile)  # Changed from StringIO for Python 3.4
-                except TypeError:
-                    str_data = StringIO(thisFile)
-
-                tempDf = pd.DataFrame.from_csv(str_data, sep=",")
-
-                df = pd.concat([df, tempDf])
             # Check to ensure good data
-            try:
-                df['LMP_TYPE'][0]
-            except KeyError:  # no good data
+            if 'LMP_TYPE' not in df.columns or df.empty:
                 return pd.DataFrame()
 
         return df
 
+    def lmp_node_queries(self, node_ids):
+        """
+        Returns a list of node parameters for OASIS LMP queries that cover node_ids:
+        comma-separated batches of up to OASIS_MAX_NODES nodes,
+        or ['ALL'] if downloading every node is estimated to be cheaper than the batches.
+        """
+        # drop repeated nodes, keeping order
+        node_ids = list(OrderedDict.fromkeys(node_ids))
+
+        # cost model: a fixed cost per query, plus the nodes it returns
+        n_batches = (len(node_ids) + self.OASIS_MAX_NODES - 1) // self.OASIS_MAX_NODES
+        batched_cost = n_batches * self.OASIS_QUERY_COST + len(node_ids)
+        all_cost = self.OASIS_QUERY_COST + self.OASIS_ALL_NODES
+        if n_batches > 1 and all_cost < batched_cost:
+            return ['ALL']
+
+        return [','.join(node_ids[i:i + self.OASIS_MAX_NODES])
+                for i in range(0, len(node_ids), self.OASIS_MAX_NODES)]
+
     def get_AS_dataframe(self, node_id='AS_CAISO_EXP', latest=True, start_at=False, end_at=False,
                          market_run_id='DAM', **kwargs):
         """
@@ -346,25 +434,16 @@ class CAISOClient(BaseClient):
 
         queryname = self.AS_MARKETS[market_run_id]
 
-        payload = self.construct_oasis_payload(queryname,
-                                               resultformat=6,  # csv
-                                               anc_region=node_id,
-                                               **kwargs)
-
-        # Fetch data
-        data = self.fetch_oasis(payload=payload)
+        payloads = self.construct_oasis_payloads(queryname,
+                                                 resultformat=6,  # csv
+                                                 anc_region=node_id,
+                                                 **kwargs)
 
-        if len(data) == 0:
+        # Fetch data into pandas Dataframe
+        df = self.fetch_oasis_csv_many(payloads)
+        if df.empty:
             return pd.DataFrame()
 
-        # Turn into pandas Dataframe
-        try:
-            str_data = BytesIO(data)    # Changed from StringIO.StringIO() for Python 3.4
-        except TypeError:
-            str_data = StringIO(data)
-
-        df = pd.DataFrame.from_csv(str_data, sep=",")
-
         # Get all data indexed on 'INTERVALSTARTTIME_GMT' as panda datetime
         if df.index.name != 'INTERVALSTARTTIME_GMT':
             df.set_index('INTERVALSTARTTIME_GMT', inplace=True)
@@ -386,28 +465,19 @@ class CAISOClient(BaseClient):
         if df.empty:
             return {}
 
-        ret_list = []
-
-        # loop through start_times, returns DataFrame rows are RU/RD/etc...
-        for i in df.index.unique():
-            a = df.ix[i]
-            dp = {
-                'timestamp': i.to_pydatetime(),  # INTERVALSTARTTIME_GMT is the index
-                'market': a['MARKET_RUN_ID'],
-                'zone_name': a['ANC_REGION'],
-                'ba_name': 'CAISO',
-            }
-            # Loop through types of ancillary services, or if only 1 append it
-            if isinstance(a['ANC_TYPE'], str):
-                # a has only one ANC_TYPE
-                dp[a['ANC_TYPE']] = a['MW']
-            else:
-                for i, row in a.iterrows():
-                    dp[row['ANC_TYPE']] = row['MW']
+        # one row per interval and region, with one column per ANC_TYPE
+        df = df.reset_index().pivot_table(index=['INTERVALSTARTTIME_GMT', 'MARKET_RUN_ID', 'ANC_REGION'],
+                                          columns='ANC_TYPE', values='MW', aggfunc='last')
+        df.columns = [str(col) for col in df.columns]
+        df.index.names = ['timestamp', 'market', 'zone_name']
+
+        data = self.serialize_faster(df, extras={'ba_name': 'CAISO'})
 
-            ret_list.append(dp)
+        # leave out services that were not reported for an interval
+        if self.options.get('return_type', 'list') == 'list' and df.isnull().values.any():
+            data = [{key: val for key, val in dp.items() if not pd.isnull(val)} for dp in data]
 
-        return ret_list
+        return data
 
     def construct_oasis_payload(self, queryname, **kwargs):
         # get start and end times
@@ -440,6 +510,27 @@ class CAISOClient(BaseClient):
         # return
         return payload
 
+    def construct_oasis_payloads(self, queryname, **kwargs):
+        """
+        Returns a list of OASIS payloads that together cover the requested time range,
+        each spanning at most OASIS_MAX_WINDOW.
+        """
+        payload = self.construct_oasis_payload(queryname, **kwargs)
+        if self.options['latest']:
+            return [payload]
+
+        # split into consecutive windows
+        payloads = []
+        window_start = self.options['start_at']
+        while True:
+            window_end = min(window_start + self.OASIS_MAX_WINDOW, self.options['end_at'])
+            payloads.append(dict(payload,
+                                 startdatetime=window_start.strftime(self.oasis_request_time_format),
+                                 enddatetime=window_end.strftime(self.oasis_request_time_format)))
+            if window_end >= self.options['end_at']:
+                return payloads
+            window_start = window_end
+
     def set_dt_index(self, df, date, hours, end_of_hour=True):
         if end_of_hour:
             offset = -1
@@ -459,62 +550,177 @@ class CAISOClient(BaseClient):
         return df
 
     def _generation_historical(self):
-        # set up storage
-        parsed_data = []
-
-        # collect data
+        # collect dates
+        dates = []
         this_date = self.options['start_at'].date()
         while this_date <= self.options['end_at'].date():
-            # set up request
-            url_file = this_date.strftime('%Y%m%d_DailyRenewablesWatch.txt')
-            url = self.base_url_gen + url_file
+            dates.append(this_date)
+            this_date += timedelta(days=1)
 
-            # carry out request
-            response = self.request(url)
+        # use parsed days from the cache where possible
+        days = {}
+        if self.cache is not None:
+            for this_date in dates:
+                if self.date_is_final(this_date):
+                    df = self.cache.get_frame(this_date.strftime('CAISO_%Y%m%d_DailyRenewablesWatch'))
+                    if df is not None:
+                        days[this_date] = df
+
+        # carry out requests for the other days concurrently
+        missing = [this_date for this_date in dates if this_date not in days]
+        urls = [self.base_url_gen + date.strftime('%Y%m%d_DailyRenewablesWatch.txt') for date in missing]
+        responses = self.request_many(urls)
+
+        # parse, storing final days in the cache
+        for this_date, response in zip(missing, responses):
             if not response:
-                this_date += timedelta(days=1)
                 continue
+            df = self.parse_daily_renewables(response.text, this_date)
+            days[this_date] = df
+            if self.cache is not None and self.date_is_final(this_date):
+                self.cache.set_frame(this_date.strftime('CAISO_%Y%m%d_DailyRenewablesWatch'), df)
+
+        if not days:
+            return self.serialize_records([])
+
+        # slice times, then one row per fuel and hour
+        sliced = self.slice_times(pd.concat([days[this_date] for this_date in dates if this_date in days]))
+        pivoted = self.unpivot(sliced).dropna()
+        pivoted.rename(columns={0: 'gen_MW'}, inplace=True)
+        pivoted.index.name = 'timestamp'
+
+        # serialize and return
+        return self.serialize_faster(pivoted,
+                                     extras={'ba_name': self.NAME,
+                                             'market': self.MARKET_CHOICES.hourly,
+                                             'freq': self.FREQUENCY_CHOICES.hourly})
+
+    def parse_daily_renewables(self, text, this_date):
+        """
+        Returns a DataFrame of hourly generation from a Daily Renewables Watch report,
+        with a UTC DatetimeIndex and one column per fuel (columns named fuel_name).
+        Both tables of the report are read in one pass over its tab-separated lines;
+        reports that do not fit that layout are parsed with pandas instead.
+        """
+        lines = text.splitlines()
+        hours = None
+        columns = {}
+        try:
+            for i, line in enumerate(lines):
+                # each table starts with a header row whose first field is Hour
+                header = [field.strip() for field in line.split('\t') if field.strip()]
+                if header[:1] != ['Hour']:
+                    continue
+
+                rows = [[field for field in row.split('\t') if field.strip()] for row in lines[i+1:i+25]]
+                hours = [int(row[0]) for row in rows]
+                for col, name in enumerate(header):
+                    if name in self.fuels:
+                        columns[self.fuels[name]] = [float(row[col]) for row in rows]
+        except (ValueError, IndexError):
+            return self._parse_daily_renewables_pandas(text, this_date)
+
+        if hours is None:
+            return self._parse_daily_renewables_pandas(text, this_date)
+
+        df = self.set_dt_index(pd.DataFrame(columns), this_date, hours)
+        df.columns.name = 'fuel_name'
+        return df
 
-            # process both halves of page
-            for header in [1, 27]:
-                df = self.parse_to_df(response.text,
-                                      nrows=24, header=header,
-                                      delimiter='\t+')
+    def _parse_daily_renewables_pandas(self, text, this_date):
+        # process both halves of page
+        pieces = []
+        for header in [1, 27]:
+            df = self.parse_to_df(text,
+                                  nrows=24, header=header,
+                                  delimiter='\t+')
 
-                # combine date with hours to index
-                indexed = self.set_dt_index(df, this_date, df['Hour'])
+            # combine date with hours to index
+            indexed = self.set_dt_index(df, this_date, df['Hour'])
 
-                # original header is fuel names
-                indexed.rename(columns=self.fuels, inplace=True)
+            # original header is fuel names
+            indexed.rename(columns=self.fuels, inplace=True)
 
-                # remove non-fuel cols
-                fuel_cols = list(set(self.fuels.values()) & set(indexed.columns))
-                subsetted = indexed[fuel_cols]
+            # remove non-fuel cols
+            fuel_cols = [col for col in indexed.columns if col in self.fuels.values()]
+            pieces.append(indexed[fuel_cols].astype(float))
 
-                # pivot
-                pivoted = self.unpivot(subsetted)
-                pivoted.rename(columns={'level_1': 'fuel_name', 0: 'gen_MW'}, inplace=True)
+        df = pd.concat(pieces, axis=1)
+        df.columns.name = 'fuel_name'
+        return df
 
-                # slice times
-                sliced = self.slice_times(pivoted)
+    def request_oasis(self, payload):
+        """
+        Get the OASIS report zip file for payload.
+        Returns the response, or None if an error was encountered.
 
-                # store
-                parsed_data += self.serialize(sliced,
-                                      header=['timestamp', 'fuel_name', 'gen_MW'],
-                                      extras={'ba_name': self.NAME,
-                                              'market': self.MARKET_CHOICES.hourly,
-                                              'freq': self.FREQUENCY_CHOICES.hourly})
+        Requests refused with one of OASIS_THROTTLE_ERROR_CODES are retried up to OASIS_RETRIES times.
+        Before each retry every OASIS request from this process is paused (see pause_host),
+        starting at OASIS_RETRY_SECONDS and doubling each time,
+        so parallel queries queue behind the pause instead of failing too.
+        """
+        retry_sec = self.OASIS_RETRY_SECONDS
+        retries_remaining = self.OASIS_RETRIES
+        while True:
+            response = self.request(self.base_url_oasis, params=payload)
+            if not response:
+                return response
 
-            # finish day
-            this_date += timedelta(days=1)
+            code = self.oasis_error_code(response.content)
+            if code not in self.OASIS_THROTTLE_ERROR_CODES:
+                return response
 
-        # return
-        return parsed_data
+            if retries_remaining <= 0:
+                LOGGER.warn('%s: exhausted retries for OASIS payload %s' % (self.NAME, payload))
+                return None
+
+            LOGGER.warn('%s: retrying in %d seconds (%d retries remaining), OASIS error %s for payload %s' % (self.NAME, retry_sec, retries_remaining, code, payload))
+            self.pause_host(self.base_url_oasis, retry_sec)
+            retry_sec *= 2
+            retries_remaining -= 1
+
+    def is_cacheable(self, response):
+        """OASIS error reports are not cached, so that the request is tried again next time."""
+        return self.oasis_error_code(response.content) is None
+
+    def oasis_error_code(self, content):
+        """
+        Returns the ERR_CODE of a zipped OASIS error report as a string,
+        or None if content is not an error report.
+        """
+        try:
+            z = zipfile.ZipFile(BytesIO(content))
+        except (TypeError, zipfile.BadZipfile):
+            return None
+
+        with z:
+            infos = z.infolist()
+            # error reports are a single small xml file; don't decompress large reports to check
+            if not infos or not infos[0].filename.lower().endswith('.xml') or infos[0].file_size > 65536:
+                return None
+            text = z.read(infos[0])
+
+        return self.oasis_xml_error(text)[0]
+
+    def oasis_xml_error(self, text):
+        """
+        Returns (ERR_CODE, ERR_DESC) strings from the bytes of an OASIS XML error report,
+        or (None, None) if text is not an error report.
+        """
+        code = self.oasis_err_code_re.search(text)
+        if code is None:
+            return None, None
+        desc = self.oasis_err_desc_re.search(text)
+        return code.group(1).decode('utf-8'), desc.group(1).decode('utf-8') if desc else None
 
     def fetch_oasis(self, payload={}, return_all_files=False):
         """
         Returns a list of report data elements, or an empty list if an error was encountered.
 
+        The get_* methods read reports with fetch_oasis_records and fetch_oasis_csv instead;
+        this is kept for callers that use BeautifulSoup elements directly,
+        and the parse_oasis_* methods still accept its output.
+
         If return_all_files=False, returns only the content from the first file in the .zip -
         this is the default behavior and was used in earlier versions of this function.
 
@@ -530,7 +736,7 @@ class CAISOClient(BaseClient):
             default_return_val = ''
 
         # try get
-        response = self.request(self.base_url_oasis, params=payload)
+        response = self.request_oasis(payload)
         if not response:
             return default_return_val
 
@@ -540,12 +746,9 @@ class CAISOClient(BaseClient):
         if not content:
             return default_return_val
 
-        # check xml content for errors
-        soup = BeautifulSoup(content[0], 'xml')
-        error = soup.find(['error', 'ERROR'])
-        if error:
-            code = error.find(['err_code', 'ERR_CODE'])
-            desc = error.find(['err_desc', 'ERR_DESC'])
+        # check content for errors, without parsing the whole report
+        code, desc = self.oasis_xml_error(content[0])
+        if code is not None:
             msg = 'XML error for CAISO OASIS with payload %s: %s %s' % (payload, code, desc)
             LOGGER.error(msg)
             return default_return_val
@@ -562,31 +765,174 @@ class CAISOClient(BaseClient):
                 raw_data = [BeautifulSoup(thisfile, 'xml').find_all(['REPORT_DATA', 'report_data']) for thisfile in content]
                 return raw_data
             else:
-                raw_data = soup.find_all(['REPORT_DATA', 'report_data'])
+                raw_data = BeautifulSoup(content[0], 'xml').find_all(['REPORT_DATA', 'report_data'])
                 return raw_data
 
+    def fetch_oasis_records(self, payload={}):
+        """
+        Returns a list of OasisRecords from the first file of an OASIS report,
+        or an empty list if an error was encountered.
+        Same data as fetch_oasis, but the report is requested as csv (see oasis_csv_records).
+
+        Concurrent calls for the same payload share one fetch (see BaseClient.coalesce).
+        """
+        key = ('oasis_records', tuple(sorted(payload.items())))
+        return list(self.coalesce(key, self._fetch_oasis_records, payload))
+
+    def _fetch_oasis_records(self, payload):
+        frames = self.fetch_oasis_csv(dict(payload, resultformat=6),  # csv
+                                      usecols=lambda col: col in self.OASIS_RECORD_COLUMNS)
+        if not frames:
+            return []
+        return self.oasis_csv_records(frames[0])
+
+    def oasis_csv_records(self, df):
+        """
+        Returns the rows of a DataFrame read from an OASIS csv report as a list of OasisRecords.
+        The resource is TAC_AREA_NAME, or RENEWABLE_TYPE for renewable forecasts,
+        matching RESOURCE_NAME and RENEWABLE_TYPE in XML reports.
+        """
+        n_rows = len(df)
+
+        # whole columns at once
+        timestamps = pd.to_datetime(df.index, utc=True).tz_convert(pytz.utc).to_pydatetime()
+        if 'XML_DATA_ITEM' in df:
+            data_items = df['XML_DATA_ITEM'].tolist()
+        else:
+            data_items = [None] * n_rows
+        if 'TAC_AREA_NAME' in df:
+            resources = df['TAC_AREA_NAME'].tolist()
+        elif 'RENEWABLE_TYPE' in df:
+            resources = df['RENEWABLE_TYPE'].tolist()
+        else:
+            resources = [None] * n_rows
+        if 'MW' in df:
+            values = df['MW'].astype(object).where(df['MW'].notnull(), None).tolist()
+        else:
+            values = [None] * n_rows
+
+        return list(map(OasisRecord._make, zip(timestamps, data_items, resources, values)))
+
+    def fetch_oasis_csv(self, payload={}, return_all_files=False, **kwargs):
+        """
+        Returns a list of DataFrames from the csv files of an OASIS report,
+        or an empty list if an error was encountered.
+
+        Each file is decompressed straight into pandas.read_csv (indexed on its first column),
+        with kwargs passed through, eg usecols to parse only some columns.
+        If return_all_files=False, only the first file is parsed.
+        """
+        # try get
+        response = self.request_oasis(payload)
+        if not response:
+            return []
+
+        frames = []
+        for member in self.iter_unzip(response.content):
+            # errors are reported in a small xml file instead of csv
+            if member.name.lower().endswith('.xml'):
+                code, desc = self.oasis_xml_error(member.read(65536))
+                if code is not None:
+                    LOGGER.error('XML error for CAISO OASIS with payload %s: %s %s' % (payload, code, desc))
+                    return []
+                LOGGER.warning('%s: skipping unexpected XML file %s in csv report for payload %s' % (self.NAME, member.name, payload))
+                continue
+
+            frames.append(pd.read_csv(member, index_col=0, parse_dates=True,
+                                      dtype=self.OASIS_CSV_DTYPES, **kwargs))
+            if not return_all_files:
+                break
+
+        return frames
+
+    def fetch_oasis_csv_many(self, payloads, return_all_files=False, **kwargs):
+        """
+        Fetch the csv reports for each of payloads concurrently with fetch_oasis_csv.
+        Returns one DataFrame with the rows of every file in window order,
+        dropping rows repeated exactly in an earlier window where windows meet.
+        If there is no data, returns an empty DataFrame.
+        """
+        fetch = partial(self.fetch_oasis_csv, return_all_files=return_all_files, **kwargs)
+        frames = []
+        window_nums = []
+        for window_num, window in enumerate(self.map_concurrent(fetch, payloads)):
+            for frame in window:
+                frames.append(frame)
+                window_nums.append(np.full(len(frame), window_num))
+        if not frames:
+            return pd.DataFrame()
+
+        # concatenate once
+        df = pd.concat(frames)
+
+        # keep rows in the first window they appear in;
+        # rows repeated within one window are distinct rows, so keep them
+        window_nums = pd.Series(np.concatenate(window_nums))
+        row_hashes = pd.util.hash_pandas_object(df.reset_index(), index=False).values
+        first_window_nums = window_nums.groupby(row_hashes).transform('min')
+        return df[(window_nums == first_window_nums).values]
+
+    def fetch_oasis_records_many(self, payloads):
+        """
+        Fetch the reports for each of payloads concurrently with fetch_oasis_records.
+        Returns one list of OasisRecords in window order,
+        dropping records repeated exactly in an earlier window where windows meet.
+        """
+        records = []
+        seen = set()
+        for window in self.map_concurrent(self.fetch_oasis_records, payloads):
+            # records repeated within one window are distinct rows, so keep them
+            window_records = set()
+            for record in window:
+                if record not in seen:
+                    window_records.add(record)
+                    records.append(record)
+            seen |= window_records
+        return records
+
+    def oasis_records(self, raw_data):
+        """
+        Returns raw_data as a list of OasisRecords.
+        raw_data may be OasisRecords, or REPORT_DATA elements as returned by fetch_oasis.
+        """
+        records = []
+        for raw_dp in raw_data:
+            if isinstance(raw_dp, tuple):  # OasisRecord
+                records.append(raw_dp)
+                continue
+
+            # BeautifulSoup element
+            fields = {}
+            for name in ['INTERVAL_START_GMT', 'DATA_ITEM', 'RESOURCE_NAME', 'RENEWABLE_TYPE', 'VALUE']:
+                found = raw_dp.find([name, name.lower()])
+                fields[name] = found.string if found else None
+            try:
+                value = float(fields['VALUE'])
+            except TypeError:
+                value = None
+            ts = self.utcify(fields['INTERVAL_START_GMT']) if fields['INTERVAL_START_GMT'] else None
+            records.append(OasisRecord(ts, fields['DATA_ITEM'],
+                                       fields['RESOURCE_NAME'] or fields['RENEWABLE_TYPE'], value))
+        return records
+
     def parse_oasis_renewable(self, raw_data):
         """Parse raw data output of fetch_oasis for renewables."""
         # set up storage
         preparsed_data = {}
         parsed_data = []
 
-        # extract values from xml
-
-        for raw_soup_dp in raw_data:
+        # extract values from records
+        for record in self.oasis_records(raw_data):
             # set up storage for timestamp
-            ts = self.utcify(raw_soup_dp.find(['INTERVAL_START_GMT', 'interval_start_gmt']).string)
+            ts = record.timestamp
             if ts not in preparsed_data:
                 preparsed_data[ts] = {'wind': 0, 'solar': 0}
 
             # store generation value
-            try:
-                fuel_name = raw_soup_dp.find(['RENEWABLE_TYPE', 'renewable_type']).string.lower()
-                gen_MW = float(raw_soup_dp.find(['VALUE', 'value']).string)
-                preparsed_data[ts][fuel_name] += gen_MW
-            except TypeError:
-                LOGGER.error('Error in schema for CAISO OASIS result %s' % raw_soup_dp.prettify())
+            if record.resource is None or record.value is None:
+                LOGGER.error('Error in schema for CAISO OASIS result %s' % (record,))
                 continue
+            preparsed_data[ts][record.resource.lower()] += record.value
 
         # collect values into dps
         freq = self.options.get('freq', self.FREQUENCY_CHOICES.hourly)
@@ -629,18 +975,18 @@ class CAISOClient(BaseClient):
         extracted_data = {}
         parsed_data = []
 
-        # extract values from xml
-        for raw_soup_dp in raw_data:
-            data_item = raw_soup_dp.find(['DATA_ITEM', 'data_item']).string
+        # extract values from records
+        for record in self.oasis_records(raw_data):
+            data_item = record.data_item
             if data_item in data_items:
                 # parse timestamp
-                ts = self.utcify(raw_soup_dp.find(['INTERVAL_START_GMT', 'interval_start_gmt']).string)
+                ts = record.timestamp
 
                 # parse val
                 if data_item == 'ISO_TOT_IMP_MW':
-                    val = -float(raw_soup_dp.find(['VALUE', 'value']).string)
+                    val = -record.value
                 else:
-                    val = float(raw_soup_dp.find(['VALUE', 'value']).string)
+                    val = record.value
 
                 # add to storage
                 try:
@@ -674,13 +1020,12 @@ class CAISOClient(BaseClient):
         else:
             data_item_key = 'SYS_FCST_5MIN_MW'
 
-        # extract values from xml
-        for raw_soup_dp in raw_data:
-            if raw_soup_dp.find(['DATA_ITEM', 'data_item']).string == data_item_key and \
-                    raw_soup_dp.find(['RESOURCE_NAME', 'resource_name']).string == 'CA ISO-TAC':
+        # extract values from records
+        for record in self.oasis_records(raw_data):
+            if record.data_item == data_item_key and record.resource == 'CA ISO-TAC':
 
                 # parse timestamp
-                ts = self.utcify(raw_soup_dp.find(['INTERVAL_START_GMT', 'interval_start_gmt']).string)
+                ts = record.timestamp
 
                 # set up base
                 parsed_dp = {'timestamp': ts,
@@ -689,7 +1034,7 @@ class CAISOClient(BaseClient):
                              'ba_name': self.NAME}
 
                 # store generation value
-                parsed_dp['load_MW'] = float(raw_soup_dp.find(['VALUE', 'value']).string)
+                parsed_dp['load_MW'] = record.value
                 parsed_data.append(parsed_dp)
 
         # return
@@ -707,7 +1052,7 @@ class CAISOClient(BaseClient):
 
     def fetch_todays_outlook_renewables(self):
         # get renewables data
-        response = self.request(self.base_url_outlook+'renewables.html')
+        response = self.coalesced_request(self.base_url_outlook+'renewables.html')
         try:
             return BeautifulSoup(response.content, 'lxml')
         except AttributeError:
@@ -758,12 +1103,12 @@ class CAISOClient(BaseClient):
         # get "Today's Outlook" data
         soup = self.fetch_todays_outlook_renewables()
         if not soup:
-            return []
+            return self.serialize_records([])
 
         # parse "Today's Outlook" data
 
         # get timestamp
-        response = self.request(self.base_url_outlook+'systemconditions.html')
+        response = self.coalesced_request(self.base_url_outlook+'systemconditions.html')
         ts = None
         if response:
             demand_soup = BeautifulSoup(response.content, 'lxml')
@@ -771,62 +1116,61 @@ class CAISOClient(BaseClient):
 
         parsed_data += self.parse_todays_outlook_renewables(soup, ts)
         if len(parsed_data) == 0:
-            return parsed_data
-        total_ren_MW = sum([dp['gen_MW'] for dp in parsed_data])
-        ts = parsed_data[0]['timestamp']
+            return self.serialize_records([])
 
         # get OASIS total gen data
         payload = self.construct_oasis_payload(queryname='ENE_SLRS', schedule='ALL')
-        oasis_data = self.fetch_oasis(payload=payload)
-
-        # parse OASIS data
-        for dp in self.parse_oasis_slrs(oasis_data):
-            if dp['timestamp'] == ts:
-                dp['gen_MW'] -= total_ren_MW
-                dp['freq'] = self.options['freq']
-                parsed_data.append(dp)
-                return parsed_data
+        oasis_data = self.fetch_oasis_records(payload=payload)
 
-        # no matching OASIS data found, so return null
-        return []
+        # join on the renewables timestamp; if no matching OASIS data is found, this is empty
+        df = self.join_generation(parsed_data, self.parse_oasis_slrs(oasis_data))
+        if df.empty:
+            return self.serialize_records([])
+        return self.serialize_faster(df, extras={'ba_name': self.NAME,
+                                                 'market': self.options['market'],
+                                                 'freq': self.options['freq']})
 
     def _generation_forecast(self, **kwargs):
-        # set up
-        parsed_data = []
-
         # get OASIS total gen data
         gen_payload = self.construct_oasis_payload(queryname='ENE_SLRS', schedule='ALL')
-        gen_oasis_data = self.fetch_oasis(payload=gen_payload)
+        gen_oasis_data = self.fetch_oasis_records(payload=gen_payload)
         gen_dps = self.parse_oasis_slrs(gen_oasis_data)
 
         # get OASIS renewable gen data
         ren_payload = self.construct_oasis_payload(queryname='SLD_REN_FCST')
-        ren_oasis_data = self.fetch_oasis(payload=ren_payload)
+        ren_oasis_data = self.fetch_oasis_records(payload=ren_payload)
         ren_dps = self.parse_oasis_renewable(ren_oasis_data)
 
-        # set of times with both gen and renewable data
-        times = set([dp['timestamp'] for dp in ren_dps]) & set([dp['timestamp'] for dp in gen_dps])
-
-        # handle renewables
-        total_ren_MW = {}
-        for dp in ren_dps:
-            if dp['timestamp'] in times:
-                # assemble renewable totals for each time
-                try:
-                    total_ren_MW[dp['timestamp']] += dp['gen_MW']
-                except KeyError:
-                    total_ren_MW[dp['timestamp']] = dp['gen_MW']
-
-                # add to storage
-                parsed_data.append(dp)
+        # times with both gen and renewable data
+        df = self.join_generation(ren_dps, gen_dps)
+        if df.empty:
+            return self.serialize_records([])
+        return self.serialize_faster(df, extras={'ba_name': self.NAME,
+                                                 'market': self.options['market'],
+                                                 'freq': self.options['freq']})
 
-        # handle generation
-        for dp in gen_dps:
-            if dp['timestamp'] in times:
-                # subtract off renewable totals
-                dp['gen_MW'] -= total_ren_MW[dp['timestamp']]
-                # add to storage
-                parsed_data.append(dp)
+    def join_generation(self, ren_dps, gen_dps):
+        """
+        Joins renewable and total generation data points on their UTC timestamps.
+        Returns a DataFrame indexed on timestamp with columns fuel_name and gen_MW,
+        holding the renewables followed by 'other' generation (the total minus all renewables),
+        at the times that have both.
+        """
+        if not ren_dps or not gen_dps:
+            return pd.DataFrame()
 
-        # return
-        return parsed_data
+        # one column per renewable fuel, in the order they appear
+        ren = pd.DataFrame(ren_dps)
+        fuels = list(pd.unique(ren['fuel_name']))
+        ren = ren.pivot_table(index='timestamp', columns='fuel_name', values='gen_MW', aggfunc='sum')[fuels]
+
+        # align with total generation, then subtract
+        total = pd.DataFrame(gen_dps).groupby('timestamp')['gen_MW'].sum()
+        joined = ren.join(total.rename('total'), how='inner')
+        other = joined.pop('total') - joined.sum(axis=1)
+        joined.columns.name = 'fuel_name'
+
+        # back to one row per fuel and time
+        ren_long = joined.stack().dropna().rename('gen_MW').reset_index(level='fuel_name')
+        other_long = pd.DataFrame({'fuel_name': 'other', 'gen_MW': other})
+        return pd.concat([ren_long, other_long])
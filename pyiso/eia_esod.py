@@ -1,7 +1,6 @@
 from pyiso.base import BaseClient
 import json
 from os import environ
-from dateutil.parser import parse as dateutil_parse
 from datetime import datetime, timedelta
 import pytz
 from pyiso import LOGGER
@@ -81,10 +80,10 @@ class EIAClient(BaseClient):
         if result is not None:
             result_json = json.loads(result.text)
             result_formatted = self.format_result(result_json)
-            return result_formatted
+            return self.serialize_records(result_formatted)
         else:
             LOGGER.error('No results for %s' % self.BA)
-            return []
+            return self.serialize_records([])
 
     def get_load(self, latest=False, yesterday=False, start_at=False,
                  end_at=False, forecast=False, **kwargs):
@@ -100,10 +99,10 @@ class EIAClient(BaseClient):
         if result is not None:
             result_json = json.loads(result.text)
             result_formatted = self.format_result(result_json)
-            return result_formatted
+            return self.serialize_records(result_formatted)
         else:
             LOGGER.error('No results for %s' % self.BA)
-            return []
+            return self.serialize_records([])
 
     def get_trade(self, latest=False, yesterday=False, start_at=False,
                   end_at=False, **kwargs):
@@ -119,10 +118,10 @@ class EIAClient(BaseClient):
         if result is not None:
             result_json = json.loads(result.text)
             result_formatted = self.format_result(result_json)
-            return result_formatted
+            return self.serialize_records(result_formatted)
         else:
             LOGGER.error('No results for %s' % self.BA)
-            return []
+            return self.serialize_records([])
 
     def handle_options(self, **kwargs):
         """
@@ -153,7 +152,7 @@ class EIAClient(BaseClient):
 
     def handle_ba_limitations(self):
         """Handle BA limitations"""
-        today = pytz.utc.localize(datetime.utcnow()).astimezone(pytz.timezone(self.TZ_NAME))
+        today = pytz.utc.localize(datetime.utcnow()).astimezone(self.tz)
         two_days_ago = today - timedelta(days=2)
         load_not_supported_bas = ['DEAA', 'EEI', 'GRIF', 'GRMA', 'GWA',
                                   'HGMA', 'SEPA', 'WWA', 'YAD']
@@ -251,7 +250,7 @@ class EIAClient(BaseClient):
     def _format_latest(self, data, d_type, mkt):
         formatted_list = []
         last_datapoint = data['series'][0]['data'][0]
-        timestamp = self.utcify(dateutil_parse(last_datapoint[0]))
+        timestamp = self.utcify(last_datapoint[0])
         data = self.format_data(last_datapoint[1])
         formatted = self._format_list(data, timestamp, d_type, mkt)
         formatted_list.append(formatted)  # will be just one
@@ -262,7 +261,7 @@ class EIAClient(BaseClient):
         yesterday = self.local_now() - timedelta(days=1)
         for i in data['series']:
             for j in i['data']:
-                timestamp = self.utcify(dateutil_parse(j[0]))
+                timestamp = self.utcify(j[0])
                 data = self.format_data(j[1])
                 if timestamp.year == yesterday.year and \
                    timestamp.month == yesterday.month and \
@@ -275,7 +274,7 @@ class EIAClient(BaseClient):
         formatted_list = []
         for i in data['series']:
             for j in i['data']:
-                timestamp = self.utcify(dateutil_parse(j[0]))
+                timestamp = self.utcify(j[0])
                 data = self.format_data(j[1])
                 formatted = self._format_list(data, timestamp, d_type, mkt)
                 formatted_list.append(formatted)
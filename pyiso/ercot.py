@@ -37,7 +37,7 @@ class ERCOTClient(BaseClient):
         if date:
             date = datetime(date.year, date.month, date.day, date.hour,
                             date.minute - (date.minute % 5), tzinfo=date.tzinfo)
-            date = pytz.timezone(self.TZ_NAME).normalize(date)
+            date = self.tz.normalize(date)
 
             # DAM reports named 20150520 are for day 20150521
             if report_type == 'dam_hrly_lmp':
@@ -100,7 +100,7 @@ class ERCOTClient(BaseClient):
             raise ValueError('Only latest genmix data available in ERCOT')
 
         # return
-        return data
+        return self.serialize_records(data)
 
     def get_load(self, latest=False, **kwargs):
         # set args
@@ -121,7 +121,7 @@ class ERCOTClient(BaseClient):
             try:
                 df = self._request_report('load_7day')
             except ValueError:
-                return []
+                return self.serialize_records([])
 
             # convert column of hour ending (1:00-24:00) to hour beginning (0:00-23:00)
             df['HourBeginning'] = df.apply(lambda dp: int(dp['HourEnding'].split(':')[0])-1,
@@ -146,13 +146,13 @@ class ERCOTClient(BaseClient):
                 'market': self.MARKET_CHOICES.dam,
                 'freq': self.FREQUENCY_CHOICES.hourly,
             }
-            data = self.serialize_faster(series, extras=extras)
+            return self.serialize_faster(series, extras=extras)
 
         else:
             raise ValueError('Load only available for latest or forecast in ERCOT')
 
         # return
-        return data
+        return self.serialize_records(data)
 
     def parse_rtm(self, content):
         # make soup
@@ -283,7 +283,7 @@ class ERCOTClient(BaseClient):
 
         if 'start_at' in self.options:
             # get start and end days in local time
-            tz = pytz.timezone(self.TZ_NAME)
+            tz = self.tz
             start = tz.normalize(self.options['start_at'])
             end = tz.normalize(self.options['end_at'])
 
@@ -320,7 +320,7 @@ class ERCOTClient(BaseClient):
                 report = pd.concat(pieces)
             else:
                 LOGGER.warn('No ERCOT LMP found for %s' % self.options)
-                return []
+                return self.serialize_records([])
         else:
             report = self._request_report(report_name, self.now)
             if report is None:
@@ -337,4 +337,4 @@ class ERCOTClient(BaseClient):
             reg = re.compile('|'.join(node_id))
             df = df.ix[df['node_id'].str.contains(reg)]
 
-        return df.to_dict(orient='records')
+        return self.serialize_faster(df, drop_index=True)
@@ -1,6 +1,5 @@
 from pyiso.base import BaseClient
 from pyiso import LOGGER
-import requests
 import pandas as pd
 import numpy as np
 from io import StringIO
@@ -116,18 +115,22 @@ class EUClient(BaseClient):
         self.handle_options(data='load', start_at=start_at, end_at=end_at, forecast=forecast,
                             latest=latest, control_area=control_area, **kwargs)
 
-        pieces = []
-        for date in self.dates():
-            payload = self.construct_payload(date)
-            url = self.base_url + self.export_endpoint
-            response = self.fetch_entsoe(url, payload)
-            day_df = self.parse_load_response(response)
-            pieces.append(day_df)
+        # construct payloads, then log in once before fetching days concurrently
+        payloads = [self.construct_payload(date) for date in self.dates()]
+        if not getattr(self, 'session', None):
+            self.auth()
+
+        pieces = self.map_concurrent(self.fetch_load_day, payloads)
 
         df = pd.concat(pieces)
         sliced = self.slice_times(df)
         return self.serialize_faster(sliced)
 
+    def fetch_load_day(self, payload):
+        url = self.base_url + self.export_endpoint
+        response = self.fetch_entsoe(url, payload)
+        return self.parse_load_response(response)
+
     def handle_options(self, **kwargs):
         # regular handle options
         super(EUClient, self).handle_options(**kwargs)
@@ -142,8 +145,7 @@ class EUClient(BaseClient):
             self.options['forecast'] = True
 
     def auth(self):
-        if not getattr(self, 'session', None):
-            self.session = requests.Session()
+        self.get_session()
 
         payload = {'username': environ['ENTSOe_USERNAME'],
                    'password': environ['ENTSOe_PASSWORD'],
@@ -10,6 +10,11 @@ class ISONEClient(BaseClient):
     base_url = 'https://webservices.iso-ne.com/api/v1.1'
     TZ_NAME = 'America/New_York'
 
+    # past daily endpoints are final
+    CACHE_RULES = [
+        (r'/day/(?P<date>\d{8})(/location/\d+)?\.json$', None),
+    ]
+
     fuels = {
         'Coal': 'coal',
         'Hydro': 'hydro',
@@ -54,10 +59,7 @@ class ISONEClient(BaseClient):
         parsed_data = []
 
         # collect raw data
-        for endpoint in self.request_endpoints():
-            # carry out request
-            data = self.fetch_data(endpoint, self.auth)
-
+        for data in self.fetch_all_data(self.request_endpoints(), self.auth):
             # pull out data
             try:
                 raw_data += data['GenFuelMixes']['GenFuelMix']
@@ -69,7 +71,7 @@ class ISONEClient(BaseClient):
         try:
             df = self._parse_json(raw_data)
         except ValueError:
-            return []
+            return self.serialize_records([])
         df = self.slice_times(df)
 
         # return
@@ -85,10 +87,7 @@ class ISONEClient(BaseClient):
         raw_data = []
 
         # collect raw data
-        for endpoint in self.request_endpoints():
-            # carry out request
-            data = self.fetch_data(endpoint, self.auth)
-
+        for data in self.fetch_all_data(self.request_endpoints(), self.auth):
             # pull out data
             try:
                 raw_data += self.parse_json_load_data(data)
@@ -100,7 +99,7 @@ class ISONEClient(BaseClient):
         try:
             df = self._parse_json(raw_data)
         except ValueError:
-            return []
+            return self.serialize_records([])
         df = self.slice_times(df)
 
         # return
@@ -189,6 +188,10 @@ class ISONEClient(BaseClient):
         else:
             return {}
 
+    def fetch_all_data(self, endpoints, auth):
+        """Fetch all endpoints concurrently and return a list of json data, in the same order as endpoints"""
+        return self.map_concurrent(lambda endpoint: self.fetch_data(endpoint, auth), endpoints)
+
     def parse_json_load_data(self, data):
         """
         Pull approriate keys from json data set.
@@ -274,10 +277,7 @@ class ISONEClient(BaseClient):
         # set up storage
         raw_data = []
         # collect raw data
-        for endpoint in self.request_endpoints(locationid):
-            # carry out request
-            data = self.fetch_data(endpoint, self.auth)
-
+        for data in self.fetch_all_data(self.request_endpoints(locationid), self.auth):
             # pull out data
             try:
                 raw_data += self.parse_json_lmp_data(data)
@@ -290,7 +290,7 @@ class ISONEClient(BaseClient):
         df = self.slice_times(df)
 
         # return
-        return df.to_dict(orient='record')
+        return self.serialize_faster(df, drop_index=True)
 
     def get_morningreport(self, day=None):
         """
@@ -4,7 +4,6 @@ from pyiso import LOGGER
 import pandas as pd
 from io import BytesIO
 from datetime import datetime, timedelta
-import pytz
 from dateutil.parser import parse
 import re
 
@@ -30,6 +29,12 @@ class MISOClient(BaseClient):
     # Due to a legacy problem, pytz time zones names are sign reversed
     TZ_NAME = 'Etc/GMT+5'
 
+    # past final real-time, day-ahead and forecast reports are final, preliminary ones are not
+    CACHE_RULES = [
+        (r'/(?P<date>\d{8})_(rt_lmp_final|da_expost_lmp|da_exante_lmp)\.csv$', None),
+        (r'/(?P<date>\d{8})_da_ex\.xls$', None),
+    ]
+
     MARKET_CHOICES = IntervalChoices(hourly='RTHR', fivemin='RT5M', tenmin='RT5M', na='RT5M',
                                      dam='DAHR', hourly_prelim='RTHR_prelim',
                                      dam_exante='DAHR_exante')
@@ -170,7 +175,7 @@ class MISOClient(BaseClient):
             # format like 'Hour 01' to 'Hour 24'
             ihour = int(hour_str[5:]) - 1
             local_ts = datetime(date.year, date.month, date.day, ihour)
-            idx.append(self.utcify(local_ts))
+            idx.append(self.local_to_utc(local_ts))
         df.index = idx
         df.index.set_names(['timestamp'], inplace=True)
 
@@ -260,7 +265,7 @@ class MISOClient(BaseClient):
 
     def get_historical_lmp(self):
         # Etc/GMT+5 is actually GMT - 05:00 which is MISO time
-        tz = pytz.timezone(self.TZ_NAME)
+        tz = self.tz
 
         local_start = self.options['start_at'].astimezone(tz).date()
         local_end = self.options['end_at'].astimezone(tz).date()
@@ -270,16 +275,22 @@ class MISOClient(BaseClient):
                      self.MARKET_CHOICES.hourly_prelim: '_rt_lmp_prelim.csv',
                      self.MARKET_CHOICES.dam: '_da_expost_lmp.csv',
                      self.MARKET_CHOICES.dam_exante: '_da_exante_lmp.csv'}
+
+        # fetch all days concurrently
+        market = self.options['market']
+        ext = name_dict[market]
+        urls = [self.base_url + '/Library/Repository/Market%20Reports/' + day.strftime('%Y%m%d') + ext
+                for day in days]
+        responses = self.request_many(urls)
+
         pieces = []
-        for day in days:
-            # get the filename extension
-            ext = name_dict[self.options['market']]
+        for day, response in zip(days, responses):
             datestr = day.strftime('%Y%m%d')
-            url = self.base_url + '/Library/Repository/Market%20Reports/' + datestr + ext
+            if response is None:
+                continue
 
-            response = self.request(url)
             if response.status_code == 404:
-                if self.options['market'] == self.MARKET_CHOICES.hourly:
+                if market == self.MARKET_CHOICES.hourly:
                     # try preliminary and tell the user
                     self.options['market'] = self.MARKET_CHOICES.hourly_prelim
                     ext = name_dict[self.MARKET_CHOICES.hourly_prelim]
@@ -287,7 +298,7 @@ class MISOClient(BaseClient):
                     response = self.request(url)
 
             # if that didn't work, don't append to pieces
-            if response.status_code == 404:
+            if response is None or response.status_code == 404:
                 continue
             # skip file information
             udf = pd.read_csv(BytesIO(response.content), skiprows=[0, 1, 2, 3])
@@ -347,4 +358,4 @@ class MISOClient(BaseClient):
                 node_id = [node_id]
             reg = re.compile('|'.join(node_id))
             df = df.ix[df['node_id'].str.contains(reg)]
-        return df.to_dict(orient='records')
+        return self.serialize_faster(df, drop_index=True)
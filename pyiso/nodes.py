@@ -0,0 +1,139 @@
+from collections import defaultdict
+from math import cos, floor, radians, sqrt
+from time import monotonic
+import json
+import threading
+
+
+# registries shared by all clients, {key: (registry, expires)}
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def cached_registry(key, build, ttl_seconds):
+    """
+    Returns the registry cached under key, calling build() to create it
+    if there is none or it is older than ttl_seconds.
+    If build returns None (eg, the download failed), None is returned and nothing is cached.
+    """
+    with _registries_lock:
+        registry, expires = _registries.get(key, (None, None))
+        if registry is not None and expires > monotonic():
+            return registry
+
+        registry = build()
+        if registry is not None:
+            _registries[key] = (registry, monotonic() + ttl_seconds)
+        return registry
+
+
+class NodeRegistry(object):
+    """
+    Index of pricing node locations, for lookups by node_id, nearest node, and bounding box.
+
+    Nodes are dicts with keys node_id, latitude, longitude and area.
+    Locations are bucketed in a grid of square cells on an equirectangular projection
+    centred on the nodes' mean latitude, so nearest-node distances are accurate to about 1%
+    across a region the size of an ISO.
+    A registry can be saved to a json snapshot and loaded again without network access.
+    """
+    def __init__(self, nodes, cell_degrees=0.25):
+        self.nodes = list(nodes)
+        self.cell_degrees = cell_degrees
+
+        # index by node_id
+        self._by_id = dict((node['node_id'], node) for node in self.nodes)
+
+        # projection: longitude is scaled so that one unit is about the same distance as one degree of latitude
+        if self.nodes:
+            self._lon_scale = cos(radians(sum(node['latitude'] for node in self.nodes) / len(self.nodes)))
+        else:
+            self._lon_scale = 1.0
+
+        # grid of cells, {(row, col): [nodes]}
+        self._grid = defaultdict(list)
+        for node in self.nodes:
+            self._grid[self._cell(*self._project(node['latitude'], node['longitude']))].append(node)
+
+    def __getitem__(self, node_id):
+        return self._by_id[node_id]
+
+    def __contains__(self, node_id):
+        return node_id in self._by_id
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get(self, node_id, default=None):
+        return self._by_id.get(node_id, default)
+
+    def nearest(self, latitude, longitude):
+        """
+        Returns the node closest to a location, or None if the registry is empty.
+        """
+        if not self.nodes:
+            return None
+
+        y, x = self._project(latitude, longitude)
+        row, col = self._cell(y, x)
+
+        # search rings of cells around the location's cell, until no closer node can be outside the rings
+        best, best_dist = None, None
+        ring = 0
+        while best is None or best_dist > (ring - 1) * self.cell_degrees:
+            for cell in self._ring(row, col, ring):
+                for node in self._grid.get(cell, []):
+                    node_y, node_x = self._project(node['latitude'], node['longitude'])
+                    dist = sqrt((node_y - y) ** 2 + (node_x - x) ** 2)
+                    if best is None or dist < best_dist:
+                        best, best_dist = node, dist
+            ring += 1
+        return best
+
+    def within(self, min_latitude, min_longitude, max_latitude, max_longitude):
+        """
+        Returns a list of the nodes inside a bounding box, in registry order.
+        """
+        min_row, min_col = self._cell(*self._project(min_latitude, min_longitude))
+        max_row, max_col = self._cell(*self._project(max_latitude, max_longitude))
+
+        found = []
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                for node in self._grid.get((row, col), []):
+                    if min_latitude <= node['latitude'] <= max_latitude and \
+                            min_longitude <= node['longitude'] <= max_longitude:
+                        found.append(node)
+
+        order = dict((id(node), i) for i, node in enumerate(self.nodes))
+        return sorted(found, key=lambda node: order[id(node)])
+
+    def save(self, path):
+        """Write the nodes to a json snapshot at path."""
+        with open(path, 'w') as f:
+            json.dump(self.nodes, f)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Returns a registry of the nodes in a json snapshot written by save."""
+        with open(path) as f:
+            return cls(json.load(f), **kwargs)
+
+    def _project(self, latitude, longitude):
+        return latitude, longitude * self._lon_scale
+
+    def _cell(self, y, x):
+        return int(floor(y / self.cell_degrees)), int(floor(x / self.cell_degrees))
+
+    def _ring(self, row, col, ring):
+        if ring == 0:
+            return [(row, col)]
+        cells = []
+        for i in range(-ring, ring + 1):
+            cells += [(row - ring, col + i), (row + ring, col + i)]
+        for i in range(-ring + 1, ring):
+            cells += [(row + i, col - ring), (row + i, col + ring)]
+        return cells
@@ -7,7 +7,6 @@ try:
     from urllib2 import HTTPError
 except ImportError:
     from urllib.error import HTTPError
-import pytz
 import calendar
 
 
@@ -34,24 +33,13 @@ class NVEnergyClient(BaseClient):
         # set up storage
         parsed_data = []
 
-        # collect data
-        for this_date in self.dates():
-            # fetch
-            try:
-                df, mode = self.fetch_df(this_date)
-            except (HTTPError, ValueError):
-                LOGGER.warn('No data available in NVEnergy at %s' % this_date)
-                continue
-
-            # store
-            try:
-                parsed_data += self.parse_load(df, this_date, mode)
-            except KeyError:
-                LOGGER.warn('Unparseable data available in NVEnergy at %s for mode %s: %s' % (this_date, mode, df))
-                continue
+        # collect data, fetching and parsing all dates concurrently
+        for day_data in self.map_concurrent(lambda this_date: self.fetch_and_parse(this_date, self.parse_load),
+                                            self.dates()):
+            parsed_data += day_data
 
         # return
-        return self.time_subset(parsed_data)
+        return self.serialize_records(self.time_subset(parsed_data))
 
     def get_trade(self, latest=False,
                   start_at=False, end_at=False, **kwargs):
@@ -62,28 +50,36 @@ class NVEnergyClient(BaseClient):
         # set up storage
         parsed_data = []
 
-        # collect data
-        for this_date in self.dates():
-            # fetch
-            try:
-                df, mode = self.fetch_df(this_date)
-            except (HTTPError, ValueError):
-                LOGGER.warn('No data available in NVEnergy at %s' % this_date)
-                continue
-
-            # store
-            try:
-                parsed_data += self.parse_trade(df, this_date, mode)
-            except KeyError:
-                LOGGER.warn('Unparseable data available in NVEnergy at %s: %s' % (this_date, df))
-                continue
+        # collect data, fetching and parsing all dates concurrently
+        for day_data in self.map_concurrent(lambda this_date: self.fetch_and_parse(this_date, self.parse_trade),
+                                            self.dates()):
+            parsed_data += day_data
 
         # return
-        return self.time_subset(parsed_data)
+        return self.serialize_records(self.time_subset(parsed_data))
+
+    def fetch_and_parse(self, this_date, parser):
+        """
+        Fetch the data for one date and parse it with parser.
+        Returns a list of data points, or an empty list if the date has no usable data.
+        """
+        # fetch
+        try:
+            df, mode = self.fetch_df(this_date)
+        except (HTTPError, ValueError):
+            LOGGER.warn('No data available in NVEnergy at %s' % this_date)
+            return []
+
+        # parse
+        try:
+            return parser(df, this_date, mode)
+        except KeyError:
+            LOGGER.warn('Unparseable data available in NVEnergy at %s for mode %s: %s' % (this_date, mode, df))
+            return []
 
     def data_url(self, ts, mode=None):
         # today's date in local time
-        today = pytz.timezone(self.TZ_NAME).localize(datetime.utcnow()).date()
+        today = self.tz.localize(datetime.utcnow()).date()
         tomorrow = today + timedelta(days=1)
         try:
             this_day = ts.date()
@@ -137,7 +133,7 @@ class NVEnergyClient(BaseClient):
         else:  # historical
             # set up date string
             try:
-                datestr = pytz.timezone(self.TZ_NAME).localize(this_date).strftime('%Y-%m-%d')
+                datestr = self.tz.localize(this_date).strftime('%Y-%m-%d')
             except AttributeError:  # already date not datetime, assume local
                 datestr = this_date.strftime('%Y-%m-%d')
 
@@ -259,4 +255,4 @@ class NVEnergyClient(BaseClient):
         """
         ihour = int(shour) - 1
         local_time = datetime.combine(this_date, time(hour=ihour))
-        return self.utcify(local_time)
+        return self.local_to_utc(local_time)
@@ -13,6 +13,15 @@ class NYISOClient(BaseClient):
 
     TZ_NAME = 'America/New_York'
 
+    # past daily csvs and monthly zips are final
+    CACHE_RULES = [
+        (r'/(?P<date>\d{8})\w+\.csv$', None),
+        (r'/(?P<month>\d{6})01\w+_csv\.zip$', None),
+    ]
+
+    # past data comes in monthly zips, so stream one month at a time
+    ITER_PERIOD = 'month'
+
     fuel_names = {
         'Other Fossil Fuels': 'fossil',  # coal or oil
         'Other Renewables': 'renewable',  # solar, methane, refuse, wood
@@ -146,17 +155,24 @@ class NYISOClient(BaseClient):
         if not dates_list:
             dates_list = self.dates()
 
-        # fetch and parse all csvs
-        for date in dates_list:
-            for csv in self.fetch_csvs(date, label):
+        # fetch and parse daily csvs for all dates concurrently
+        daily_pieces = self.map_concurrent(lambda date: self.fetch_parse_daily(date, label, parser),
+                                           dates_list)
+
+        # months whose zip has been fetched already
+        fetched_months = set()
 
-                try:
-                    pieces.append(parser(csv))
-                except AttributeError:
-                    pass
+        for date, day_pieces in zip(dates_list, daily_pieces):
+            # if the daily csv is missing, fall back to the whole month, once per month
+            if day_pieces is None:
+                month = date.strftime('%Y%m')
+                if month in fetched_months:
+                    continue
+                fetched_months.add(month)
+                day_pieces = self.parse_csvs(self.fetch_monthly_csvs(date, label), parser)
+            pieces += day_pieces
 
-            # if fetch_csvs cannot get the individual days, it gets the whole month
-            # Shortcut the loop if any call to fetch_csvs gets all dates in dates_list
+            # Shortcut the loop if any monthly csv has all dates in dates_list
             try:
                 if (pieces[-1].index[-1] - timedelta(days=1)).date() > max(dates_list):
                     break
@@ -180,7 +196,30 @@ class NYISOClient(BaseClient):
         sliced = self.slice_times(df)
         return sliced
 
+    def fetch_parse_daily(self, date, label, parser):
+        """Returns a list of parsed DataFrames for one date, or None if there is no daily csv"""
+        csvs = self.fetch_daily_csvs(date, label)
+        if not csvs:
+            return None
+        return self.parse_csvs(csvs, parser)
+
+    def parse_csvs(self, csvs, parser):
+        pieces = []
+        for csv in csvs:
+            try:
+                pieces.append(parser(csv))
+            except AttributeError:
+                pass
+        return pieces
+
     def fetch_csvs(self, date, label):
+        # try daily data, and if failure, try zipped monthly data
+        csvs = self.fetch_daily_csvs(date, label)
+        if csvs:
+            return csvs
+        return self.fetch_monthly_csvs(date, label)
+
+    def fetch_daily_csvs(self, date, label):
         # construct url
         datestr = date.strftime('%Y%m%d')
         if self.options['data'] == 'lmp':
@@ -194,8 +233,11 @@ class NYISOClient(BaseClient):
         # if 200, return
         if response and response.status_code == 200:
             return [response.text]
+        else:
+            return []
 
-        # if failure, try zipped monthly data
+    def fetch_monthly_csvs(self, date, label):
+        # construct url
         datestr = date.strftime('%Y%m01')
         if self.options['data'] == 'lmp':
             url = '%s/%s/%s%s_zone_csv.zip' % (self.base_url, label, datestr, label)
@@ -1,12 +1,17 @@
 from bs4 import BeautifulSoup
+from collections import OrderedDict
 from pyiso.base import BaseClient
 from pyiso import LOGGER
+import numpy as np
 import pandas as pd
 from dateutil.parser import parse
 import pytz
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import partial
+from io import BytesIO
 import re
 import json
+import threading
 
 
 class PJMClient(BaseClient):
@@ -16,6 +21,26 @@ class PJMClient(BaseClient):
     base_dataminer_url = 'https://dataminer.pjm.com/dataminer/rest/public/api'
     oasis_url = 'http://oasis.pjm.com/system.htm'
     markets_operations_url = 'http://www.pjm.com/markets-and-operations.aspx'
+    historical_load_url = 'http://www.pjm.com/pub/operations/hist-meter-load/%s-hourly-loads.xls'
+
+    # patterns for the fuel mix on the markets and operations page:
+    # the genFuelMix element, its as-of time, the script after the chart container,
+    # the chart's data array, and the unquoted keys in it
+    genmix_elt_re = re.compile(r'id=["\']genFuelMix["\']')
+    genmix_as_of_re = re.compile(r'id=["\']asOfDate["\'][^>]*>([^<]*)<')
+    genmix_script_re = re.compile(r'id=["\']rtschartallfuelspjmGenFuel_container["\'][^>]*>\s*(?:</div>)?\s*'
+                                  r'<script[^>]*>(.*?)</script>', re.DOTALL)
+    genmix_data_re = re.compile(r'data: \[.*?\]', re.DOTALL)
+    js_key_re = re.compile(r'([{,]\s*)(\w+)\s*:')
+
+    # Data Miner requests with many nodes or long time ranges are slow or fail,
+    # so LMP queries are split into batches of nodes and windows of time
+    DATAMINER_MAX_NODES = 10
+    DATAMINER_MAX_WINDOW = timedelta(days=7)
+
+    # Data Miner requests are spaced out, with short bursts allowed
+    MIN_REQUEST_INTERVALS = {'dataminer.pjm.com': 0.5}
+    REQUEST_BURSTS = {'dataminer.pjm.com': 4}
 
     zonal_aggregate_nodes = {
         'AECO': 51291,
@@ -74,15 +99,28 @@ class PJMClient(BaseClient):
         if not response:
             return None, None
 
+        return self.parse_edata_point(response.content, key, header)
+
+    def parse_edata_point(self, content, key, header):
+        """
+        Returns the time as of a datasnapshot page, rounded down to 5 minutes,
+        and the value in row key and column header of its table
+        (or the whole table as a DataFrame if key and header are None).
+        Returns None, None if the page has no timestamp.
+        """
         # get time as of
-        ts = self.time_as_of(response.content)
+        ts = self.time_as_of(content)
+        if ts is None:
+            return None, None
 
         # round down to 5min
         extra_min = ts.minute % 5
         ts -= timedelta(minutes=extra_min)
 
         # parse html to df
-        dfs = pd.read_html(response.content, header=0, index_col=0)
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        dfs = pd.read_html(BytesIO(content), header=0, index_col=0)
         df = dfs[0]
         if key and header:
             val = df.loc[key][header]
@@ -117,45 +155,74 @@ class PJMClient(BaseClient):
         return response
 
     def fetch_historical_load(self, year, region_name='RTO'):
-        # get RTO data
-        url = 'http://www.pjm.com/pub/operations/hist-meter-load/%s-hourly-loads.xls' % year
-        df = pd.read_excel(url, sheetname=region_name)
+        """
+        Returns a DataFrame of hourly metered load for one year and region,
+        with a UTC timestamp index and a load_MW column.
+        Parsed years that are over are kept in the client's cache.
+        """
+        # use the parsed year from the cache if possible
+        cache_name = 'PJM_%d_%s_hourly_loads' % (year, region_name)
+        is_final = self.date_is_final(date(year, 12, 31))
+        if self.cache is not None and is_final:
+            df = self.cache.get_frame(cache_name)
+            if df is not None:
+                return df
+
+        # get xls
+        response = self.request(self.historical_load_url % year)
+        if not response:
+            return pd.DataFrame({'load_MW': []}, index=pd.DatetimeIndex([], tz=pytz.utc, name='timestamp'))
 
-        # drop unneeded cols
-        drop_cols = ['Unnamed: %d' % i for i in range(35)]
-        drop_cols += ['MAX', 'HOUR', 'DATE.1', 'MIN', 'HOUR.1', 'DATE.2']
-        df.drop(drop_cols, axis=1, inplace=True, errors='ignore')
+        df = self.parse_historical_load(pd.read_excel(BytesIO(response.content), sheet_name=region_name))
 
-        # reshape from wide to tall
-        df = pd.melt(df, id_vars=['DATE', 'COMP'])
+        if self.cache is not None and is_final:
+            self.cache.set_frame(cache_name, df)
+        return df
 
+    def parse_historical_load(self, df):
+        """
+        Returns the hourly metered load in one sheet of a yearly load xls file,
+        with a UTC timestamp index and a load_MW column.
+        """
         # HE01, HE02, ... HE24; hour ending in local time
-        # convert to hour beginning as integer
-        df['hour'] = df['variable'].str.strip('HE').astype(int) - 1
-
-        # set naive local datetime column
-        df['datetime_str'] = (pd.to_datetime(df['DATE']).astype(str) + ':' +
-                              df['hour'].astype(str).str.zfill(2))
-        df['timestamp'] = pd.to_datetime(df['datetime_str'], format='%Y-%m-%d:%H')
-
-        # utcify
-        # TODO handle DST transitions properly, this just returns Not a Time
-        # and utcify_index fails with AmbiguousTimeError, even with ambiguous='infer'
-        f = lambda x: pytz.timezone(self.TZ_NAME).localize(x['timestamp'])
-        df['timestamp'] = df.apply(f, axis=1)
-        df.set_index('timestamp', inplace=True)
-        df = self.utcify_index(df)
-
-        # drop unneeded cols
-        drop_col = ['datetime_str', 'DATE', 'hour', 'variable', 'COMP']
-        df.drop(drop_col, axis=1, inplace=True)
-
-        # add formatting
-        df.rename(columns={'value': 'load_MW'}, inplace=True)
-
-        # Drop the couple of times around DST transition that we don't handle correctly
-        df.dropna(subset=['load_MW'], inplace=True)
-        return df
+        hour_cols = [col for col in df.columns if re.match(r'^HE\d+$', str(col))]
+        hours = np.array([int(col[2:]) - 1 for col in hour_cols])  # hour beginning
+
+        # reshape from wide to tall, day by day
+        days = pd.to_datetime(df['DATE']).values
+        values = df[hour_cols].values.astype(float).ravel()
+        naive = pd.DatetimeIndex(days.repeat(len(hours)) +
+                                 np.tile(hours, len(days)) * np.timedelta64(1, 'h'))
+
+        # drop hours without data, eg the hour skipped when DST starts
+        has_data = ~np.isnan(values)
+        naive, values = naive[has_data], values[has_data]
+
+        # localize all at once. The hour repeated when DST ends is read as daylight time
+        # the first time it appears and standard time after that.
+        # A value in the hour skipped when DST starts is moved to the next real hour.
+        local = naive.tz_localize(self.TZ_NAME, ambiguous=~naive.duplicated(keep='first'),
+                                  nonexistent='shift_forward')
+
+        loads = pd.DataFrame({'load_MW': values}, index=local.tz_convert(pytz.utc).rename('timestamp'))
+
+        # if that hour also has its own value, keep that one
+        repeated = loads.index.duplicated(keep='last')
+        if repeated.any():
+            LOGGER.warning('PJM: dropping load in skipped DST hours %s' %
+                           list(naive[repeated].strftime('%Y-%m-%d %H:%M')))
+            loads = loads[~repeated]
+        return loads.sort_index()
+
+    def fetch_historical_load_range(self, start_at, end_at, region_name='RTO'):
+        """
+        Returns a DataFrame of hourly metered load for every year from start_at to end_at in local time,
+        with a UTC timestamp index and a load_MW column.
+        Years are fetched concurrently (see fetch_historical_load).
+        """
+        years = range(start_at.astimezone(self.tz).year, end_at.astimezone(self.tz).year + 1)
+        frames = self.map_concurrent(partial(self.fetch_historical_load, region_name=region_name), years)
+        return pd.concat(frames)
 
     def get_load(self, latest=False, start_at=None, end_at=None, forecast=False, **kwargs):
         # set args
@@ -175,13 +242,10 @@ class PJMClient(BaseClient):
                 'market': self.MARKET_CHOICES.dam,
                 'ba_name': self.NAME,
             }
-            data = self.serialize_faster(sliced, extras=extras)
-
-            # return
-            return data
+            return self.serialize_faster(sliced, extras=extras)
 
         elif self.options['end_at'] and self.options['end_at'] < datetime.now(pytz.utc) - timedelta(hours=1):
-            df = self.fetch_historical_load(self.options['start_at'].year)
+            df = self.fetch_historical_load_range(self.options['start_at'], self.options['end_at'])
             sliced = self.slice_times(df)
 
             # format
@@ -190,10 +254,7 @@ class PJMClient(BaseClient):
                 'market': self.MARKET_CHOICES.dam,
                 'ba_name': self.NAME,
             }
-            data = self.serialize_faster(sliced, extras=extras)
-
-            # return
-            return data
+            return self.serialize_faster(sliced, extras=extras)
 
         else:
             # handle real-time
@@ -204,16 +265,16 @@ class PJMClient(BaseClient):
                 load_ts, load_val = self.fetch_oasis_data()
             if not (load_ts and load_val):
                 LOGGER.warn('No PJM latest load data')
-                return []
+                return self.serialize_records([])
 
             # format and return
-            return [{
+            return self.serialize_records([{
                 'timestamp': load_ts,
                 'freq': self.FREQUENCY_CHOICES.fivemin,
                 'market': self.MARKET_CHOICES.fivemin,
                 'load_MW': load_val,
                 'ba_name': self.NAME,
-            }]
+            }])
 
     def get_trade(self, latest=False, **kwargs):
         # set args
@@ -227,15 +288,15 @@ class PJMClient(BaseClient):
 
         # format and return
         if ts and val:
-            return [{
+            return self.serialize_records([{
                     'timestamp': ts,
                     'freq': self.FREQUENCY_CHOICES.fivemin,
                     'market': self.MARKET_CHOICES.fivemin,
                     'net_exp_MW': -val,
                     'ba_name': self.NAME,
-                    }]
+                    }])
         else:
-            return []
+            return self.serialize_records([])
 
     def parse_datasnapshot_df(self, ts, df):
         df['timestamp'] = ts
@@ -254,52 +315,33 @@ class PJMClient(BaseClient):
         return df
 
     def parse_dataminer_df(self, json):
-        df = pd.DataFrame(json)
-        if df.empty:
-            return df
-
+        """
+        Returns a DataFrame with one row per node and hour of the TotalLMP prices
+        in a Data Miner LMP response, indexed by timestamp.
+        """
         # drop CongLMP and LossLMP
-        df = df[df['priceType'] == 'TotalLMP']
-
-        # turn nested prices into DataFrame
-        df['lmp'] = df['prices'].apply(lambda x: pd.DataFrame.from_dict(x))
-
-        # reindex and drop extra columns
-        df = df.reset_index()
-        df.drop(['index', 'prices'], axis=1)
-
-        # list of DataFrames to concatenate
-        dfs = []
-        # group by day
-        grouped = df.groupby('publishDate')
-        for name, gr in grouped:
-            # unpack nested lmp dataframe
-            lmps = pd.concat([d.set_index('utchour') for d in gr['lmp']])
-
-            # set high level columns
-            for col in ['pnodeId', 'priceType', 'publishDate', 'versionNum']:
-                lmps[col] = gr[col].iloc[0]
-
-            dfs.append(lmps)
+        records = [record for record in json if record['priceType'] == 'TotalLMP']
+        if not records:
+            return pd.DataFrame()
 
-        retdf = pd.concat(dfs)
+        # flatten nested prices into column arrays in one pass
+        counts = [len(record['prices']) for record in records]
+        utchours = [price['utchour'] for record in records for price in record['prices']]
+        lmps = [price['price'] for record in records for price in record['prices']]
+        node_ids = np.repeat([record['pnodeId'] for record in records], counts)
 
-        # Convert datetime string to datetime object with timezone
-        retdf['timestamp'] = pd.to_datetime(retdf.index, utc=True)
+        # every node repeats the same hours, so parse each datetime string once
+        codes, unique_hours = pd.factorize(pd.Series(utchours))
+        timestamps = pd.to_datetime(unique_hours, utc=True)[codes].rename('timestamp')
 
-        # rename, drop and add standard columns
-        rename_d = {'price': 'lmp',
-                    'pnodeId': 'node_id',
-                    'priceType': 'lmp_type',
-                    }
-        retdf.rename(columns=rename_d, inplace=True)
-        retdf.drop(['publishDate', 'versionNum'], axis=1, inplace=True)
+        # standard columns
+        retdf = pd.DataFrame({'lmp': lmps, 'node_id': node_ids}, index=timestamps)
+        retdf['lmp_type'] = 'TotalLMP'
+        retdf['timestamp'] = timestamps
         retdf['freq'] = self.options['freq']
         retdf['market'] = self.options['market']
         retdf['ba_name'] = 'PJM'
 
-        retdf.index = retdf['timestamp']
-
         return retdf
 
     def fetch_dataminer_df(self, endpoint, params):
@@ -312,6 +354,60 @@ class PJMClient(BaseClient):
 
         return df
 
+    def construct_dataminer_params(self, node_names, start_at, end_at):
+        """
+        Returns a list of Data Miner request parameters that together cover node_names
+        from start_at to end_at, each with at most DATAMINER_MAX_NODES nodes
+        and spanning at most DATAMINER_MAX_WINDOW.
+        """
+        format_str = '%Y-%m-%dT%H:%M:%SZ'  # "1998-04-01T05:00:00Z"
+
+        # consecutive windows
+        windows = []
+        window_start = start_at
+        while True:
+            window_end = min(window_start + self.DATAMINER_MAX_WINDOW, end_at)
+            windows.append((window_start.astimezone(pytz.utc).strftime(format_str),
+                            window_end.astimezone(pytz.utc).strftime(format_str)))
+            if window_end >= end_at:
+                break
+            window_start = window_end
+
+        # every node batch for each window
+        return [{'startDate': window_start, 'endDate': window_end,
+                 'pnodeList': node_names[i:i + self.DATAMINER_MAX_NODES]}
+                for window_start, window_end in windows
+                for i in range(0, len(node_names), self.DATAMINER_MAX_NODES)]
+
+    def fetch_dataminer_df_many(self, endpoint, params_list, progress=None):
+        """
+        Fetch each of params_list from a Data Miner endpoint concurrently with fetch_dataminer_df.
+        Returns one DataFrame, dropping rows for a node and time repeated in more than one window.
+        If there is no data, returns an empty DataFrame.
+
+        If progress is given, it is called as progress(n_done, n_total, n_rows)
+        after each request is parsed, where n_rows is the number of rows it returned.
+        It may be called from worker threads, but never from two at once.
+        """
+        progress_lock = threading.Lock()
+        n_done = [0]
+
+        def fetch(params):
+            df = self.fetch_dataminer_df(endpoint, params=params)
+            if progress is not None:
+                with progress_lock:
+                    n_done[0] += 1
+                    progress(n_done[0], len(params_list), len(df))
+            return df
+
+        frames = [df for df in self.map_concurrent(fetch, params_list) if len(df)]
+        if not frames:
+            return pd.DataFrame()
+
+        # concatenate once
+        df = pd.concat(frames)
+        return df[~df.duplicated(subset=['node_id', 'timestamp'])]
+
     def handle_options(self, **kwargs):
         super(PJMClient, self).handle_options(**kwargs)
 
@@ -364,8 +460,7 @@ class PJMClient(BaseClient):
 
         # do not pass tzinfos argument to dateutil.parser.parse, it fails arithmetic
         ts = parse(ts_elt.string, ignoretz=True)
-        ts = pytz.timezone('US/Eastern').localize(ts)
-        ts = ts.astimezone(pytz.utc)
+        ts = self.local_to_utc(ts)
 
         # return
         return ts
@@ -425,6 +520,9 @@ class PJMClient(BaseClient):
         elt = soup.find(id='genFuelMix')
         time_str = elt.find(id='asOfDate').contents[0]
 
+        return self.parse_genmix_as_of(time_str, elt)
+
+    def parse_genmix_as_of(self, time_str, context=None):
         # string like ' As of 6:00 p.m. EPT'
         time_str = time_str.replace(' As of ', '')
 
@@ -432,7 +530,7 @@ class PJMClient(BaseClient):
         try:
             naive_local_ts = parse(time_str)
         except ValueError:
-            raise ValueError('Error parsing %s from %s' % (time_str, elt))
+            raise ValueError('Error parsing %s from %s' % (time_str, context))
 
         # return
         return self.utcify(naive_local_ts)
@@ -442,19 +540,6 @@ class PJMClient(BaseClient):
         elt = soup.find(id='genFuelMix')
         data_str = elt.find(id='rtschartallfuelspjmGenFuel_container').next_sibling.contents[0]
 
-        # set up regex to match data json
-        match = re.search(r'data: \[.*?\]', data_str)
-        match_str = match.group(0)
-
-        # transform from json
-        json_str = '{' + match_str + '}'
-        json_str = json_str.replace('data:', '"data":')
-        json_str = json_str.replace('color:', '"color":')
-        json_str = json_str.replace('name:', '"name":')
-        json_str = json_str.replace('y:', '"y":')
-        json_str = json_str.replace('\'', '"')
-        raw_data = json.loads(json_str)
-
         # get date
         try:
             ts = self.parse_date_from_markets_operations(soup)
@@ -462,6 +547,44 @@ class PJMClient(BaseClient):
             # error handling date, assume no data
             return []
 
+        return self.parse_genmix_chart(data_str, ts)
+
+    def parse_realtime_genmix_content(self, content):
+        """
+        Same as parse_realtime_genmix, but reads the markets and operations page content
+        without building a BeautifulSoup tree of the whole page:
+        the genFuelMix element, its as-of time and the chart script are found with precompiled patterns.
+        Returns an empty list if the fuel mix is not found or its time can't be parsed.
+        """
+        if isinstance(content, bytes):
+            content = content.decode('utf-8', 'replace')
+
+        # find element, then its time and chart script
+        elt_match = self.genmix_elt_re.search(content)
+        as_of_match = elt_match and self.genmix_as_of_re.search(content, elt_match.end())
+        script_match = elt_match and self.genmix_script_re.search(content, elt_match.end())
+        if not (as_of_match and script_match):
+            LOGGER.warn('PJM: fuel mix not found in markets and operations page')
+            return []
+
+        # get date
+        try:
+            ts = self.parse_genmix_as_of(as_of_match.group(1), as_of_match.group(0))
+        except ValueError:
+            # error handling date, assume no data
+            return []
+
+        return self.parse_genmix_chart(script_match.group(1), ts)
+
+    def parse_genmix_chart(self, data_str, ts):
+        """
+        Returns a list of data points at ts for the fuel mix in the javascript of a chart.
+        """
+        # match data array, and quote its keys and strings to make it json
+        match_str = self.genmix_data_re.search(data_str).group(0)
+        json_str = self.js_key_re.sub(r'\1"\2":', '{' + match_str + '}').replace('\'', '"')
+        raw_data = json.loads(json_str)
+
         # parse data
         data = []
         for raw_dp in raw_data['data']:
@@ -483,17 +606,101 @@ class PJMClient(BaseClient):
         self.handle_options(data='gen', latest=latest, **kwargs)
 
         # fetch and parse
-        soup = self.fetch_markets_operations_soup()
-        if soup:
-            data = self.parse_realtime_genmix(soup)
+        response = self.request(self.markets_operations_url)
+        if response:
+            data = self.parse_realtime_genmix_content(response.content)
         else:
-            return []
+            return self.serialize_records([])
 
         # return
-        return data
+        return self.serialize_records(data)
+
+    def get_snapshot(self, **kwargs):
+        """
+        Returns the latest real-time data from the datasnapshot and markets and operations pages,
+        fetched concurrently in one batch, as a dict with keys
+        timestamp, stale, load, trade, lmp and generation.
+
+        load, trade and lmp hold what get_load(latest=True), get_trade(latest=True)
+        and get_lmp(market='RT5M') return for the zonal aggregate nodes,
+        each stamped with the time as of its own page, rounded down to 5 minutes.
+        timestamp is the latest of those times (or None if no page could be read),
+        and stale lists the names of the series ('load', 'trade' or 'lmp') whose page is older;
+        a warning is logged if there are any.
+        generation holds what get_generation(latest=True) returns,
+        with the hourly timestamp of the fuel mix.
+        Data from a page that could not be fetched or parsed is an empty list;
+        unlike the get_* methods, there is no fallback to OASIS.
+        kwargs such as return_type are handled as in the get_* methods.
+        """
+        self.handle_options(data='snapshot', latest=True, **kwargs)
+        self.options['freq'] = self.FREQUENCY_CHOICES.fivemin
+        self.options['market'] = self.MARKET_CHOICES.fivemin
+
+        # fetch every page at once
+        edata_pages = [('load', 'InstantaneousLoad', 'PJM RTO Total', 'MW'),
+                       ('trade', 'TieFlows', 'PJM RTO', 'Actual (MW)'),
+                       ('lmp', 'ZonalAggregateLmp', None, None)]
+        urls = [self.base_url + data_type + '.aspx' for _, data_type, _, _ in edata_pages]
+        responses = self.request_many(urls + [self.markets_operations_url])
+
+        # parse datasnapshot pages
+        points = OrderedDict()
+        for (name, data_type, key, header), response in zip(edata_pages, responses):
+            point = (None, None)
+            if response:
+                try:
+                    point = self.parse_edata_point(response.content, key, header)
+                except (ValueError, KeyError, IndexError) as e:
+                    LOGGER.warning('PJM: error parsing %s snapshot: %s' % (data_type, e))
+            points[name] = point
+        load_ts, load_val = points['load']
+        trade_ts, trade_val = points['trade']
+        lmp_ts, lmp_df = points['lmp']
+
+        # latest page time, and series from older pages
+        timestamps = [point_ts for point_ts, _ in points.values() if point_ts is not None]
+        ts = max(timestamps) if timestamps else None
+        stale = [name for name, (point_ts, _) in points.items() if point_ts is not None and point_ts < ts]
+        if stale:
+            LOGGER.warning('PJM: snapshot pages for %s are older than %s: %s' % (
+                ', '.join(stale), ts, ', '.join('%s as of %s' % (name, points[name][0]) for name in stale)))
+
+        extras = {
+            'freq': self.FREQUENCY_CHOICES.fivemin,
+            'market': self.MARKET_CHOICES.fivemin,
+            'ba_name': self.NAME,
+        }
+        load = [dict(extras, timestamp=load_ts, load_MW=load_val)] if load_ts and load_val else []
+        trade = [dict(extras, timestamp=trade_ts, net_exp_MW=-trade_val)] if trade_ts and trade_val else []
+        if lmp_ts:
+            lmp = self.serialize_faster(self.parse_datasnapshot_df(lmp_ts, lmp_df), drop_index=True)
+        else:
+            lmp = self.serialize_records([])
+
+        # parse hourly fuel mix
+        generation = []
+        if responses[-1]:
+            try:
+                generation = self.parse_realtime_genmix_content(responses[-1].content)
+            except (AttributeError, ValueError, KeyError) as e:
+                LOGGER.warning('PJM: error parsing fuel mix snapshot: %s' % e)
+
+        return {
+            'timestamp': ts,
+            'stale': stale,
+            'load': self.serialize_records(load),
+            'trade': self.serialize_records(trade),
+            'lmp': lmp,
+            'generation': self.serialize_records(generation),
+        }
 
     def get_lmp(self, node_id='APS', latest=False, **kwargs):
-        """ Allegheny Power Systems is APS"""
+        """
+        Allegheny Power Systems is APS.
+        For date ranges, pass progress=callable to follow the Data Miner requests
+        (see fetch_dataminer_df_many).
+        """
         self.handle_options(data='lmp', latest=latest, **kwargs)
 
         # standardize node_id
@@ -517,13 +724,12 @@ class PJMClient(BaseClient):
                 else:
                     node_names.append(node)
 
-            # if getting from dataminer method, setup parameters
-            format_str = '%Y-%m-%dT%H:%M:%SZ'  # "1998-04-01T05:00:00Z"
-            params = {'startDate': self.options['start_at'].strftime(format_str),
-                      'endDate': self.options['end_at'].strftime(format_str),
-                      'pnodeList': node_names}
-            df = self.fetch_dataminer_df(self.options['endpoint'], params=params)
+            # fetch from dataminer in node batches and time windows
+            params_list = self.construct_dataminer_params(node_names, self.options['start_at'],
+                                                          self.options['end_at'])
+            df = self.fetch_dataminer_df_many(self.options['endpoint'], params_list,
+                                              progress=self.options.get('progress'))
 
         df = self.slice_times(df)
 
-        return df.to_dict(orient='records')
+        return self.serialize_faster(df, drop_index=True)
@@ -0,0 +1,150 @@
+from sys import intern
+
+
+class DataPoint(object):
+    """
+    Compact record for one data point, returned by get_* methods with return_type='records'.
+
+    Fields are stored in __slots__ instead of a per-record dict, and string values are interned,
+    so repeated labels like ba_name or node_id are stored once per process.
+    Records support the read and write parts of the dict interface used on
+    the default list-of-dicts output (dp['timestamp'], dp.get, dp.items(), dp == {...}, ...).
+    Keys without a slot are kept in a small dict that is only created when needed.
+    """
+    FIELDS = ('timestamp', 'ba_name', 'market', 'freq')
+    __slots__ = FIELDS + ('_extra',)
+
+    def __init__(self, *args, **kwargs):
+        self._extra = None
+        self.update(*args, **kwargs)
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if isinstance(value, str):
+            value = intern(value)
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (DataPoint, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, dict(self.items()))
+
+    def __getstate__(self):
+        return dict(self.items())
+
+    def __setstate__(self, state):
+        self._extra = None
+        self.update(state)
+
+    def keys(self):
+        keys = [key for key in self.FIELDS if hasattr(self, key)]
+        if self._extra:
+            keys += list(self._extra.keys())
+        return keys
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def copy(self):
+        return self.__class__(self.items())
+
+    def to_dict(self):
+        return dict(self.items())
+
+
+class LoadPoint(DataPoint):
+    FIELDS = DataPoint.FIELDS + ('load_MW',)
+    __slots__ = ('load_MW',)
+
+
+class GenPoint(DataPoint):
+    FIELDS = DataPoint.FIELDS + ('fuel_name', 'gen_MW')
+    __slots__ = ('fuel_name', 'gen_MW')
+
+
+class TradePoint(DataPoint):
+    FIELDS = DataPoint.FIELDS + ('source_ba_name', 'dest_ba_name', 'export_MW', 'import_MW', 'net_exp_MW')
+    __slots__ = ('source_ba_name', 'dest_ba_name', 'export_MW', 'import_MW', 'net_exp_MW')
+
+
+class LmpPoint(DataPoint):
+    FIELDS = DataPoint.FIELDS + ('node_id', 'lmp', 'lmp_type')
+    __slots__ = ('node_id', 'lmp', 'lmp_type')
+
+
+def record_class(keys):
+    """
+    Returns the record class for data points with the given keys.
+    """
+    keys = set(keys)
+    if 'gen_MW' in keys:
+        return GenPoint
+    if 'load_MW' in keys:
+        return LoadPoint
+    if 'lmp' in keys:
+        return LmpPoint
+    if keys & {'export_MW', 'import_MW', 'net_exp_MW'}:
+        return TradePoint
+    return DataPoint
@@ -30,12 +30,12 @@ class SVERIClient(BaseClient):
 
     def _get_payload(self, ids):
         if self.options['latest']:
-            now = datetime.now(pytz.timezone(self.TZ_NAME))
+            now = datetime.now(self.tz)
             start = now.strftime('%Y-%m-%d')
             end = (now + timedelta(days=1)).strftime('%Y-%m-%d')
         else:
-            start = self.options['start_at'].astimezone(pytz.timezone(self.TZ_NAME)).strftime('%Y-%m-%d')
-            end = self.options['end_at'].astimezone(pytz.timezone(self.TZ_NAME)).strftime('%Y-%m-%d')
+            start = self.options['start_at'].astimezone(self.tz).strftime('%Y-%m-%d')
+            end = self.options['end_at'].astimezone(self.tz).strftime('%Y-%m-%d')
         return {
             'ids': ids,
             'startDate': start,
@@ -73,7 +73,7 @@ class SVERIClient(BaseClient):
     def _clean_and_serialize(self, df):
         # if no data, nothing to do
         if len(df) == 0:
-            return []
+            return self.serialize_records([])
 
         # clean
         cleaned_df = self.clean_df(df)
@@ -98,10 +98,10 @@ class SVERIClient(BaseClient):
         response = self.request(self.BASE_URL, params=payloads[0])
         response2 = self.request(self.BASE_URL, params=payloads[1])
         if not response or not response2:
-            return []
+            return self.serialize_records([])
 
         if response.text == 'Invalid ids string.' or response2.text == 'Invalid ids string':
-            return []
+            return self.serialize_records([])
 
         # parse
         df = self.parse_to_df(response.content, header=0,
@@ -123,7 +123,7 @@ class SVERIClient(BaseClient):
         payload = self.get_load_payload()
         response = self.request(self.BASE_URL, params=payload)
         if not response:
-            return []
+            return self.serialize_records([])
 
         # parse
         df = self.parse_to_df(response.content, header=0, parse_dates=True, date_parser=self.date_parser, index_col=0)
@@ -133,7 +133,7 @@ class SVERIClient(BaseClient):
 
     def date_parser(self, ts_str):
         TZINFOS = {
-            'MST': pytz.timezone(self.TZ_NAME),
+            'MST': self.tz,
         }
 
         return dateutil_parse(ts_str, tzinfos=TZINFOS)
@@ -46,8 +46,8 @@ setup(
     license='Apache',
     classifiers=[
         'Programming Language :: Python',
-        'Programming Language :: Python :: 2',
         'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
         'License :: OSI Approved :: Apache Software License',
         'Operating System :: OS Independent',
         'Development Status :: 3 - Alpha',
@@ -61,9 +61,10 @@ setup(
         'Topic :: Software Development :: Libraries :: Python Modules',
     ],
     test_suite='nose.collector',
+    python_requires='>=3.5',
     install_requires=[
         'beautifulsoup4==4.5.0',
-        'pandas>=0.18',
+        'pandas>=0.24',
         'python-dateutil',
         'pytz',
         'requests',
@@ -0,0 +1,6 @@
+import os
+from unittest import skipUnless
+
+
+# wall-clock comparisons are noisy on shared machines, so they only run on request
+benchmark = skipUnless(os.environ.get('PYISO_BENCHMARKS'), 'set PYISO_BENCHMARKS to run timing benchmarks')
@@ -1,8 +1,21 @@
 from unittest import TestCase
-from pyiso.base import BaseClient
-from datetime import datetime, timedelta
+from tests import benchmark
+from pyiso.base import BaseClient, TimestampParser, get_dst_table
+from pyiso.records import GenPoint, LoadPoint, LmpPoint
+from pyiso.nyiso import NYISOClient
+from pyiso.bpa import BPAClient
+from pyiso.caiso import CAISOClient
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, date
+from time import sleep
+from dateutil.parser import parse as dateutil_parse
+import asyncio
+import mock
 import pytz
 import pandas as pd
+import requests
+import shutil
+import tempfile
 
 
 class TestBaseClient(TestCase):
@@ -122,3 +135,452 @@ class TestBaseClient(TestCase):
 
         bc = BaseClient(timeout_seconds=30)
         self.assertEqual(bc.timeout_seconds, 30)
+
+    def test_session_pooled(self):
+        bc = BaseClient()
+        session = bc.get_session()
+        self.assertIs(session, bc.get_session())
+        adapter = session.get_adapter('https://example.com')
+        self.assertEqual(adapter._pool_maxsize, bc.MAX_CONNECTIONS_PER_HOST)
+        self.assertTrue(adapter._pool_block)
+
+    def test_host_semaphore_shared(self):
+        bc1 = BaseClient()
+        bc2 = BaseClient()
+        sem1 = bc1.host_semaphore('http://example.com/a.csv')
+        sem2 = bc2.host_semaphore('http://example.com/b.csv')
+        sem3 = bc1.host_semaphore('http://example.org/a.csv')
+        self.assertIs(sem1, sem2)
+        self.assertIsNot(sem1, sem3)
+
+    def test_request_many_order(self):
+        bc = BaseClient()
+        urls = ['http://example.com/%d' % i for i in range(20)]
+        with mock.patch.object(bc, 'request', side_effect=lambda url, **kwargs: url):
+            responses = bc.request_many(urls)
+        self.assertEqual(responses, urls)
+
+    def test_wait_for_host_spaces_requests(self):
+        bc = BaseClient()
+        bc.MIN_REQUEST_INTERVALS = {'ratelimited.example.com': 0.05}
+        url = 'http://ratelimited.example.com/a.csv'
+
+        start = datetime.now()
+        bc.map_concurrent(bc.wait_for_host, [url] * 4)
+        self.assertGreaterEqual(datetime.now() - start, timedelta(seconds=0.15))
+
+        # other hosts are not limited
+        start = datetime.now()
+        bc.wait_for_host('http://example.com/a.csv')
+        self.assertLess(datetime.now() - start, timedelta(seconds=0.05))
+
+    def test_wait_for_host_burst(self):
+        bc = BaseClient()
+        bc.MIN_REQUEST_INTERVALS = {'burst.example.com': 0.1}
+        bc.REQUEST_BURSTS = {'burst.example.com': 3}
+        url = 'http://burst.example.com/a.csv'
+
+        # first three start at once, the fourth waits for a token
+        start = datetime.now()
+        bc.map_concurrent(bc.wait_for_host, [url] * 3)
+        self.assertLess(datetime.now() - start, timedelta(seconds=0.08))
+        bc.wait_for_host(url)
+        self.assertGreaterEqual(datetime.now() - start, timedelta(seconds=0.08))
+
+    def test_pause_host(self):
+        bc = BaseClient()
+        url = 'http://paused.example.com/a.csv'
+
+        bc.pause_host(url, 0.1)
+        start = datetime.now()
+        bc.wait_for_host(url)
+        self.assertGreaterEqual(datetime.now() - start, timedelta(seconds=0.1))
+
+        # pause over
+        start = datetime.now()
+        bc.wait_for_host(url)
+        self.assertLess(datetime.now() - start, timedelta(seconds=0.05))
+
+    def test_coalesce_shares_concurrent_calls(self):
+        bc = BaseClient()
+        calls = []
+
+        def slow_fetch(x):
+            calls.append(x)
+            sleep(0.1)
+            return [x]
+
+        results = bc.map_concurrent(lambda _: bc.coalesce(('test_coalesce', 1), slow_fetch, 1), range(4))
+        self.assertEqual(results, [[1]] * 4)
+        self.assertEqual(calls, [1])
+
+    def test_coalesce_keeps_nothing_after_completion(self):
+        fetch = mock.Mock(side_effect=['data', 'new data'])
+        self.assertEqual(BaseClient().coalesce(('test_coalesce_done',), fetch), 'data')
+
+        # a later call, even from another client, fetches again
+        self.assertEqual(BaseClient().coalesce(('test_coalesce_done',), fetch), 'new data')
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_coalesce_exception_not_shared(self):
+        bc = BaseClient()
+        fetch = mock.Mock(side_effect=[ValueError('failed'), 'data'])
+        self.assertRaises(ValueError, bc.coalesce, ('test_coalesce_exception',), fetch)
+        self.assertEqual(bc.coalesce(('test_coalesce_exception',), fetch), 'data')
+
+    def _run_async(self, coro):
+        # a fresh event loop per test (asyncio.run needs Python 3.7)
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_arequest(self):
+        bc = BaseClient()
+        urls = ['http://example.com/%d' % i for i in range(5)]
+
+        async def fetch():
+            return await asyncio.gather(*[bc.arequest(url, params={'a': 1}) for url in urls])
+
+        with mock.patch.object(bc, 'request', side_effect=lambda url, **kwargs: (url, kwargs)) as mock_request:
+            responses = self._run_async(fetch())
+        self.assertEqual([r[0] for r in responses], urls)
+        self.assertEqual(responses[0][1], {'mode': 'get', 'params': {'a': 1}})
+        self.assertEqual(mock_request.call_count, 5)
+
+    def test_aget_isolates_options(self):
+        class DummyClient(BaseClient):
+            def get_load(self, latest=False, **kwargs):
+                self.handle_options(data='load', latest=latest, **kwargs)
+                return [self.options['tag']]
+
+        bc = DummyClient()
+
+        async def fetch():
+            return await asyncio.gather(*[bc.aget_load(latest=True, tag=i) for i in range(5)])
+
+        results = self._run_async(fetch())
+        self.assertEqual(results, [[i] for i in range(5)])
+        self.assertEqual(bc.options, {})
+
+    def test_map_concurrent_order(self):
+        bc = BaseClient()
+        dates = [date(2016, 1, 1) + timedelta(days=i) for i in range(10)]
+
+        def slow_first(d):
+            # earlier dates finish last
+            sleep(0.01 * (10 - d.day))
+            return d.day
+
+        self.assertEqual(bc.map_concurrent(slow_first, dates), list(range(1, 11)))
+
+    def test_map_concurrent_raises(self):
+        bc = BaseClient()
+
+        def fail(x):
+            raise ValueError(x)
+
+        self.assertRaises(ValueError, bc.map_concurrent, fail, [1, 2])
+
+    def test_pluggable_executor(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        bc = BaseClient(executor=executor)
+        self.assertIs(bc.get_executor(), executor)
+        self.assertEqual(bc.map_concurrent(lambda x: 2 * x, [1, 2, 3]), [2, 4, 6])
+
+    def test_cache_ttl_default(self):
+        bc = BaseClient()
+        self.assertEqual(bc.cache_ttl('http://example.com/current.json'), bc.CACHE_TTL_SECONDS)
+
+    def test_cache_ttl_rules(self):
+        c = NYISOClient()
+        today = datetime.utcnow().strftime('%Y%m%d')
+        self.assertIsNone(c.cache_ttl('http://mis.nyiso.com/public/csv/pal/20160401pal.csv'))
+        self.assertIsNone(c.cache_ttl('http://mis.nyiso.com/public/csv/pal/20160401pal_csv.zip'))
+        self.assertEqual(c.cache_ttl('http://mis.nyiso.com/public/csv/pal/%spal.csv' % today),
+                         c.CACHE_TTL_SECONDS)
+
+        c = BPAClient()
+        this_year = datetime.utcnow().year
+        self.assertIsNone(c.cache_ttl(c.base_url + 'wind/WindGenTotalLoadYTD_2014.xls'))
+        self.assertEqual(c.cache_ttl(c.base_url + 'wind/WindGenTotalLoadYTD_%d.xls' % this_year),
+                         c.CACHE_TTL_SECONDS)
+
+        c = CAISOClient()
+        self.assertIsNone(c.cache_ttl(c.base_url_oasis + '?enddatetime=20160102T08%3A00-0000&queryname=SLD_FCST'))
+
+    def test_request_uses_cache(self):
+        path = tempfile.mkdtemp()
+        try:
+            bc = BaseClient(cache=path)
+            response = requests.Response()
+            response.status_code = 200
+            response._content = b'data'
+
+            bc.session = mock.MagicMock()
+            bc.session.get.return_value = response
+            first = bc.request('http://example.com/data', params={'a': 1})
+            second = bc.request('http://example.com/data', params={'a': 1})
+            other = bc.request('http://example.com/data', params={'a': 2})
+
+            self.assertEqual(bc.session.get.call_count, 2)
+            self.assertEqual(first.content, b'data')
+            self.assertEqual(second.content, b'data')
+            self.assertTrue(second.from_cache)
+            self.assertFalse(getattr(other, 'from_cache', False))
+        finally:
+            shutil.rmtree(path)
+
+    def test_request_no_cache_by_default(self):
+        with mock.patch.dict('os.environ', {}, clear=True):
+            bc = BaseClient()
+        self.assertIsNone(bc.cache)
+
+    def _utcify_index_rowwise(self, bc, local_index, tz_col):
+        # reference implementation: localize one row at a time
+        utc_list = []
+        for ts, label in zip(local_index, tz_col):
+            try:
+                tz = pytz.timezone(label)
+            except (pytz.UnknownTimeZoneError, AttributeError):
+                tz = pytz.timezone(bc.TZ_NAME)
+            utc_list.append(tz.localize(ts.to_pydatetime()).astimezone(pytz.utc))
+        return pd.DatetimeIndex(utc_list)
+
+    def test_utcify_index_tz_col_dst(self):
+        bc = BaseClient()
+        bc.TZ_NAME = 'America/New_York'
+
+        # spring forward and fall back, with a nonexistent and an ambiguous hour
+        spring = pd.date_range('2016-03-13 00:00', '2016-03-13 04:00', freq='30min')
+        fall = pd.date_range('2016-11-06 00:00', '2016-11-06 03:00', freq='30min')
+        local_index = spring.append(fall)
+        labels = ['EST', 'EDT', 'America/Chicago', None] * len(local_index)
+        tz_col = pd.Series(labels[:len(local_index)], index=local_index)
+
+        expected = self._utcify_index_rowwise(bc, local_index, tz_col)
+        utc_index = bc.utcify_index(local_index, tz_col=tz_col)
+        self.assertEqual(list(utc_index), list(expected))
+        self.assertEqual(str(utc_index.tz), 'UTC')
+
+    @benchmark
+    def test_utcify_index_tz_col_benchmark(self):
+        bc = BaseClient()
+        bc.TZ_NAME = 'America/New_York'
+        local_index = pd.date_range('2016-01-01', periods=100000, freq='5min')
+        tz_col = pd.Series(['EST' if ts.month < 3 or ts.month > 10 else 'EDT' for ts in local_index],
+                           index=local_index)
+
+        start = datetime.now()
+        expected = self._utcify_index_rowwise(bc, local_index, tz_col)
+        rowwise_time = datetime.now() - start
+
+        start = datetime.now()
+        utc_index = bc.utcify_index(local_index, tz_col=tz_col)
+        vectorized_time = datetime.now() - start
+
+        self.assertTrue((utc_index == expected).all())
+        self.assertLess(vectorized_time * 10, rowwise_time)
+
+    def test_utcify_parses_formats(self):
+        bc = BaseClient()
+        bc.TZ_NAME = 'America/New_York'
+        expected = datetime(2016, 4, 25, 4, tzinfo=pytz.utc)
+        for ts_str in ['2016-04-25T04:00:00-00:00', '20160425T04Z', '2016-04-25 00:00',
+                       '04/25/2016 00:00', '04.25.2016 00:00', 'Apr 25, 2016 00:00:00',
+                       '25-Apr-2016 00:00']:
+            self.assertEqual(bc.utcify(ts_str), expected)
+
+        # already parsed
+        self.assertEqual(bc.utcify(datetime(2016, 4, 25)), expected)
+
+    # one sample per ISO timestamp format
+    timestamp_samples = {
+        'CAISO OASIS': '2016-04-25T04:00:00-00:00',
+        'EIA': '20160425T04Z',
+        'MISO': '2016-04-25 12:00',
+        'PJM': '04.25.2016 17:15',
+        'ERCOT': 'Apr 25, 2016 12:45:14',
+    }
+
+    def test_timestamp_parser_matches_dateutil(self):
+        parser = TimestampParser()
+        for name, ts_str in self.timestamp_samples.items():
+            # parse twice, so the cached format is used too
+            self.assertEqual(parser.parse(ts_str), dateutil_parse(ts_str), name)
+            self.assertEqual(parser.parse(ts_str), dateutil_parse(ts_str), name)
+
+        # other offsets and iso variants
+        for ts_str in ['2016-04-25T04:00:00+05:30', '2016-04-25T04:00:00Z', '2016-04-25T04:00:00',
+                       '2016-04-25 04:00:00', '20160425T04-0500', '2016-04-25']:
+            parsed = parser.parse(ts_str)
+            self.assertEqual(parsed, dateutil_parse(ts_str), ts_str)
+            self.assertEqual(parsed.utcoffset(), dateutil_parse(ts_str).utcoffset(), ts_str)
+
+    @benchmark
+    def test_timestamp_parser_benchmark(self):
+        for name, ts_str in self.timestamp_samples.items():
+            parser = TimestampParser()
+            ts_strs = [ts_str] * 2000
+
+            start = datetime.now()
+            expected = [dateutil_parse(s) for s in ts_strs]
+            dateutil_time = datetime.now() - start
+
+            start = datetime.now()
+            parsed = [parser.parse(s) for s in ts_strs]
+            parser_time = datetime.now() - start
+
+            self.assertEqual(parsed, expected, name)
+            self.assertLess(parser_time * 3, dateutil_time, name)
+
+    def test_dst_table_matches_localize(self):
+        for tz_name in ['America/Los_Angeles', 'America/New_York', 'America/Phoenix', 'Etc/GMT+5', 'UTC']:
+            tz = pytz.timezone(tz_name)
+            table = get_dst_table(tz_name)
+            for day in [date(2016, 3, 13), date(2016, 11, 6), date(2017, 3, 12), date(2017, 11, 5)]:
+                for minutes in range(0, 48*60, 15):
+                    local_ts = datetime.combine(day, datetime.min.time()) + timedelta(minutes=minutes)
+                    self.assertEqual(table.to_utc(local_ts), tz.localize(local_ts).astimezone(pytz.utc),
+                                     '%s %s' % (tz_name, local_ts))
+
+    def test_local_to_utc(self):
+        bc = BaseClient()
+        bc.TZ_NAME = 'America/Los_Angeles'
+        self.assertEqual(bc.tz, pytz.timezone('America/Los_Angeles'))
+
+        # ambiguous hour is standard time, same as utcify
+        local_ts = datetime(2016, 11, 6, 1)
+        self.assertEqual(bc.local_to_utc(local_ts), datetime(2016, 11, 6, 9, tzinfo=pytz.utc))
+        self.assertEqual(bc.local_to_utc(local_ts), bc.utcify(local_ts))
+        self.assertEqual(bc.utcify(local_ts, is_dst=True), datetime(2016, 11, 6, 8, tzinfo=pytz.utc))
+
+    def test_handle_options_bad_return_type(self):
+        bc = BaseClient()
+        self.assertRaises(ValueError, bc.handle_options, return_type='dict')
+
+    def _gen_df(self):
+        index = pd.date_range('2016-01-01', periods=4, freq='h', tz='UTC', name='timestamp')
+        return pd.DataFrame({'fuel_name': ['wind', 'solar', 'wind', 'solar'], 'gen_MW': [1.0, 2.0, 3.0, 4.0]},
+                            index=index)
+
+    def test_serialize_faster_frame(self):
+        bc = BaseClient()
+        bc.handle_options(return_type='frame')
+        extras = {'ba_name': 'TEST', 'market': bc.MARKET_CHOICES.hourly, 'freq': bc.FREQUENCY_CHOICES.hourly}
+        df = bc.serialize_faster(self._gen_df(), extras=extras)
+
+        self.assertIsInstance(df, pd.DataFrame)
+        self.assertEqual(df.index.name, 'timestamp')
+        self.assertEqual(str(df.index.tz), 'UTC')
+        for col in ['ba_name', 'market', 'freq', 'fuel_name']:
+            self.assertEqual(df[col].dtype.name, 'category')
+        self.assertEqual(list(df['ba_name']), ['TEST'] * 4)
+        self.assertEqual(list(df['gen_MW']), [1.0, 2.0, 3.0, 4.0])
+
+        # same data as the list of dicts
+        bc.handle_options(return_type='list')
+        data = bc.serialize_faster(self._gen_df(), extras=extras)
+        self.assertEqual(data[0]['timestamp'], df.index[0])
+        self.assertEqual(data[0]['fuel_name'], df['fuel_name'].iloc[0])
+
+    def test_serialize_frame(self):
+        bc = BaseClient()
+        bc.handle_options(return_type='frame')
+        df = self._gen_df()
+        df.index.name = None
+        serialized = bc.serialize(df, header=['timestamp', 'fuel_name', 'gen_MW'], extras={'ba_name': 'TEST'})
+        self.assertEqual(list(serialized.columns), ['fuel_name', 'gen_MW', 'ba_name'])
+        self.assertEqual(serialized.index.name, 'timestamp')
+
+    def test_serialize_records_frame(self):
+        bc = BaseClient()
+        bc.handle_options(return_type='frame')
+        data = [{'timestamp': datetime(2016, 1, 1, tzinfo=pytz.utc), 'load_MW': 1.0, 'ba_name': 'TEST'}]
+        df = bc.serialize_records(data)
+        self.assertEqual(list(df.columns), ['load_MW', 'ba_name'])
+        self.assertEqual(df.index[0], data[0]['timestamp'])
+
+        # empty
+        self.assertEqual(len(bc.serialize_records([])), 0)
+
+        # list is unchanged
+        bc.handle_options()
+        self.assertIs(bc.serialize_records(data), data)
+
+    def test_serialize_arrow(self):
+        try:
+            import pyarrow
+        except ImportError:
+            self.skipTest('pyarrow not installed')
+        bc = BaseClient()
+        bc.handle_options(return_type='arrow')
+        table = bc.serialize_faster(self._gen_df(), extras={'ba_name': 'TEST'})
+        self.assertIsInstance(table, pyarrow.Table)
+        self.assertEqual(table.num_rows, 4)
+        self.assertIn('timestamp', table.column_names)
+
+    def test_iter_load_days(self):
+        bc = BaseClient()
+        bc.TZ_NAME = 'America/New_York'
+        with mock.patch.object(bc, 'get_load', side_effect=lambda **kwargs: [kwargs]) as get_load:
+            chunks = list(bc.iter_load(start_at=datetime(2016, 11, 5, 12), end_at=datetime(2016, 11, 7),
+                                       market='RT5M'))
+
+        # one chunk per local day, end_at inclusive, across the DST transition
+        self.assertEqual(get_load.call_count, 2)
+        self.assertEqual([c[0]['start_at'] for c in chunks],
+                         [datetime(2016, 11, 5, 16, tzinfo=pytz.utc), datetime(2016, 11, 6, 4, tzinfo=pytz.utc)])
+        self.assertEqual([c[0]['end_at'] for c in chunks],
+                         [datetime(2016, 11, 6, 4, tzinfo=pytz.utc) - timedelta(microseconds=1),
+                          datetime(2016, 11, 7, 5, tzinfo=pytz.utc)])
+        self.assertEqual(chunks[0][0]['market'], 'RT5M')
+
+    def test_iter_lmp_months(self):
+        bc = BaseClient()
+        bc.ITER_PERIOD = 'month'
+        with mock.patch.object(bc, 'get_lmp', side_effect=lambda **kwargs: [kwargs]):
+            chunks = list(bc.iter_lmp(start_at=datetime(2016, 1, 15), end_at=datetime(2016, 3, 2)))
+        self.assertEqual([c[0]['start_at'].month for c in chunks], [1, 2, 3])
+        self.assertEqual(chunks[1][0]['start_at'], datetime(2016, 2, 1, tzinfo=pytz.utc))
+
+    def test_iter_generation_latest(self):
+        bc = BaseClient()
+        with mock.patch.object(bc, 'get_generation', return_value=[{'gen_MW': 1}]) as get_generation:
+            chunks = list(bc.iter_generation(latest=True))
+        get_generation.assert_called_once_with(latest=True)
+        self.assertEqual(chunks, [[{'gen_MW': 1}]])
+
+        # empty results are skipped
+        with mock.patch.object(bc, 'get_generation', return_value=[]):
+            self.assertEqual(list(bc.iter_generation(latest=True)), [])
+
+    def test_serialize_faster_records(self):
+        bc = BaseClient()
+        extras = {'ba_name': 'TEST', 'market': bc.MARKET_CHOICES.hourly, 'freq': bc.FREQUENCY_CHOICES.hourly}
+        bc.handle_options()
+        expected = bc.serialize_faster(self._gen_df(), extras=extras)
+
+        bc.handle_options(return_type='records')
+        data = bc.serialize_faster(self._gen_df(), extras=extras)
+        self.assertIsInstance(data[0], GenPoint)
+        self.assertEqual(data, expected)
+        self.assertEqual(data[0]['gen_MW'], 1.0)
+        self.assertEqual(data[0].get('lmp', 'missing'), 'missing')
+        self.assertEqual(set(data[0].keys()), set(expected[0].keys()))
+        self.assertFalse(hasattr(data[0], '__dict__'))
+
+        # strings are shared between records
+        self.assertIs(data[0]['fuel_name'], data[2]['fuel_name'])
+
+    def test_serialize_records_records(self):
+        bc = BaseClient()
+        bc.handle_options(return_type='records')
+        data = [{'timestamp': datetime(2016, 1, 1, tzinfo=pytz.utc), 'load_MW': 1.0, 'ba_name': 'TEST'},
+                {'timestamp': datetime(2016, 1, 1, tzinfo=pytz.utc), 'lmp': 1.0, 'node_id': 'A', 'extra': 2}]
+        records = bc.serialize_records(data)
+        self.assertIsInstance(records[0], LoadPoint)
+        self.assertIsInstance(records[1], LmpPoint)
+        self.assertEqual(records, data)
+        self.assertEqual(records[1]['extra'], 2)
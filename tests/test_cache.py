@@ -0,0 +1,118 @@
+from pyiso.cache import ResponseCache
+from unittest import TestCase
+import json
+import os
+import pandas as pd
+import requests
+import shutil
+import sqlite3
+import tempfile
+
+
+class TestResponseCache(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def make_response(self, content=b'a,b\n1,2\n', status_code=200):
+        response = requests.Response()
+        response.status_code = status_code
+        response.url = 'http://example.com/data.csv'
+        response.headers['Content-Type'] = 'text/csv'
+        response.encoding = 'utf-8'
+        response._content = content
+        return response
+
+    def test_key_includes_params_and_body(self):
+        key1, url1 = self.cache.make_key('get', 'http://example.com/a', params={'x': 1, 'y': 2})
+        key2, url2 = self.cache.make_key('get', 'http://example.com/a', params={'y': 2, 'x': 1})
+        key3, _ = self.cache.make_key('get', 'http://example.com/a', params={'x': 2, 'y': 2})
+        key4, _ = self.cache.make_key('post', 'http://example.com/a', json={'x': 1})
+        key5, _ = self.cache.make_key('post', 'http://example.com/a', json={'x': 2})
+        self.assertEqual(key1, key2)
+        self.assertEqual(url1, 'http://example.com/a?x=1&y=2')
+        self.assertEqual(len(set([key1, key3, key4, key5])), 4)
+
+    def test_roundtrip(self):
+        self.cache.set('k', self.make_response(), None)
+        response = self.cache.get('k')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, 'a,b\n1,2\n')
+        self.assertEqual(response.headers['content-type'], 'text/csv')
+        self.assertTrue(response.from_cache)
+        self.assertTrue(response)
+
+    def test_stored_as_columns(self):
+        self.cache.set('k', self.make_response(), None)
+        conn = sqlite3.connect(os.path.join(self.path, ResponseCache.FILENAME))
+        row = conn.execute('SELECT status_code, headers, content FROM cached_responses WHERE key = ?',
+                           ('k',)).fetchone()
+        conn.close()
+
+        # body as a raw blob, headers as json
+        self.assertEqual(row[0], 200)
+        self.assertEqual(json.loads(row[1]), {'Content-Type': 'text/csv'})
+        self.assertEqual(bytes(row[2]), b'a,b\n1,2\n')
+
+    def test_drops_pickled_responses(self):
+        # table written by earlier versions, with pickled responses
+        conn = sqlite3.connect(os.path.join(self.path, ResponseCache.FILENAME))
+        with conn:
+            conn.execute('CREATE TABLE responses (key TEXT PRIMARY KEY, size INTEGER, expires REAL, '
+                         'last_used REAL, response BLOB)')
+        conn.close()
+
+        cache = ResponseCache(self.path)
+        self.assertIsNone(cache.get('k'))
+        conn = sqlite3.connect(os.path.join(self.path, ResponseCache.FILENAME))
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        conn.close()
+        self.assertEqual(tables, ['cached_responses'])
+
+    def test_persistent(self):
+        self.cache.set('k', self.make_response(), None)
+        other = ResponseCache(self.path)
+        self.assertEqual(other.get('k').content, b'a,b\n1,2\n')
+
+    def test_missing(self):
+        self.assertIsNone(self.cache.get('nope'))
+
+    def test_expired(self):
+        self.cache.set('k', self.make_response(), -1)
+        self.assertIsNone(self.cache.get('k'))
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(self.path, max_size_mb=0.01)  # about 10kB
+        content = b'x' * 4000
+        cache.set('a', self.make_response(content), None)
+        cache.set('b', self.make_response(content), None)
+
+        # use a, so b is least recently used
+        self.assertIsNotNone(cache.get('a'))
+        cache.set('c', self.make_response(content), None)
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_clear(self):
+        self.cache.set('k', self.make_response(), None)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('k'))
+
+    def test_frame_roundtrip(self):
+        df = pd.DataFrame({'wind': [1.5, 2.5], 'source': ['a', 'b']},
+                          index=pd.DatetimeIndex(['2016-01-01 00:00', '2016-01-01 01:00'], tz='UTC', name='timestamp'))
+        df.columns.name = 'fuel_name'
+        self.assertIsNone(self.cache.get_frame('day'))
+        self.cache.set_frame('day', df)
+        pd.testing.assert_frame_equal(ResponseCache(self.path).get_frame('day'), df, check_index_type=False)
+
+        # another version is stored separately
+        self.assertIsNone(self.cache.get_frame('day', version=2))
+
+        self.cache.clear()
+        self.assertIsNone(self.cache.get_frame('day'))
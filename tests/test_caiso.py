@@ -1,7 +1,9 @@
 import os
-from pyiso import client_factory
+from pyiso import client_factory, nodes
+from pyiso.caiso import OasisRecord
+from tests import benchmark
 from unittest import TestCase, expectedFailure, skip
-from io import StringIO
+from io import BytesIO, StringIO
 import pandas as pd
 import pytz
 from datetime import date, datetime, timedelta
@@ -9,6 +11,10 @@ from bs4 import BeautifulSoup
 import numpy
 import mock
 import requests
+import shutil
+import tempfile
+import zipfile
+from time import sleep
 
 fixtures_base_path = os.path.join(os.path.dirname(__file__), 'fixtures')
 def read_fixture(filename):
@@ -360,6 +366,84 @@ class TestCAISOBase(TestCase):
         self.assertEqual(list(bot_df.columns), ['Hour', 'RENEWABLES', 'NUCLEAR', 'THERMAL', 'IMPORTS', 'HYDRO'])
         self.assertEqual(len(bot_df), 24)
 
+    def test_parse_daily_renewables(self):
+        c = client_factory('CAISO')
+        text = self.ren_report_tsv.getvalue()
+        df = c.parse_daily_renewables(text, date(2014, 3, 12))
+
+        self.assertEqual(len(df), 24)
+        self.assertEqual(df.index[0], pd.Timestamp('2014-03-12 07:00', tz='UTC'))
+        self.assertEqual(sorted(df.columns), sorted(['geo', 'biomass', 'biogas', 'smhydro', 'wind', 'solarpv',
+                                                     'solarth', 'nuclear', 'thermal', 'hydro']))
+        self.assertEqual(df['wind'].iloc[0], 1596)
+        self.assertEqual(df['hydro'].iloc[-1], c._parse_daily_renewables_pandas(text, date(2014, 3, 12))['hydro'].iloc[-1])
+
+    def test_generation_historical_cache(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        c = client_factory('CAISO', cache=path)
+        response = mock.Mock(text=self.ren_report_tsv.getvalue())
+
+        # first query fetches and parses
+        with mock.patch.object(c, 'request_many', side_effect=lambda urls: [response] * len(urls)) as request_many:
+            data = c.get_generation(start_at=datetime(2014, 3, 12, 8, tzinfo=pytz.utc),
+                                    end_at=datetime(2014, 3, 14, 8, tzinfo=pytz.utc),
+                                    market=c.MARKET_CHOICES.hourly)
+        self.assertEqual(len(request_many.call_args[0][0]), 3)
+
+        # repeated query is read from the cache
+        with mock.patch.object(c, 'request_many', side_effect=lambda urls: [response] * len(urls)) as request_many:
+            cached = c.get_generation(start_at=datetime(2014, 3, 12, 8, tzinfo=pytz.utc),
+                                      end_at=datetime(2014, 3, 14, 8, tzinfo=pytz.utc),
+                                      market=c.MARKET_CHOICES.hourly)
+        self.assertEqual(request_many.call_args[0][0], [])
+        self.assertEqual(cached, data)
+
+        # every fuel, hourly between start and end
+        self.assertEqual(len(data), 10 * 49)
+        self.assertEqual(data[0]['timestamp'], datetime(2014, 3, 12, 8, tzinfo=pytz.utc))
+        self.assertEqual(set(data[0].keys()), set(['timestamp', 'fuel_name', 'gen_MW', 'ba_name', 'market', 'freq']))
+
+    def test_join_generation(self):
+        c = client_factory('CAISO')
+        t1 = datetime(2013, 9, 19, 7, tzinfo=pytz.utc)
+        t2 = datetime(2013, 9, 19, 8, tzinfo=pytz.utc)
+        t3 = datetime(2013, 9, 19, 9, tzinfo=pytz.utc)
+        ren_dps = [{'timestamp': t1, 'fuel_name': 'wind', 'gen_MW': 500.0},
+                   {'timestamp': t1, 'fuel_name': 'solar', 'gen_MW': 10.0},
+                   {'timestamp': t2, 'fuel_name': 'wind', 'gen_MW': 400.0},
+                   {'timestamp': t2, 'fuel_name': 'solar', 'gen_MW': 0.0}]
+        gen_dps = [{'timestamp': t1, 'fuel_name': 'other', 'gen_MW': 20000.0},
+                   {'timestamp': t3, 'fuel_name': 'other', 'gen_MW': 21000.0}]
+
+        # only the time in both
+        df = c.join_generation(ren_dps, gen_dps)
+        self.assertEqual(list(df.index), [t1, t1, t1])
+        self.assertEqual(list(df['fuel_name']), ['wind', 'solar', 'other'])
+        self.assertEqual(list(df['gen_MW']), [500.0, 10.0, 19490.0])
+
+        # nothing to join
+        self.assertTrue(c.join_generation(ren_dps, []).empty)
+
+    def test_generation_forecast(self):
+        c = client_factory('CAISO')
+        ts = datetime(2013, 9, 19, 7, tzinfo=pytz.utc)
+        records = {
+            'ENE_SLRS': [OasisRecord(ts, 'ISO_TOT_GEN_MW', 'Caiso_Totals', 20000.0)],
+            'SLD_REN_FCST': [OasisRecord(ts, 'RENEW_FCST_DA_MW', 'Solar', 10.0),
+                             OasisRecord(ts, 'RENEW_FCST_DA_MW', 'Wind', 500.0)],
+        }
+        with mock.patch.object(c, 'fetch_oasis_records', side_effect=lambda payload: records[payload['queryname']]):
+            data = c.get_generation(forecast=True, start_at=ts, end_at=ts + timedelta(hours=1))
+
+        self.assertEqual(sorted((dp['fuel_name'], dp['gen_MW']) for dp in data),
+                         [('other', 19490.0), ('solar', 10.0), ('wind', 500.0)])
+        for dp in data:
+            self.assertEqual(dp['timestamp'], ts)
+            self.assertEqual(dp['market'], c.MARKET_CHOICES.dam)
+            self.assertEqual(dp['freq'], c.FREQUENCY_CHOICES.hourly)
+            self.assertEqual(dp['ba_name'], 'CAISO')
+
     def test_dt_index(self):
         c = client_factory('CAISO')
         df = c.parse_to_df(self.ren_report_tsv,
@@ -398,6 +482,91 @@ class TestCAISOBase(TestCase):
                     }
         self.assertEqual(constructed, expected)
 
+    def test_oasis_payloads_windows(self):
+        c = client_factory('CAISO')
+        c.handle_options(start_at='2014-01-01', end_at='2014-03-15',
+                         market=c.MARKET_CHOICES.fivemin, data='load')
+        payloads = c.construct_oasis_payloads('SLD_FCST')
+
+        # consecutive windows of at most 31 days
+        fmt = c.oasis_request_time_format
+        self.assertEqual([(p['startdatetime'], p['enddatetime']) for p in payloads],
+                         [(datetime(2014, 1, 1, 8).strftime(fmt), datetime(2014, 2, 1, 8).strftime(fmt)),
+                          (datetime(2014, 2, 1, 8).strftime(fmt), datetime(2014, 3, 4, 8).strftime(fmt)),
+                          (datetime(2014, 3, 4, 8).strftime(fmt), datetime(2014, 3, 15, 7).strftime(fmt))])
+        for payload in payloads:
+            self.assertEqual(payload['queryname'], 'SLD_FCST')
+            self.assertEqual(payload['market_run_id'], 'RTM')
+
+        # short range is one window
+        c.handle_options(start_at='2014-01-01', end_at='2014-02-01',
+                         market=c.MARKET_CHOICES.fivemin, data='load')
+        self.assertEqual(c.construct_oasis_payloads('SLD_FCST'), [c.construct_oasis_payload('SLD_FCST')])
+
+    def test_get_load_stitches_windows(self):
+        c = client_factory('CAISO')
+        records = c.oasis_records(BeautifulSoup(self.sld_fcst_xml, 'xml').find_all('REPORT_DATA'))
+
+        # every window returns the same records, which should only be kept once
+        with mock.patch.object(c, 'fetch_oasis_records', return_value=records) as fetch:
+            data = c.get_load(start_at='2014-05-01', end_at='2014-07-01',
+                              market=c.MARKET_CHOICES.fivemin)
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(len(data), len(set(dp['timestamp'] for dp in data)))
+        self.assertEqual(data, c.parse_oasis_demand_forecast(records))
+
+    def test_fetch_oasis_records_shared(self):
+        c = client_factory('CAISO')
+        c.handle_options(data='trade', latest=True)
+        payload = c.construct_oasis_payload('ENE_SLRS', test='shared')
+        records = c.oasis_records(BeautifulSoup(self.ene_slrs_xml, 'xml').find_all('REPORT_DATA'))
+
+        def slow_fetch(payload):
+            sleep(0.1)
+            return records
+
+        # concurrent calls share one fetch
+        with mock.patch.object(type(c), '_fetch_oasis_records', side_effect=slow_fetch) as fetch:
+            shared = c.map_concurrent(lambda client: client.fetch_oasis_records(dict(payload)),
+                                      [c, client_factory('CAISO'), client_factory('CAISO')])
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(shared, [records] * 3)
+
+        # nothing is kept once the fetch has finished
+        with mock.patch.object(type(c), '_fetch_oasis_records', return_value=records) as fetch:
+            c.fetch_oasis_records(dict(payload))
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_trade_and_generation_share_slrs_fetch(self):
+        trade_client = client_factory('CAISO')
+        gen_client = type(trade_client)()
+        records = trade_client.oasis_records(BeautifulSoup(self.ene_slrs_xml, 'xml').find_all('REPORT_DATA'))
+
+        def slow_fetch(payload):
+            sleep(0.1)
+            return records
+
+        # pin the clock so both latest windows are the same
+        class FrozenDatetime(datetime):
+            @classmethod
+            def utcnow(cls):
+                return datetime(2013, 9, 19, 15, 2)
+
+        outlook = BeautifulSoup(self.todays_outlook_renewables, 'lxml')
+        conditions = mock.Mock(content=self.systemconditions_html)
+        with mock.patch.object(type(trade_client), '_fetch_oasis_records', side_effect=slow_fetch) as fetch, \
+                mock.patch.dict(trade_client.construct_oasis_payload.__globals__, datetime=FrozenDatetime), \
+                mock.patch.object(gen_client, 'fetch_todays_outlook_renewables', return_value=outlook), \
+                mock.patch.object(gen_client, 'coalesced_request', return_value=conditions):
+            trade, gen = trade_client.map_concurrent(lambda get: get(latest=True),
+                                                     [trade_client.get_trade, gen_client.get_generation])
+
+        # one OASIS fetch serves both, each keeping its own data items
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(len(trade), 1)
+        self.assertEqual(trade[0]['timestamp'], datetime(2013, 9, 19, 15, tzinfo=pytz.utc))
+        self.assertIn('net_exp_MW', trade[0])
+
     def test_fetch_oasis_demand_rtm(self):
         c = client_factory('CAISO')
         ts = c.utcify('2014-05-08 12:00')
@@ -649,6 +818,271 @@ class TestCAISOBase(TestCase):
         df = c.get_lmp_as_dataframe('badnode')
         self.assertTrue(df.empty)
 
+    def test_lmp_node_queries(self):
+        c = client_factory('CAISO')
+        nodes = ['NODE_%d' % i for i in range(25)]
+
+        # batches of 10
+        self.assertEqual(c.lmp_node_queries(nodes[:5]), [','.join(nodes[:5])])
+        self.assertEqual(c.lmp_node_queries(nodes),
+                         [','.join(nodes[:10]), ','.join(nodes[10:20]), ','.join(nodes[20:])])
+        self.assertEqual(c.lmp_node_queries(nodes[:3] + nodes[:3]), [','.join(nodes[:3])])
+
+        # ALL only when thousands of nodes are requested
+        self.assertEqual(len(c.lmp_node_queries(['NODE_%d' % i for i in range(500)])), 50)
+        self.assertEqual(c.lmp_node_queries(['NODE_%d' % i for i in range(3000)]), ['ALL'])
+
+    def test_get_lmp_dataframe_batches(self):
+        c = client_factory('CAISO')
+        nodes = ['NODE_%d' % i for i in range(25)]
+        ts = pytz.utc.localize(datetime(2015, 3, 1, 12))
+        with mock.patch.object(c, 'fetch_oasis_csv', return_value=[]) as fetch:
+            df = c.get_lmp_as_dataframe(nodes, latest=False, start_at=ts - timedelta(hours=1), end_at=ts)
+        self.assertTrue(df.empty)
+        self.assertEqual(sorted(call[0][0]['node'] for call in fetch.call_args_list),
+                         sorted(c.lmp_node_queries(nodes)))
+
+    def test_get_lmp_dataframe_all_components(self):
+        c = client_factory('CAISO')
+        header = 'INTERVALSTARTTIME_GMT,INTERVALENDTIME_GMT,NODE,MARKET_RUN_ID,LMP_TYPE,MW\n'
+        response = self._oasis_zip([
+            ('LMP.csv', header + '2015-03-01T11:00:00-00:00,2015-03-01T12:00:00-00:00,NODE_A,DAM,LMP,31.5\n'),
+            ('MCC.csv', header + '2015-03-01T11:00:00-00:00,2015-03-01T12:00:00-00:00,NODE_A,DAM,MCC,0.5\n'),
+        ])
+        ts = pytz.utc.localize(datetime(2015, 3, 1, 12))
+
+        with mock.patch.object(c, 'request', return_value=response):
+            df = c.get_lmp_as_dataframe('NODE_A', latest=False, start_at=ts - timedelta(hours=1), end_at=ts,
+                                        lmp_only=False)
+            lmp_df = c.get_lmp_as_dataframe('NODE_A', latest=False, start_at=ts - timedelta(hours=1), end_at=ts)
+
+        # every price component with lmp_only=False, only LMP otherwise
+        self.assertEqual(list(df['LMP_TYPE']), ['LMP', 'MCC'])
+        self.assertEqual(list(df['MW']), [31.5, 0.5])
+        self.assertEqual(list(lmp_df['LMP_TYPE']), ['LMP'])
+
+    def _oasis_zip(self, files):
+        content = BytesIO()
+        with zipfile.ZipFile(content, 'w') as z:
+            for name, data in files:
+                z.writestr(name, data)
+        return mock.Mock(content=content.getvalue())
+
+    def _oasis_error(self, code):
+        return self._oasis_zip([
+            ('INVALID_REQUEST.xml', '<?xml version="1.0" encoding="UTF-8"?>\n'
+             '<m:OASISReport xmlns:m="http://www.caiso.com/soa/OASISReport_v1.xsd"><m:ERROR>'
+             '<m:ERR_CODE>%s</m:ERR_CODE><m:ERR_DESC>error</m:ERR_DESC></m:ERROR></m:OASISReport>' % code),
+        ])
+
+    def test_fetch_oasis_xml(self):
+        c = client_factory('CAISO')
+        content = self.ene_slrs_xml.getvalue()
+        with mock.patch.object(c, 'request_oasis', return_value=self._oasis_zip([('ENE_SLRS.xml', content)])):
+            data = c.fetch_oasis({'queryname': 'ENE_SLRS'})
+        records = c.oasis_records(data)
+        self.assertEqual(len(records), 6)
+        self.assertEqual(records[0], OasisRecord(datetime(2013, 9, 19, 15, tzinfo=pytz.utc),
+                                                 'ISO_TOT_EXP_MW', 'Caiso_Totals', 704.0))
+
+        # error report
+        with mock.patch.object(c, 'request_oasis', return_value=self._oasis_error(1000)):
+            self.assertEqual(c.fetch_oasis({'queryname': 'ENE_SLRS'}), '')
+            self.assertEqual(c.fetch_oasis({'queryname': 'ENE_SLRS'}, return_all_files=True), [])
+
+    def test_oasis_error_code(self):
+        c = client_factory('CAISO')
+        self.assertEqual(c.oasis_error_code(self._oasis_error(1015).content), '1015')
+        self.assertIsNone(c.oasis_error_code(self._oasis_zip([('LMP.csv', 'A,B\n1,2\n')]).content))
+        self.assertIsNone(c.oasis_error_code(b'not a zip'))
+
+    def test_request_oasis_retries_throttled(self):
+        c = client_factory('CAISO')
+        c.OASIS_RETRY_SECONDS = 0.01
+        good = self._oasis_zip([('LMP.csv', 'A,B\n1,2\n')])
+        responses = [self._oasis_error(1015), self._oasis_error(1015), good]
+
+        with mock.patch.object(c, 'request', side_effect=responses) as mock_request, \
+                mock.patch.object(c, 'pause_host') as mock_pause:
+            self.assertIs(c.request_oasis({'queryname': 'ENE_SLRS'}), good)
+
+        self.assertEqual(mock_request.call_count, 3)
+        # backoff doubles
+        self.assertEqual([call[0][1] for call in mock_pause.call_args_list], [0.01, 0.02])
+
+    def test_request_oasis_error_not_cached(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        c = client_factory('CAISO', cache=path)
+        c.MIN_REQUEST_INTERVALS = {}
+        payload = {'queryname': 'ENE_SLRS', 'startdatetime': '20160101T08:00-0000', 'enddatetime': '20160102T08:00-0000'}
+        responses = []
+        for content in [self._oasis_error(1000).content, self._oasis_zip([('LMP.csv', 'A,B\n1,2\n')]).content]:
+            response = requests.Response()
+            response.status_code = 200
+            response._content = content
+            responses.append(response)
+
+        c.session = mock.MagicMock()
+        c.session.get.side_effect = responses
+        # the error report is requested again, the report is then served from the cache
+        self.assertEqual(c.oasis_error_code(c.request(c.base_url_oasis, params=payload).content), '1000')
+        self.assertIsNone(c.oasis_error_code(c.request(c.base_url_oasis, params=payload).content))
+        self.assertTrue(c.request(c.base_url_oasis, params=payload).from_cache)
+        self.assertEqual(c.session.get.call_count, 2)
+
+    def test_request_oasis_exhausts_retries(self):
+        c = client_factory('CAISO')
+        c.OASIS_RETRY_SECONDS = 0.001
+        c.OASIS_RETRIES = 2
+
+        with mock.patch.object(c, 'request', return_value=self._oasis_error(1015)) as mock_request:
+            self.assertIsNone(c.request_oasis({}))
+            self.assertEqual(c.fetch_oasis_csv({}), [])
+        self.assertEqual(mock_request.call_count, 6)
+
+    def test_request_oasis_other_errors_not_retried(self):
+        c = client_factory('CAISO')
+        response = self._oasis_error(1000)
+        with mock.patch.object(c, 'request', return_value=response) as mock_request:
+            self.assertIs(c.request_oasis({}), response)
+        self.assertEqual(mock_request.call_count, 1)
+
+    def test_fetch_oasis_records_many_overlap(self):
+        c = client_factory('CAISO')
+        t1 = datetime(2014, 5, 8, 7, tzinfo=pytz.utc)
+        t2 = datetime(2014, 5, 8, 8, tzinfo=pytz.utc)
+        # two rows that differ only in fields OasisRecord doesn't keep, eg market
+        first = [OasisRecord(t1, 'SYS_FCST_DA_MW', 'CA ISO-TAC', 100.0),
+                 OasisRecord(t1, 'SYS_FCST_DA_MW', 'CA ISO-TAC', 101.0),
+                 OasisRecord(t2, 'SYS_FCST_DA_MW', 'CA ISO-TAC', 200.0)]
+        # the next window repeats the hour where the windows meet
+        second = [OasisRecord(t2, 'SYS_FCST_DA_MW', 'CA ISO-TAC', 200.0),
+                  OasisRecord(t2, 'SYS_FCST_DA_MW', 'CA ISO-TAC', 201.0)]
+
+        windows = {'a': first, 'b': second}
+        with mock.patch.object(type(c), 'fetch_oasis_records', side_effect=lambda payload: windows[payload]):
+            records = c.fetch_oasis_records_many(['a', 'b'])
+
+        self.assertEqual(records, first + second[1:])
+
+    def test_fetch_oasis_csv_many_overlap(self):
+        c = client_factory('CAISO')
+        header = 'INTERVALSTARTTIME_GMT,NODE,MW\n'
+        # two rows that are the same except for a column that was not read
+        first = pd.read_csv(StringIO(header + '2016-01-01T08:00:00-00:00,NODE_A,31.5\n'
+                                              '2016-01-01T08:00:00-00:00,NODE_A,31.5\n'
+                                              '2016-01-01T09:00:00-00:00,NODE_A,32.5\n'), index_col=0)
+        # the next window repeats the hour where the windows meet
+        second = pd.read_csv(StringIO(header + '2016-01-01T09:00:00-00:00,NODE_A,32.5\n'
+                                               '2016-01-01T10:00:00-00:00,NODE_A,33.5\n'), index_col=0)
+
+        windows = {'a': [first], 'b': [second]}
+        with mock.patch.object(type(c), 'fetch_oasis_csv',
+                               side_effect=lambda payload, **kwargs: windows[payload]):
+            df = c.fetch_oasis_csv_many(['a', 'b'])
+
+        self.assertEqual(list(df['MW']), [31.5, 31.5, 32.5, 33.5])
+        self.assertEqual(list(df.index), ['2016-01-01T08:00:00-00:00', '2016-01-01T08:00:00-00:00',
+                                          '2016-01-01T09:00:00-00:00', '2016-01-01T10:00:00-00:00'])
+
+    def test_fetch_oasis_csv_frames(self):
+        c = client_factory('CAISO')
+        header = 'INTERVALSTARTTIME_GMT,INTERVALENDTIME_GMT,NODE,MARKET_RUN_ID,LMP_TYPE,MW\n'
+        response = self._oasis_zip([
+            ('LMP.csv', header + '2016-01-01T08:00:00-00:00,2016-01-01T09:00:00-00:00,NODE_A,DAM,LMP,31.5\n'),
+            ('MCC.csv', header + '2016-01-01T08:00:00-00:00,2016-01-01T09:00:00-00:00,NODE_A,DAM,MCC,0.5\n'),
+        ])
+
+        with mock.patch.object(c, 'request', return_value=response):
+            first = c.fetch_oasis_csv({}, usecols=lambda col: col in c.OASIS_LMP_COLUMNS)
+            frames = c.fetch_oasis_csv({}, return_all_files=True)
+
+        # one file, selected columns
+        self.assertEqual(len(first), 1)
+        self.assertEqual(list(first[0].columns), ['NODE', 'MARKET_RUN_ID', 'LMP_TYPE', 'MW'])
+        self.assertEqual(first[0].index[0], pd.Timestamp('2016-01-01 08:00', tz='UTC'))
+        self.assertEqual(first[0]['MW'].dtype, numpy.float64)
+
+        # all files
+        self.assertEqual([frame['LMP_TYPE'].iloc[0] for frame in frames], ['LMP', 'MCC'])
+
+    def _sld_fcst_reports(self, n_intervals):
+        # the same SLD_FCST data as an XML and a csv report
+        xml_rows = []
+        csv_rows = ['INTERVALSTARTTIME_GMT,INTERVALENDTIME_GMT,OPR_DT,OPR_HR,OPR_INTERVAL,MARKET_RUN_ID,'
+                    'TAC_AREA_NAME,LABEL,XML_DATA_ITEM,POS,MW,EXECUTION_TYPE,GROUP']
+        for i in range(n_intervals):
+            start = datetime(2014, 5, 8, 7) + timedelta(minutes=5*i)
+            start_str = start.strftime('%Y-%m-%dT%H:%M:%S-00:00')
+            end_str = (start + timedelta(minutes=5)).strftime('%Y-%m-%dT%H:%M:%S-00:00')
+            value = 26000 + i
+            xml_rows.append('<REPORT_DATA><DATA_ITEM>SYS_FCST_5MIN_MW</DATA_ITEM>'
+                            '<RESOURCE_NAME>CA ISO-TAC</RESOURCE_NAME><OPR_DATE>2014-05-08</OPR_DATE>'
+                            '<INTERVAL_NUM>%d</INTERVAL_NUM><INTERVAL_START_GMT>%s</INTERVAL_START_GMT>'
+                            '<INTERVAL_END_GMT>%s</INTERVAL_END_GMT><VALUE>%d</VALUE></REPORT_DATA>'
+                            % (i + 1, start_str, end_str, value))
+            csv_rows.append('%s,%s,2014-05-08,1,%d,RTM,CA ISO-TAC,Total Demand Forecast,SYS_FCST_5MIN_MW,1,%d,RTM,1'
+                            % (start_str, end_str, i + 1, value))
+        xml = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<OASISReport xmlns="http://www.caiso.com/soa/OASISReport_v1.xsd"><RTO><REPORT_ITEM>'
+               + ''.join(xml_rows) + '</REPORT_ITEM></RTO></OASISReport>')
+        return xml, '\n'.join(csv_rows) + '\n'
+
+    def test_fetch_oasis_records_csv(self):
+        c = client_factory('CAISO')
+        xml, csv = self._sld_fcst_reports(300)
+
+        with mock.patch.object(c, 'request', return_value=self._oasis_zip([('SLD_FCST.csv', csv)])) as request:
+            records = c._fetch_oasis_records({'queryname': 'SLD_FCST'})
+        self.assertEqual(request.call_args[1]['params']['resultformat'], 6)
+
+        # same records as the XML report
+        self.assertEqual(len(records), 300)
+        self.assertEqual(records, c.oasis_records(BeautifulSoup(xml, 'xml').find_all('REPORT_DATA')))
+
+    @benchmark
+    def test_fetch_oasis_records_csv_benchmark(self):
+        c = client_factory('CAISO')
+        xml, csv = self._sld_fcst_reports(3000)
+
+        start = datetime.now()
+        with mock.patch.object(c, 'request', return_value=self._oasis_zip([('SLD_FCST.csv', csv)])):
+            records = c._fetch_oasis_records({'queryname': 'SLD_FCST'})
+        csv_time = datetime.now() - start
+
+        start = datetime.now()
+        expected = c.oasis_records(BeautifulSoup(xml, 'xml').find_all('REPORT_DATA'))
+        soup_time = datetime.now() - start
+
+        self.assertEqual(records, expected)
+        self.assertLess(csv_time * 5, soup_time)
+
+    def test_fetch_oasis_csv_frames_error(self):
+        c = client_factory('CAISO')
+        response = self._oasis_zip([
+            ('INVALID_REQUEST.xml', '<?xml version="1.0" encoding="UTF-8"?>\n'
+             '<OASISReport><ERROR><ERR_CODE>1000</ERR_CODE>'
+             '<ERR_DESC>No data returned for the specified selection</ERR_DESC></ERROR></OASISReport>'),
+        ])
+        with mock.patch.object(c, 'request', return_value=response):
+            self.assertEqual(c.fetch_oasis_csv({}), [])
+
+    def test_fetch_oasis_csv_unexpected_xml(self):
+        c = client_factory('CAISO')
+        header = 'INTERVALSTARTTIME_GMT,INTERVALENDTIME_GMT,NODE,MARKET_RUN_ID,LMP_TYPE,MW\n'
+        response = self._oasis_zip([
+            ('NOTES.xml', '<?xml version="1.0" encoding="UTF-8"?>\n<OASISReport></OASISReport>'),
+            ('LMP.csv', header + '2016-01-01T08:00:00-00:00,2016-01-01T09:00:00-00:00,NODE_A,DAM,LMP,31.5\n'),
+        ])
+        with mock.patch.object(c, 'request', return_value=response), \
+                mock.patch('pyiso.LOGGER.warning') as mock_warning:
+            frames = c.fetch_oasis_csv({})
+
+        # logged and skipped
+        self.assertEqual(len(frames), 1)
+        self.assertIn('NOTES.xml', mock_warning.call_args[0][0])
+
     def test_get_AS_dataframe(self):
         c = client_factory('CAISO')
         ts = datetime(2015, 3, 1, 11, 0, 0, tzinfo=pytz.utc)
@@ -718,6 +1152,64 @@ class TestCAISOBase(TestCase):
             dp = [i[anc_type] for i in as_prc]
             self.assertAlmostEqual(numpy.mean(dp), means[anc_type], places=6)
 
+    def _as_week_df(self):
+        # a week of 15-minute AS prices for one region, as returned by get_AS_dataframe
+        index = pd.date_range('2015-03-01', periods=7*96, freq='15min', tz='UTC')
+        anc_types = ['NR', 'RD', 'RMD', 'RMU', 'RU', 'SR']
+        df = pd.DataFrame({
+            'MARKET_RUN_ID': 'RTM',
+            'ANC_REGION': 'AS_CAISO_EXP',
+            'ANC_TYPE': anc_types * len(index),
+            'MW': numpy.arange(len(index) * len(anc_types)) / 100.0,
+        }, index=index.repeat(len(anc_types)))
+        df.index.name = 'INTERVALSTARTTIME_GMT'
+        return df
+
+    def _ancillary_services_rowwise(self, df):
+        # reference implementation, one lookup per timestamp
+        ret_list = []
+        for i in df.index.unique():
+            a = df.loc[[i]]
+            dp = {
+                'timestamp': i.to_pydatetime(),
+                'market': a['MARKET_RUN_ID'].iloc[0],
+                'zone_name': a['ANC_REGION'].iloc[0],
+                'ba_name': 'CAISO',
+            }
+            for j, row in a.iterrows():
+                dp[row['ANC_TYPE']] = row['MW']
+            ret_list.append(dp)
+        return ret_list
+
+    def test_get_ancillary_services_pivot(self):
+        c = client_factory('CAISO')
+        df = self._as_week_df()
+
+        # drop one service from the first interval
+        df = df.iloc[1:]
+
+        with mock.patch.object(c, 'get_AS_dataframe', return_value=df):
+            as_prc = c.get_ancillary_services('AS_CAISO_EXP', market_run_id='RTM')
+        self.assertEqual(as_prc, self._ancillary_services_rowwise(df))
+        self.assertNotIn('NR', as_prc[0])
+
+    @benchmark
+    def test_get_ancillary_services_benchmark(self):
+        c = client_factory('CAISO')
+        df = self._as_week_df()
+
+        start = datetime.now()
+        expected = self._ancillary_services_rowwise(df)
+        rowwise_time = datetime.now() - start
+
+        start = datetime.now()
+        with mock.patch.object(c, 'get_AS_dataframe', return_value=df):
+            as_prc = c.get_ancillary_services('AS_CAISO_EXP', market_run_id='RTM')
+        pivot_time = datetime.now() - start
+
+        self.assertEqual(as_prc, expected)
+        self.assertLess(pivot_time * 10, rowwise_time)
+
     def test_get_ancillary_services_RU(self):
         c = client_factory('CAISO')
         ts = datetime(2015, 3, 1, 11, 0, 0, tzinfo=pytz.utc)
@@ -755,6 +1247,49 @@ class TestCAISOBase(TestCase):
         self.assertItemsEqual(loc_data[0].keys(),
                               ['node_id', 'latitude', 'longitude', 'area'])
 
+    def test_lmp_loc_cached(self):
+        c = client_factory('CAISO')
+        price_map = {'l': [{}, {}, {'m': [
+            {'n': 'NODE_A', 'c': [37.5, -122.0], 'a': 'PGE'},
+            {'n': 'NODE_B', 'c': [34.0, -118.2], 'a': 'SCE'},
+        ]}]}
+        response = mock.Mock()
+        response.json.return_value = price_map
+
+        self.addCleanup(nodes._registries.clear)
+        nodes._registries.clear()
+        with mock.patch.object(type(c), 'request', return_value=response) as mock_request:
+            loc_data = c.get_lmp_loc()
+            registry = client_factory('CAISO').get_node_registry()
+
+        # downloaded once for both clients
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(loc_data, [
+            {'node_id': 'NODE_A', 'latitude': 37.5, 'longitude': -122.0, 'area': 'PGE'},
+            {'node_id': 'NODE_B', 'latitude': 34.0, 'longitude': -118.2, 'area': 'SCE'},
+        ])
+        self.assertEqual(registry['NODE_B']['area'], 'SCE')
+        self.assertEqual(registry.nearest(34.1, -118.0)['node_id'], 'NODE_B')
+        self.assertEqual([n['node_id'] for n in registry.within(37, -123, 38, -121)], ['NODE_A'])
+
+        # offline from a snapshot
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        registry.save(os.path.join(path, 'nodes.json'))
+        nodes._registries.clear()
+        with mock.patch.object(type(c), 'request') as mock_request:
+            offline = c.get_node_registry(snapshot=os.path.join(path, 'nodes.json'))
+        self.assertEqual(mock_request.call_count, 0)
+        self.assertEqual(list(offline), loc_data)
+
+    def test_lmp_loc_failed(self):
+        c = client_factory('CAISO')
+        self.addCleanup(nodes._registries.clear)
+        nodes._registries.clear()
+        with mock.patch.object(type(c), 'request', return_value=None):
+            self.assertEqual(c.get_lmp_loc(), [])
+            self.assertIsNone(c.get_node_registry())
+
     @mock.patch('pyiso.caiso.CAISOClient.request')
     def test_bad_data(self, mock_request):
         mock_request.return_value = requests.get('https://httpbin.org/')
@@ -0,0 +1,83 @@
+from unittest import TestCase
+from pyiso import nodes
+from pyiso.nodes import NodeRegistry, cached_registry
+from math import cos, radians
+import os
+import random
+import shutil
+import tempfile
+
+
+class TestNodeRegistry(TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.nodes = [{'node_id': 'NODE_%d' % i,
+                       'latitude': rng.uniform(32.5, 42.0),
+                       'longitude': rng.uniform(-124.4, -114.1),
+                       'area': 'CA'} for i in range(2000)]
+        self.registry = NodeRegistry(self.nodes)
+
+    def test_by_id(self):
+        self.assertEqual(len(self.registry), 2000)
+        self.assertIn('NODE_12', self.registry)
+        self.assertEqual(self.registry['NODE_12'], self.nodes[12])
+        self.assertIsNone(self.registry.get('NODE_X'))
+        self.assertRaises(KeyError, self.registry.__getitem__, 'NODE_X')
+
+    def test_nearest_matches_scan(self):
+        scale = cos(radians(sum(n['latitude'] for n in self.nodes) / len(self.nodes)))
+
+        def dist(node, lat, lon):
+            return (node['latitude'] - lat) ** 2 + ((node['longitude'] - lon) * scale) ** 2
+
+        rng = random.Random(11)
+        for _ in range(200):
+            # include points outside the nodes' extent
+            lat, lon = rng.uniform(30, 45), rng.uniform(-127, -111)
+            expected = min(self.nodes, key=lambda node: dist(node, lat, lon))
+            self.assertEqual(self.registry.nearest(lat, lon), expected)
+
+    def test_nearest_exact(self):
+        node = self.nodes[100]
+        self.assertEqual(self.registry.nearest(node['latitude'], node['longitude']), node)
+
+    def test_nearest_empty(self):
+        self.assertIsNone(NodeRegistry([]).nearest(37, -120))
+
+    def test_within(self):
+        box = (36.0, -121.5, 37.5, -119.0)
+        expected = [n for n in self.nodes
+                    if box[0] <= n['latitude'] <= box[2] and box[1] <= n['longitude'] <= box[3]]
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(self.registry.within(*box), expected)
+
+    def test_snapshot_roundtrip(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        snapshot = os.path.join(path, 'nodes.json')
+
+        self.registry.save(snapshot)
+        loaded = NodeRegistry.load(snapshot)
+        self.assertEqual(list(loaded), self.nodes)
+        self.assertEqual(loaded.nearest(37, -120), self.registry.nearest(37, -120))
+
+    def test_cached_registry(self):
+        self.addCleanup(nodes._registries.pop, 'test', None)
+        calls = []
+
+        def build():
+            calls.append(1)
+            return self.registry
+
+        # stored already expired
+        cached_registry('test', build, -1)
+        self.assertIs(cached_registry('test', build, 60), self.registry)
+        self.assertEqual(len(calls), 2)
+
+        self.assertIs(cached_registry('test', build, 60), self.registry)
+        self.assertEqual(len(calls), 2)
+
+    def test_cached_registry_failure_not_cached(self):
+        self.addCleanup(nodes._registries.pop, 'test', None)
+        self.assertIsNone(cached_registry('test', lambda: None, 60))
+        self.assertIs(cached_registry('test', lambda: self.registry, 60), self.registry)
@@ -1,8 +1,10 @@
 from pyiso import client_factory
 from unittest import TestCase
-from io import StringIO
+from io import BytesIO, StringIO
 from datetime import date, datetime
+import mock
 import pytz
+import zipfile
 
 
 class TestNYISOBase(TestCase):
@@ -476,3 +478,26 @@ class TestNYISOBase(TestCase):
         self.assertEqual(len(content_list), 1)
         self.assertEqual(content_list[0].split('\r\n')[0],
                          '"Time Stamp","Name","PTID","LBMP ($/MWHr)","Marginal Cost Losses ($/MWHr)","Marginal Cost Congestion ($/MWHr)"')
+
+    def test_get_any_fetches_each_month_once(self):
+        c = client_factory('NYISO')
+        c.handle_options(data='load', start_at=datetime(2014, 9, 10, tzinfo=pytz.utc),
+                         end_at=datetime(2014, 10, 3, tzinfo=pytz.utc))
+        monthly = BytesIO()
+        with zipfile.ZipFile(monthly, 'w') as z:
+            z.writestr('20140910pal.csv', self.load_csv.getvalue())
+
+        def request(url):
+            # no daily csvs, and a monthly zip for September only
+            if url.endswith('20140901pal_csv.zip'):
+                return mock.Mock(status_code=200, content=monthly.getvalue())
+            return None
+
+        with mock.patch.object(c, 'request', side_effect=request) as mock_request:
+            df = c.get_any('pal', c.parse_load_rtm,
+                           dates_list=[date(2014, 9, 10), date(2014, 9, 11), date(2014, 9, 12),
+                                       date(2014, 10, 1), date(2014, 10, 2)])
+
+        # five daily csvs, then one zip for each month
+        self.assertEqual(mock_request.call_count, 7)
+        self.assertEqual(len(df), 4)
@@ -1,8 +1,15 @@
 from pyiso import client_factory
+from pyiso.records import LoadPoint
+from tests import benchmark
 from unittest import TestCase
+from bs4 import BeautifulSoup
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+import mock
 import pytz
+import shutil
+import tempfile
 
 
 class TestPJM(TestCase):
@@ -155,6 +162,357 @@ class TestPJM(TestCase):
         self.assertEqual(df.ix[tz_func(datetime(2015, 6, 4, 2))]['load_MW'], 64705.985)
         self.assertEqual(df.ix[tz_func(datetime(2015, 12, 15, 23))]['load_MW'], 79345.672)
 
+    def _hourly_loads_sheet(self, dates):
+        # wide layout of the yearly xls files, with a blank hour when DST starts
+        rows = []
+        for i, day in enumerate(dates):
+            row = {'DATE': day, 'COMP': 'RTO', 'MAX': 0, 'HOUR': 0}
+            for hour in range(1, 25):
+                row['HE%02d' % hour] = 1000.0 * i + hour
+            if day == '2015-03-08':
+                row['HE03'] = np.nan
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def test_parse_historical_load_dst(self):
+        df = self.c.parse_historical_load(self._hourly_loads_sheet(['2015-03-08', '2015-11-01']))
+
+        # no DST hours dropped or duplicated
+        self.assertEqual(len(df), 23 + 24)
+        self.assertTrue(df.index.is_unique)
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertEqual(str(df.index.tz), 'UTC')
+
+        # HE01 on the day DST starts is midnight EST
+        self.assertEqual(df['load_MW'][datetime(2015, 3, 8, 5, tzinfo=pytz.utc)], 1.0)
+        # HE04 is 3am EDT
+        self.assertEqual(df['load_MW'][datetime(2015, 3, 8, 7, tzinfo=pytz.utc)], 4.0)
+
+        # on the day DST ends, HE02 is 1am EDT and HE03 is 2am EST
+        self.assertEqual(df['load_MW'][datetime(2015, 11, 1, 5, tzinfo=pytz.utc)], 1002.0)
+        self.assertEqual(df['load_MW'][datetime(2015, 11, 1, 7, tzinfo=pytz.utc)], 1003.0)
+
+    def test_parse_historical_load_spring_forward(self):
+        # DST start day with the 3am load under the skipped hour, HE03, instead of HE04
+        sheet = self._hourly_loads_sheet(['2015-03-08'])
+        sheet['HE03'] = 3.0
+        sheet['HE04'] = np.nan
+        df = self.c.parse_historical_load(sheet)
+
+        # 23 distinct UTC hours, none dropped
+        self.assertEqual(len(df), 23)
+        self.assertTrue(df.index.is_unique)
+        self.assertEqual(df['load_MW'].sum(), sum(range(1, 25)) - 4)
+
+        # the value in the skipped hour lands on 3am EDT
+        self.assertEqual(df['load_MW'][datetime(2015, 3, 8, 7, tzinfo=pytz.utc)], 3.0)
+
+    def test_parse_historical_load_spring_forward_clash(self):
+        # a value in the skipped hour and in the hour after it
+        sheet = self._hourly_loads_sheet(['2015-03-08'])
+        sheet['HE03'] = 3.0
+        with mock.patch('pyiso.LOGGER.warning') as mock_warning:
+            df = self.c.parse_historical_load(sheet)
+
+        # the dropped value is reported
+        self.assertEqual(len(df), 23)
+        self.assertTrue(df.index.is_unique)
+        self.assertEqual(df['load_MW'][datetime(2015, 3, 8, 7, tzinfo=pytz.utc)], 4.0)
+        self.assertEqual(mock_warning.call_count, 1)
+        self.assertIn('2015-03-08 02:00', mock_warning.call_args[0][0])
+
+    def test_fetch_historical_load_cache(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        c = client_factory('PJM', cache=path)
+        sheet = self._hourly_loads_sheet(['2015-01-01', '2015-01-02'])
+
+        with mock.patch.object(c, 'request', return_value=mock.Mock(content=b'xls')) as mock_request, \
+                mock.patch('pandas.read_excel', return_value=sheet) as mock_read:
+            df = c.fetch_historical_load(2015)
+            cached = c.fetch_historical_load(2015)
+
+        # downloaded and parsed once
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(mock_read.call_args[1]['sheet_name'], 'RTO')
+        pd.testing.assert_frame_equal(df, cached, check_index_type=False)
+        self.assertEqual(len(df), 48)
+
+    def test_get_load_historical_spans_years(self):
+        c = self.c
+        est = pytz.timezone(c.TZ_NAME)
+        sheets = {2014: self._hourly_loads_sheet(['2014-12-31']),
+                  2015: self._hourly_loads_sheet(['2015-01-01'])}
+
+        with mock.patch.object(type(c), 'fetch_historical_load',
+                               side_effect=lambda year, region_name: c.parse_historical_load(sheets[year])) as mock_fetch:
+            data = c.get_load(start_at=est.localize(datetime(2014, 12, 31, 12)),
+                              end_at=est.localize(datetime(2015, 1, 1, 11)))
+
+        self.assertEqual(sorted(call[0][0] for call in mock_fetch.call_args_list), [2014, 2015])
+        self.assertEqual(len(data), 24)
+        self.assertEqual(data[0]['timestamp'], est.localize(datetime(2014, 12, 31, 12)))
+        self.assertEqual(data[-1]['timestamp'], est.localize(datetime(2015, 1, 1, 11)))
+        self.assertEqual(data[-1]['load_MW'], 12.0)
+
+    def test_get_load_historical_records(self):
+        c = self.c
+        est = pytz.timezone(c.TZ_NAME)
+        kwargs = dict(start_at=est.localize(datetime(2015, 1, 1, 0)), end_at=est.localize(datetime(2015, 1, 1, 11)))
+        df = c.parse_historical_load(self._hourly_loads_sheet(['2015-01-01']))
+
+        with mock.patch.object(type(c), 'fetch_historical_load_range', return_value=df):
+            data = c.get_load(**kwargs)
+            with mock.patch.object(type(c), 'serialize_records') as mock_serialize:
+                records = c.get_load(return_type='records', **kwargs)
+
+        # records are built once, straight from the frame
+        self.assertEqual(mock_serialize.call_count, 0)
+        self.assertIsInstance(records[0], LoadPoint)
+        self.assertEqual(records, data)
+
+    def _dataminer_payload(self, n_nodes, n_days):
+        # one record per node, price type and day, like the Data Miner LMP endpoints
+        start = datetime(2015, 1, 1, 5, tzinfo=pytz.utc)
+        payload = []
+        for day in range(n_days):
+            publish_date = start + timedelta(days=day)
+            hours = [(publish_date + timedelta(hours=h)).strftime('%Y-%m-%dT%H:%M:%SZ') for h in range(24)]
+            for node in range(n_nodes):
+                for price_type in ['TotalLMP', 'CongLMP', 'LossLMP']:
+                    payload.append({
+                        'pnodeId': 5000 + node, 'priceType': price_type, 'versionNum': 1,
+                        'publishDate': publish_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                        'prices': [{'utchour': hour, 'price': 20.0 + node + h / 100.0}
+                                   for h, hour in enumerate(hours)],
+                    })
+        return payload
+
+    def _parse_dataminer_grouped(self, json):
+        # previous parser: one DataFrame per record, concatenated per publishDate
+        df = pd.DataFrame(json)
+        df = df[df['priceType'] == 'TotalLMP']
+        df['lmp'] = df['prices'].apply(lambda x: pd.DataFrame.from_dict(x))
+        df = df.reset_index()
+        dfs = []
+        for name, gr in df.groupby('publishDate'):
+            lmps = pd.concat([d.set_index('utchour') for d in gr['lmp']])
+            for col in ['pnodeId', 'priceType']:
+                lmps[col] = gr[col].iloc[0]
+            dfs.append(lmps)
+        retdf = pd.concat(dfs)
+        retdf['timestamp'] = pd.to_datetime(retdf.index, utc=True)
+        retdf.rename(columns={'price': 'lmp', 'pnodeId': 'node_id', 'priceType': 'lmp_type'}, inplace=True)
+        retdf['freq'] = self.c.options['freq']
+        retdf['market'] = self.c.options['market']
+        retdf['ba_name'] = 'PJM'
+        retdf.index = retdf['timestamp']
+        return retdf
+
+    def test_parse_dataminer_df(self):
+        self.c.handle_options(data='lmp', start_at=datetime(2015, 1, 1, 5, tzinfo=pytz.utc),
+                              end_at=datetime(2015, 1, 3, 5, tzinfo=pytz.utc))
+        payload = self._dataminer_payload(3, 2)
+        df = self.c.parse_dataminer_df(payload)
+
+        self.assertEqual(len(df), 3 * 2 * 24)
+        self.assertEqual(set(df['lmp_type']), set(['TotalLMP']))
+        self.assertEqual(df.index.name, 'timestamp')
+        self.assertEqual(df.index[1], datetime(2015, 1, 1, 6, tzinfo=pytz.utc))
+        self.assertEqual(df['lmp'].iloc[1], 20.01)
+
+        # each node keeps its own prices
+        node = df[df['node_id'] == 5001]
+        self.assertEqual(len(node), 2 * 24)
+        self.assertEqual(list(node['lmp'][:3]), [21.0, 21.01, 21.02])
+        self.assertTrue((node['timestamp'] == node.index).all())
+
+        self.assertEqual(len(self.c.parse_dataminer_df([])), 0)
+
+    @benchmark
+    def test_parse_dataminer_df_benchmark(self):
+        self.c.handle_options(data='lmp', start_at=datetime(2015, 1, 1, 5, tzinfo=pytz.utc),
+                              end_at=datetime(2015, 1, 31, 5, tzinfo=pytz.utc))
+        payload = self._dataminer_payload(100, 30)
+
+        start = datetime.now()
+        expected = self._parse_dataminer_grouped(payload)
+        grouped_time = datetime.now() - start
+
+        start = datetime.now()
+        df = self.c.parse_dataminer_df(payload)
+        flat_time = datetime.now() - start
+
+        self.assertEqual(len(df), len(expected))
+        self.assertEqual(len(df), 100 * 30 * 24)
+        self.assertLess(flat_time * 10, grouped_time)
+
+    def test_construct_dataminer_params(self):
+        start_at = datetime(2015, 1, 1, 5, tzinfo=pytz.utc)
+        nodes = list(range(25))
+        params = self.c.construct_dataminer_params(nodes, start_at, start_at + timedelta(days=10))
+
+        # 3 node batches for each of 2 windows
+        self.assertEqual(len(params), 6)
+        self.assertEqual([len(p['pnodeList']) for p in params[:3]], [10, 10, 5])
+        self.assertEqual(params[0]['startDate'], '2015-01-01T05:00:00Z')
+        self.assertEqual(params[0]['endDate'], '2015-01-08T05:00:00Z')
+        self.assertEqual(params[3]['startDate'], '2015-01-08T05:00:00Z')
+        self.assertEqual(params[3]['endDate'], '2015-01-11T05:00:00Z')
+        self.assertEqual(params[3]['pnodeList'], list(range(10)))
+
+    def test_get_lmp_dataminer_chunks(self):
+        c = self.c
+        payload = self._dataminer_payload(12, 9)
+        start_at = datetime(2015, 1, 1, 5, tzinfo=pytz.utc)
+        end_at = datetime(2015, 1, 9, 5, tzinfo=pytz.utc)
+
+        def post(url, mode, json):
+            # return the requested nodes and days, including the day at endDate
+            nodes = set(json['pnodeList'])
+            window = (json['startDate'], json['endDate'])
+            records = [r for r in payload
+                       if r['pnodeId'] in nodes and window[0] <= r['publishDate'] <= window[1]]
+            return mock.Mock(status_code=200, json=mock.Mock(return_value=records))
+
+        progress = []
+        with mock.patch.object(c, 'request', side_effect=post) as mock_request:
+            data = c.get_lmp(node_id=[5000 + i for i in range(12)], start_at=start_at, end_at=end_at,
+                             market=c.MARKET_CHOICES.hourly,
+                             progress=lambda *args: progress.append(args))
+
+        # 2 node batches in each of 2 windows
+        self.assertEqual(mock_request.call_count, 4)
+        self.assertEqual([p[:2] for p in progress], [(1, 4), (2, 4), (3, 4), (4, 4)])
+        self.assertEqual(sum(p[2] for p in progress), 12 * (8 + 2) * 24)
+
+        # no repeated rows where windows meet
+        self.assertEqual(len(data), 12 * (8 * 24 + 1))
+        self.assertEqual(len(set((d['node_id'], d['timestamp']) for d in data)), len(data))
+        self.assertEqual(data[0]['timestamp'], start_at)
+        self.assertEqual(max(d['timestamp'] for d in data), end_at)
+
+    def _snapshot_pages(self):
+        tie_flows = """
+    <p>As of <span id="ctl00_ContentPlaceHolder1_DateAndTime">12.11.2015 17:21</span> EDT</p>
+            <table class="edata-table stripped">
+                <thead><tr><th>Name</th><th class="right">Actual (MW)</th><th class="right">Scheduled (MW)</th></tr></thead>
+                <tbody><tr><td>PJM RTO</td><td class="right">-3,215</td><td class="right">-3,000</td></tr></tbody>
+            </table>
+            """
+        zonal_lmp = """
+    <p>As of <span id="ctl00_ContentPlaceHolder1_DateAndTime">12.11.2015 17:24</span> EDT</p>
+            <table class="edata-table stripped">
+                <thead><tr><th>Name</th><th class="right">LMP</th></tr></thead>
+                <tbody>
+                <tr><td>AECO</td><td class="right">$25.10</td></tr>
+                <tr><td>APS</td><td class="right">$(1.50)</td></tr>
+                </tbody>
+            </table>
+            """
+        markets = """<html><body><div id="genFuelMix"><p id="asOfDate"> As of 5:00 p.m. EPT</p>\
+<div id="rtschartallfuelspjmGenFuel_container"></div><script type="text/javascript">
+var chart = new Highcharts.Chart({series: [{type: 'pie', data: [{name: 'Coal', y: 30123, color: '#333'},\
+{name: 'Gas', y: 20456, color: '#666'}]}]});</script></div></body></html>"""
+        return [mock.Mock(content=page.encode('utf-8'))
+                for page in [self.edata_inst_load, tie_flows, zonal_lmp, markets]]
+
+    def test_get_snapshot(self):
+        c = self.c
+        with mock.patch.object(c, 'request_many', return_value=self._snapshot_pages()) as mock_request_many:
+            snapshot = c.get_snapshot()
+
+        # one batch of requests
+        self.assertEqual(mock_request_many.call_count, 1)
+        self.assertEqual(len(mock_request_many.call_args[0][0]), 4)
+
+        # each page's time, rounded down to 5 minutes
+        ts = datetime(2015, 12, 11, 22, 20, tzinfo=pytz.utc)
+        self.assertEqual(snapshot['timestamp'], ts)
+        self.assertEqual(snapshot['stale'], [])
+        self.assertEqual(snapshot['load'], [{'timestamp': ts, 'freq': '5m', 'market': 'RT5M',
+                                             'ba_name': 'PJM', 'load_MW': 91419}])
+        self.assertEqual(snapshot['trade'][0]['net_exp_MW'], 3215)
+        self.assertEqual(snapshot['trade'][0]['timestamp'], ts)
+        self.assertEqual(dict((dp['node_id'], dp['lmp']) for dp in snapshot['lmp']), {'AECO': 25.10, 'APS': -1.50})
+        self.assertEqual(set(dp['timestamp'] for dp in snapshot['lmp']), set([ts]))
+        self.assertEqual([(dp['fuel_name'], dp['gen_MW']) for dp in snapshot['generation']],
+                         [('coal', 30123), ('natgas', 20456)])
+
+    def test_get_snapshot_stale_page(self):
+        c = self.c
+        pages = self._snapshot_pages()
+        # load page from the previous 5-minute interval
+        pages[0] = mock.Mock(content=self.edata_inst_load.replace('17:23', '17:18').encode('utf-8'))
+        with mock.patch.object(c, 'request_many', return_value=pages), \
+                mock.patch('pyiso.LOGGER.warning') as mock_warning:
+            snapshot = c.get_snapshot()
+
+        # load keeps its own time, and is reported as stale
+        ts = datetime(2015, 12, 11, 22, 20, tzinfo=pytz.utc)
+        self.assertEqual(snapshot['timestamp'], ts)
+        self.assertEqual(snapshot['load'][0]['timestamp'], ts - timedelta(minutes=5))
+        self.assertEqual(snapshot['trade'][0]['timestamp'], ts)
+        self.assertEqual(snapshot['stale'], ['load'])
+        self.assertEqual(mock_warning.call_count, 1)
+
+    def test_get_snapshot_failed_pages(self):
+        c = self.c
+        pages = self._snapshot_pages()
+        pages[0] = None
+        pages[3] = None
+        with mock.patch.object(c, 'request_many', return_value=pages):
+            snapshot = c.get_snapshot()
+
+        self.assertEqual(snapshot['load'], [])
+        self.assertEqual(snapshot['generation'], [])
+        self.assertEqual(len(snapshot['trade']), 1)
+        self.assertEqual(len(snapshot['lmp']), 2)
+
+    def _markets_operations_page(self, n_sections):
+        # fuel mix chart in the middle of a page of other markup and scripts
+        filler = """<div class="section"><ul class="nav"><li><a href="/markets-and-operations/energy.aspx">Energy</a></li>\
+<li><a href="/markets-and-operations/capacity.aspx">Capacity</a></li></ul><table class="data"><tr><th>Zone</th><th>MW</th></tr>\
+<tr><td>AECO</td><td>1,234</td></tr><tr><td>APS</td><td>5,678</td></tr></table>\
+<script type="text/javascript">var opts = {name: 'x', y: 1};</script></div>\n"""
+        page = self._snapshot_pages()[3].content.decode('utf-8')
+        head, body = page.split('<body>')
+        half = filler * (n_sections // 2)
+        return (head + '<body>' + half + body.replace('</body>', half + '</body>')).encode('utf-8')
+
+    def test_parse_realtime_genmix_content(self):
+        content = self._markets_operations_page(10)
+        data = self.c.parse_realtime_genmix_content(content)
+
+        self.assertEqual(data, self.c.parse_realtime_genmix(BeautifulSoup(content, 'lxml')))
+        self.assertEqual([(dp['fuel_name'], dp['gen_MW']) for dp in data], [('coal', 30123), ('natgas', 20456)])
+
+        # no fuel mix
+        self.assertEqual(self.c.parse_realtime_genmix_content(b'<html><body></body></html>'), [])
+
+    @benchmark
+    def test_parse_realtime_genmix_content_benchmark(self):
+        content = self._markets_operations_page(1000)
+
+        start = datetime.now()
+        data = self.c.parse_realtime_genmix_content(content)
+        regex_time = datetime.now() - start
+
+        start = datetime.now()
+        expected = self.c.parse_realtime_genmix(BeautifulSoup(content, 'lxml'))
+        soup_time = datetime.now() - start
+
+        self.assertEqual(data, expected)
+        self.assertLess(regex_time * 5, soup_time)
+
+    def test_get_generation_latest_content(self):
+        c = self.c
+        response = mock.Mock(content=self._markets_operations_page(2))
+        with mock.patch.object(c, 'request', return_value=response):
+            data = c.get_generation(latest=True)
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[0]['fuel_name'], 'coal')
+
     def test_parse_date_from_markets_operations(self):
         soup = self.c.fetch_markets_operations_soup()
         ts = self.c.parse_date_from_markets_operations(soup)
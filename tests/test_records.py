@@ -0,0 +1,49 @@
+from unittest import TestCase
+from pyiso.records import DataPoint, GenPoint, LmpPoint, LoadPoint, TradePoint, record_class
+from datetime import datetime
+import pickle
+import pytz
+
+
+class TestRecords(TestCase):
+    def setUp(self):
+        self.dp = {'timestamp': datetime(2016, 1, 1, tzinfo=pytz.utc), 'ba_name': 'CAISO',
+                   'market': 'RT5M', 'freq': '5m', 'node_id': 'SLAP_PGP2-APND', 'lmp': 30.5,
+                   'lmp_type': 'LMP'}
+
+    def test_dict_interface(self):
+        record = LmpPoint(self.dp)
+        self.assertEqual(record, self.dp)
+        self.assertEqual(dict(record), self.dp)
+        self.assertEqual(record['lmp'], 30.5)
+        self.assertIn('node_id', record)
+        self.assertNotIn('gen_MW', record)
+        self.assertRaises(KeyError, lambda: record['gen_MW'])
+        self.assertEqual(len(record), len(self.dp))
+
+        record['lmp'] = 31.0
+        record['extra'] = 'value'
+        self.assertEqual(record.to_dict(), dict(self.dp, lmp=31.0, extra='value'))
+        del record['extra']
+        self.assertNotIn('extra', record)
+
+    def test_unset_field(self):
+        record = LoadPoint(timestamp=self.dp['timestamp'])
+        self.assertEqual(record.keys(), ['timestamp'])
+        self.assertIsNone(record.get('load_MW'))
+
+    def test_slots(self):
+        record = GenPoint(fuel_name='wind', gen_MW=1.0)
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertRaises(AttributeError, setattr, record, 'not_a_field', 1)
+
+    def test_pickle(self):
+        record = LmpPoint(self.dp, extra=1)
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+
+    def test_record_class(self):
+        self.assertIs(record_class(['timestamp', 'gen_MW']), GenPoint)
+        self.assertIs(record_class(['timestamp', 'load_MW']), LoadPoint)
+        self.assertIs(record_class(['timestamp', 'lmp']), LmpPoint)
+        self.assertIs(record_class(['timestamp', 'net_exp_MW']), TradePoint)
+        self.assertIs(record_class(['timestamp']), DataPoint)